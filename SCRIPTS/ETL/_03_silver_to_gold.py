@@ -1,8 +1,11 @@
 from pathlib import Path
 import pandas as pd
+import numpy as np
 from loguru import logger
 import uuid
 import os
+import re
+import shutil
 from dotenv import load_dotenv
 import unicodedata
 
@@ -22,6 +25,119 @@ silver_dir = root_path / 'DATA' / 'SILVER'
 gold_dir = root_path / 'DATA' / 'GOLD'
 gold_dir.mkdir(parents=True, exist_ok=True)
 
+# Silver columns used by each gold builder. Each silver file is read once,
+# projected to the union of its builders' columns, and shared between them.
+REPARTITION_PERSON_COLUMNS = [
+    'technical_manager', 'substitute_technical_manager',
+    'key_account_manager', 'substitute_key_account_manager',
+    'electrical_manager', 'controller_responsible', 'controller_deputy',
+    'administrative_responsible', 'administrative_deputy'
+]
+DATABASE_PERSON_COLUMNS = ['control_room_l1', 'field_crew', 'hse_coordination', 'overseer', 'commercial_controller', 'substitute_commercial_controller']
+DATABASE_COMPANY_COLUMNS = [
+    'customer', 'legal_representative', 'portfolio_name', 'asset_manager', 'project_developer',
+    'co_developper', 'main_service_company', 'service_provider', 'expert_comptable_chartered_accountant',
+    'commissaire_aux_comptes_legal_auditor', 'energy_trader', 'transfer_station_power_station_service_company',
+    'grid_operator', 'bank_domiciliation', 'wec_service_company'
+]
+ICE_DETECTION_COLUMN = 'ice_detection_system_automatic_stop_yes_no_;_automatic_restart_yes_no'
+
+# Yearly performance columns of database_sheet (one per year, e.g. revenue_actual_2023,
+# productible_actual_2023_m_wh), matched by pattern so a new year column needs no code change
+PERFORMANCE_COLUMN_RE = re.compile(
+    r'^(?P<measure>revenue_actual|revenue_target|productible_actual)_(?P<year>\d{4})(?:_m_wh)?$'
+)
+# measure → (gold table, column)
+PERFORMANCE_MEASURES = {
+    'revenue_actual': ('farm_actual_performances', 'amount'),
+    'productible_actual': ('farm_actual_performances', 'productible_mwh'),
+    'revenue_target': ('farm_target_performances', 'amount'),
+}
+
+SILVER_COLUMNS = {
+    'repartition_sheet.csv': {
+        'persons': REPARTITION_PERSON_COLUMNS,
+        'farms': ['spv', 'project', 'code', 'farm_type'],
+        'farm_referents': ['code'] + REPARTITION_PERSON_COLUMNS,
+    },
+    'database_sheet.csv': {
+        'persons': ['legal_representative'] + DATABASE_PERSON_COLUMNS,
+        'companies': DATABASE_COMPANY_COLUMNS,
+        'farm_company_roles': ['three_letter_code'] + DATABASE_COMPANY_COLUMNS,
+        'farm_referents': ['three_letter_code', 'legal_representative'] + DATABASE_PERSON_COLUMNS,
+        'farm_administrations': [
+            'three_letter_code', 'remit_subscription', 'siret', 'account_number', 'vat_number',
+            'head_office_address', 'legal_representative', 'financial_guarantee_amount',
+            'financial_guarantee_due_date', 'land_lease_payment_date', 'windmanager_subsidiary'
+        ],
+        'farm_environmental_installations': ['three_letter_code', 'aip_number', 'duty_dreal_contact', 'prefecture_name', 'prefecture_address'],
+        'farm_financial_guarantees': ['three_letter_code', 'financial_guarantee_amount', 'financial_guarantee_due_date'],
+        'farm_locations': [
+            'three_letter_code', 'map_reference', 'region', 'departement', 'commune',
+            'km_ar_arras', 'temps_ar_vertou_en_h', 'peages_arras', 'peages_nantes'
+        ],
+        'farm_om_contracts': ['three_letter_code', 'service_contract_type', 'end_date_of_om_contract'],
+        'farm_tcma_contracts': [
+            'three_letter_code', 'wf_status', 'tcma_status', 'contract_type', 'tcma_signature_date',
+            'tcma_entree_en_vigueur', 'beginning_of_remuneration', 'end_date_of_tcma', 'tcma_compensation_rate'
+        ],
+        'farm_statuses': ['three_letter_code', 'wf_status', 'tcma_status'],
+        'farm_substation_details': ['three_letter_code', 'transfer_station_power_station_service_company'],
+        'ice_detection_systems': ['three_letter_code', ICE_DETECTION_COLUMN],
+        'farm_performances': ['three_letter_code', PERFORMANCE_COLUMN_RE],
+    },
+    'dbgrid_sheet.csv': {
+        'substations': ['three_letter_code', 'nom_du_pdl', 'coordonnees_gps'],
+    },
+    'dbwtg_sheet.csv': {
+        # Turbine coordinates are optional (see wtg_coordinates)
+        'wind_turbine_generators': [
+            'three_letter_code', 'wtg_serial_number', 'num_wtg', 'manufacturer', 'wtg_type', 'cod',
+            'coordonnees_gps', 'gps_coordinates', 'gps', 'latitude', 'longitude'
+        ],
+        'farm_turbine_details': [
+            'three_letter_code', 'manufacturer', 'cod',
+            'hub_height_[m]', 'rotor_diameter_[m]', 'tip_height_m_', 'rated_power_[mw]'
+        ],
+    },
+}
+
+def read_silver(file_name):
+    # Columns missing from the sheet are tolerated: builders check `col in df.columns`.
+    # A builder may list a compiled pattern for a family of columns (one per year).
+    columns = [col for builder_columns in SILVER_COLUMNS[file_name].values() for col in builder_columns]
+    needed = {col for col in columns if isinstance(col, str)}
+    patterns = [col for col in columns if isinstance(col, re.Pattern)]
+    return pd.read_csv(silver_dir / file_name, encoding='utf-8-sig',
+                       usecols=lambda col: col in needed or any(pattern.match(col) for pattern in patterns))  # type: ignore
+
+# Entity keys are derived from the natural key (uuid5), not drawn at random:
+# an unchanged row keeps its uuid from one run to the next, so the row hashes
+# of _06_csv_to_db.py only see the rows that really changed
+UUID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, 'wndmngr.db')
+
+def stable_uuids(df, entity, key_columns):
+    """uuid5 of (entity, natural key, occurrence) for each row of `df`
+
+    The occurrence number tells apart rows sharing a natural key (e.g. two
+    substations with the same name on one farm), in their order in the sheet.
+    """
+    if df.empty:
+        return []
+    occurrence = df.groupby(key_columns, dropna=False, sort=False).cumcount()
+    return [
+        str(uuid.uuid5(UUID_NAMESPACE, '|'.join([entity, *map(_key_part, values), str(count)])))
+        for values, count in zip(df[key_columns].itertuples(index=False, name=None), occurrence)
+    ]
+
+def _key_part(value):
+    # NULL and float-typed ids (18.0 in a column with NULLs) written the same way every run
+    if pd.isna(value):
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
 ###########################
 ### REFERENCE TABLES ######
 ###########################
@@ -94,16 +210,11 @@ logger.success(f"person_roles: {len(df_person_roles)} rows")
 logger.info("Creating entity tables...")
 
 # Load source data
-df_repartition = pd.read_csv(silver_dir / 'repartition_sheet.csv', encoding='utf-8-sig')  # type: ignore
-df_database = pd.read_csv(silver_dir / 'database_sheet.csv', encoding='utf-8-sig')  # type: ignore
+df_repartition = read_silver('repartition_sheet.csv')
+df_database = read_silver('database_sheet.csv')
 
 # Step 1: Extract all persons (from repartition + legal representatives)
-person_columns = [
-    'technical_manager', 'substitute_technical_manager',
-    'key_account_manager', 'substitute_key_account_manager',
-    'electrical_manager', 'controller_responsible', 'controller_deputy',
-    'administrative_responsible', 'administrative_deputy'
-]
+person_columns = REPARTITION_PERSON_COLUMNS
 
 all_persons = []
 for col in person_columns:
@@ -119,7 +230,7 @@ legal_rep_companies = [rep for rep in unique_legal_reps if rep != '' and any(kw
 legal_rep_persons = [rep for rep in unique_legal_reps if rep != '' and len(rep.split()) == 2 and rep not in legal_rep_companies]
 
 # Extract persons from database_sheet columns (control room, field crew, HSE, overseer, commercial controller)
-database_person_columns = ['control_room_l1', 'field_crew', 'hse_coordination', 'overseer', 'commercial_controller', 'substitute_commercial_controller']
+database_person_columns = DATABASE_PERSON_COLUMNS
 company_keywords = ['société', 'statkraft', 'seris', 'loire', 'france', 'sas', 'sarl', 'gestion', 'securite', 'securitas']
 
 database_persons = []
@@ -217,9 +328,9 @@ df_farms = (
 )
 
 # Step 4: Add UUIDs to all entities
-df_persons.insert(0, 'uuid', [str(uuid.uuid4()) for _ in range(len(df_persons))])
-df_companies.insert(0, 'uuid', [str(uuid.uuid4()) for _ in range(len(df_companies))])
-df_farms.insert(0, 'uuid', [str(uuid.uuid4()) for _ in range(len(df_farms))])
+df_persons.insert(0, 'uuid', stable_uuids(df_persons, 'persons', ['first_name', 'last_name']))
+df_companies.insert(0, 'uuid', stable_uuids(df_companies, 'companies', ['name']))
+df_farms.insert(0, 'uuid', stable_uuids(df_farms, 'farms', ['code']))
 
 # Step 5: Save entity tables
 df_persons.to_csv(gold_dir / 'persons.csv', index=False)
@@ -250,6 +361,9 @@ def get_person_uuid(full_name):
     first_name, last_name = split_name(full_name)
     return person_lookup.get((first_name, last_name))
 
+# A referent is identified by its farm, role and person or company
+REFERENT_KEY = ['farm_uuid', 'person_role_id', 'company_role_id', 'person_uuid', 'company_uuid']
+
 # Map column names to role names
 column_to_role = {
     'technical_manager': 'Technical Manager',
@@ -288,6 +402,7 @@ for col_name, role_name in column_to_role.items():
                     })
 
 df_farm_referents = pd.DataFrame(referents_list).drop_duplicates()
+df_farm_referents.insert(0, 'uuid', stable_uuids(df_farm_referents, 'farm_referents', REFERENT_KEY))
 df_farm_referents.to_csv(gold_dir / 'farm_referents.csv', index=False)
 logger.success(f"farm_referents: {len(df_farm_referents)} rows")
 
@@ -577,6 +692,7 @@ if louis_chenel_uuid and head_tech_mgmt_role_id:
 
 # Re-save farm_referents with all persons (legal reps + database_sheet persons + Louis Chenel)
 df_farm_referents = pd.DataFrame(referents_list).drop_duplicates()
+df_farm_referents.insert(0, 'uuid', stable_uuids(df_farm_referents, 'farm_referents', REFERENT_KEY))
 df_farm_referents.to_csv(gold_dir / 'farm_referents.csv', index=False)
 logger.success(f"farm_referents (updated with all persons): {len(df_farm_referents)} rows")
 
@@ -756,6 +872,60 @@ df_farm_statuses = pd.DataFrame(farm_statuses_list).drop_duplicates()
 df_farm_statuses.to_csv(gold_dir / 'farm_statuses.csv', index=False)
 logger.success(f"farm_statuses: {len(df_farm_statuses)} rows")
 
+# Farm Actual / Target Performances (yearly revenue and production, wide year columns → one row per farm and year)
+def farm_performances(df):
+    """{table_name: one row per farm and year} from the PERFORMANCE_COLUMN_RE columns, in one melt"""
+    tables = {}
+    for measure, (table_name, column) in PERFORMANCE_MEASURES.items():
+        tables.setdefault(table_name, ['farm_uuid', 'farm_code', 'year']).append(column)
+
+    year_columns = [col for col in df.columns if PERFORMANCE_COLUMN_RE.match(col)]
+    if not year_columns:
+        logger.warning("No yearly performance columns in database_sheet")
+        return {table_name: pd.DataFrame(columns=columns) for table_name, columns in tables.items()}
+
+    df_long = df.melt(id_vars='three_letter_code', value_vars=year_columns, var_name='column', value_name='value')
+    df_long = df_long.join(df_long.pop('column').str.extract(PERFORMANCE_COLUMN_RE))
+    df_long['value'] = pd.to_numeric(df_long['value'], errors='coerce').round(2)
+    df_long['farm_uuid'] = df_long['three_letter_code'].map(farm_lookup)
+    df_long = df_long.dropna(subset=['farm_uuid', 'value']).rename(columns={'three_letter_code': 'farm_code'})
+    df_long['year'] = df_long['year'].astype(int)
+    df_long['table'] = df_long['measure'].map(lambda measure: PERFORMANCE_MEASURES[measure][0])
+    df_long['measure'] = df_long['measure'].map(lambda measure: PERFORMANCE_MEASURES[measure][1])
+
+    # One column per measure of the table, first value of a farm and year kept
+    return {
+        table_name: (
+            df_long[df_long['table'] == table_name]
+            .drop_duplicates(subset=['farm_uuid', 'year', 'measure'])
+            .pivot(index=['farm_uuid', 'farm_code', 'year'], columns='measure', values='value')
+            .reset_index()
+            .reindex(columns=columns)
+            .sort_values(['farm_code', 'year'])
+            .reset_index(drop=True)
+        )
+        for table_name, columns in tables.items()
+    }
+
+
+def to_parquet_by_year(df, table_name):
+    """Columnar copy of a yearly table, one partition per year (GOLD/PARQUET/<table>/year=YYYY/)"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        logger.warning(f"{table_name}: pyarrow not installed, parquet copy skipped (pip install \"wndmngr-db[parquet]\")")
+        return
+    table_dir = gold_dir / 'PARQUET' / table_name
+    shutil.rmtree(table_dir, ignore_errors=True)  # partitions of years no longer in the sheet
+    df.to_parquet(table_dir, partition_cols=['year'], index=False)
+
+
+for table_name, df_performances in farm_performances(df_database).items():
+    df_performances.to_csv(gold_dir / f'{table_name}.csv', index=False)
+    to_parquet_by_year(df_performances, table_name)
+    logger.success(f"{table_name}: {len(df_performances)} rows "
+                   f"({df_performances['year'].nunique()} years)")
+
 ###########################
 ### GRID DATA (SUBSTATIONS)
 ###########################
@@ -763,7 +933,7 @@ logger.success(f"farm_statuses: {len(df_farm_statuses)} rows")
 logger.info("Creating substations table from GRID data...")
 
 # Load GRID data
-df_grid = pd.read_csv(silver_dir / 'dbgrid_sheet.csv', encoding='utf-8-sig')
+df_grid = read_silver('dbgrid_sheet.csv')
 
 substations_list = []
 
@@ -773,14 +943,14 @@ for _, row in df_grid.iterrows():
 
     if farm_uuid:
         substations_list.append({
-            'uuid': str(uuid.uuid4()),
             'substation_name': row['nom_du_pdl'] if pd.notna(row['nom_du_pdl']) else '',
             'farm_uuid': farm_uuid,
             'farm_code': farm_code,
             'gps_coordinates': row['coordonnees_gps'] if pd.notna(row['coordonnees_gps']) else None
         })
 
-df_substations = pd.DataFrame(substations_list).drop_duplicates()
+df_substations = pd.DataFrame(substations_list).drop_duplicates().reset_index(drop=True)
+df_substations.insert(0, 'uuid', stable_uuids(df_substations, 'substations', ['farm_code', 'substation_name']))
 df_substations.to_csv(gold_dir / 'substations.csv', index=False)
 logger.success(f"substations: {len(df_substations)} rows")
 
@@ -825,23 +995,92 @@ logger.success(f"farm_substation_details: {len(df_farm_substation_details)} rows
 
 logger.info("Creating wind turbine generators table from WTG data...")
 
-# Load WTG data
-df_wtg = pd.read_csv(silver_dir / 'dbwtg_sheet.csv', encoding='utf-8-sig')
+# Load WTG data (shared with farm_turbine_details)
+df_wtg = read_silver('dbwtg_sheet.csv')
 
-# Create substations lookup for WTG assignment
+# Create substations lookup for WTG assignment (first substation seen per farm, used as fallback)
 substations_lookup = {}
 for _, sub in df_substations.iterrows():
     farm_code = sub['farm_code']
     if farm_code not in substations_lookup:
         substations_lookup[farm_code] = sub['uuid']
 
+# Parse GPS strings ("47.123, -1.234", "47,123 ; -1,234", ...) into lat/lon floats
+GPS_NUMBER = re.compile(r'[-+]?\d+(?:\.\d+)?')
+
+def parse_gps_coordinates(value):
+    if pd.isna(value) or str(value).strip() == '':
+        return (None, None)
+    text = str(value).strip()
+    if ';' in text:  # French notation: decimal comma, semicolon separator
+        text = text.replace(',', '.').replace(';', ' ')
+    numbers = GPS_NUMBER.findall(text)
+    if len(numbers) != 2:
+        numbers = GPS_NUMBER.findall(text.replace(',', '.'))
+    if len(numbers) != 2:
+        return (None, None)
+    lat, lon = float(numbers[0]), float(numbers[1])
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return (None, None)
+    return (lat, lon)
+
+def coordinates_frame(gps_values):
+    # Parse each distinct string once (turbines of a farm often share the same value)
+    parsed = {value: parse_gps_coordinates(value) for value in gps_values.dropna().unique()}
+    coords = gps_values.map(lambda v: parsed.get(v, (None, None)))
+    return pd.DataFrame(coords.tolist(), index=gps_values.index, columns=['lat', 'lon'], dtype='float64')
+
+def wtg_coordinates(df):
+    # Turbine coordinates are optional in DB WTG: a combined GPS column or a latitude/longitude pair
+    for col in ['coordonnees_gps', 'gps_coordinates', 'gps']:
+        if col in df.columns:
+            return coordinates_frame(df[col])
+    if 'latitude' in df.columns and 'longitude' in df.columns:
+        return pd.DataFrame({
+            'lat': pd.to_numeric(df['latitude'], errors='coerce'),
+            'lon': pd.to_numeric(df['longitude'], errors='coerce'),
+        }, index=df.index)
+    return None
+
+# Spatial index partitioned by farm code: a turbine's candidates are only the substations
+# of its own farm, so the join yields a handful of pairs per turbine and ranking is vectorised
+def nearest_substations(df_turbines, turbine_coords, df_subs, sub_coords):
+    subs = pd.concat([df_subs[['uuid', 'farm_code']], sub_coords], axis=1).dropna(subset=['lat', 'lon'])
+    turbines = pd.concat([df_turbines[['three_letter_code']], turbine_coords], axis=1).dropna(subset=['lat', 'lon'])
+    if subs.empty or turbines.empty:
+        return {}
+    turbines = turbines.assign(wtg_row=turbines.index)
+    pairs = turbines.merge(subs, left_on='three_letter_code', right_on='farm_code', suffixes=('', '_sub'))
+    if pairs.empty:
+        return {}
+
+    # Equirectangular approximation: exact enough to rank substations a few km apart
+    lat1, lon1 = np.radians(pairs['lat'].to_numpy()), np.radians(pairs['lon'].to_numpy())
+    lat2, lon2 = np.radians(pairs['lat_sub'].to_numpy()), np.radians(pairs['lon_sub'].to_numpy())
+    x = (lon2 - lon1) * np.cos((lat1 + lat2) / 2)
+    y = lat2 - lat1
+    pairs['distance'] = x * x + y * y
+
+    nearest = pairs.loc[pairs.groupby('wtg_row')['distance'].idxmin()]
+    return dict(zip(nearest['wtg_row'], nearest['uuid']))
+
+# Assign turbines to their nearest substation when both sides have coordinates
+nearest_substation_lookup = {}
+turbine_coords = wtg_coordinates(df_wtg)
+if turbine_coords is not None and not df_substations.empty:
+    substation_coords = coordinates_frame(df_substations['gps_coordinates'])
+    nearest_substation_lookup = nearest_substations(df_wtg, turbine_coords, df_substations, substation_coords)
+    logger.info(f"Nearest substation assigned by GPS for {len(nearest_substation_lookup)}/{len(df_wtg)} turbines")
+else:
+    logger.info("No turbine coordinates in DB WTG, using first substation per farm")
+
 # Create wind turbine generators
 wtg_list = []
 
-for _, row in df_wtg.iterrows():
+for idx, row in df_wtg.iterrows():
     farm_code = row['three_letter_code']
     farm_uuid = farm_lookup.get(farm_code)
-    substation_uuid = substations_lookup.get(farm_code)
+    substation_uuid = nearest_substation_lookup.get(idx) or substations_lookup.get(farm_code)
 
     if farm_uuid and substation_uuid:
         serial_number = int(row['wtg_serial_number']) if pd.notna(row['wtg_serial_number']) else None
@@ -861,7 +1100,6 @@ for _, row in df_wtg.iterrows():
                 cod = None
 
             wtg_list.append({
-                'uuid': str(uuid.uuid4()),
                 'serial_number': serial_number,
                 'wtg_number': row['num_wtg'] if pd.notna(row['num_wtg']) else f'WTG-{serial_number}',
                 'farm_uuid': farm_uuid,
@@ -872,28 +1110,27 @@ for _, row in df_wtg.iterrows():
                 'commercial_operation_date': cod
             })
 
-df_wtg = pd.DataFrame(wtg_list).drop_duplicates()
-df_wtg.to_csv(gold_dir / 'wind_turbine_generators.csv', index=False)
-logger.success(f"wind_turbine_generators: {len(df_wtg)} rows")
+df_wind_turbine_generators = pd.DataFrame(wtg_list).drop_duplicates().reset_index(drop=True)
+df_wind_turbine_generators.insert(0, 'uuid', stable_uuids(
+    df_wind_turbine_generators, 'wind_turbine_generators', ['farm_code', 'serial_number']))
+df_wind_turbine_generators.to_csv(gold_dir / 'wind_turbine_generators.csv', index=False)
+logger.success(f"wind_turbine_generators: {len(df_wind_turbine_generators)} rows")
 
 # ═══════════════════════════════════════════════════════════════════════════
 # FARM TURBINE DETAILS (Aggregated per farm from WTG data)
 # ═══════════════════════════════════════════════════════════════════════════
 logger.info("Creating farm_turbine_details...")
 
-# Load the original WTG data with all technical details
-df_wtg_full = pd.read_csv(silver_dir / 'dbwtg_sheet.csv', encoding='utf-8-sig')
-
 turbine_details_list = []
 
-for farm_code in df_wtg_full['three_letter_code'].unique():
+for farm_code in df_wtg['three_letter_code'].unique():
     farm_uuid = farm_lookup.get(farm_code)
 
     if not farm_uuid:
         continue
 
     # Filter turbines for this farm
-    farm_turbines = df_wtg_full[df_wtg_full['three_letter_code'] == farm_code]
+    farm_turbines = df_wtg[df_wtg['three_letter_code'] == farm_code]
 
     # Count turbines
     turbine_count = len(farm_turbines)
@@ -955,7 +1192,7 @@ logger.success(f"farm_turbine_details: {len(df_turbine_details)} rows")
 logger.info("Creating ice detection systems...")
 
 # Parse ice detection system column
-ice_col = 'ice_detection_system_automatic_stop_yes_no_;_automatic_restart_yes_no'
+ice_col = ICE_DETECTION_COLUMN
 ice_systems_set = set()
 
 for _, row in df_database.iterrows():
@@ -966,7 +1203,7 @@ for _, row in df_database.iterrows():
 # Parse each system: "System Name (YES ; NO)"
 ice_systems_list = []
 
-for ice_str in ice_systems_set:
+for ice_str in sorted(ice_systems_set):  # sheet-independent order: stable uuids
     # Extract system name and flags
     if '(' in ice_str and ')' in ice_str:
         name = ice_str.split('(')[0].strip()
@@ -978,13 +1215,13 @@ for ice_str in ice_systems_set:
         automatic_restart = True if len(parts) > 1 and parts[1] == 'YES' else False
 
         ice_systems_list.append({
-            'uuid': str(uuid.uuid4()),
             'ids_name': name,
             'automatic_stop': automatic_stop,
             'automatic_restart': automatic_restart
         })
 
-df_ice_systems = pd.DataFrame(ice_systems_list)
+df_ice_systems = pd.DataFrame(ice_systems_list, columns=['ids_name', 'automatic_stop', 'automatic_restart'])
+df_ice_systems.insert(0, 'uuid', stable_uuids(df_ice_systems, 'ice_detection_systems', ['ids_name', 'automatic_stop', 'automatic_restart']))
 df_ice_systems.to_csv(gold_dir / 'ice_detection_systems.csv', index=False)
 logger.success(f"ice_detection_systems: {len(df_ice_systems)} rows")
 
@@ -1,13 +1,25 @@
 """
-Setup Database - Trigger GitHub Actions workflow to create all tables
+Setup Database - Apply TABLES/*.sql to Supabase
 Part of ETL pipeline: LOAD step (schema setup)
+
+By default the DDL is applied directly over SUPABASE_DB_URL (any Postgres,
+e.g. a local instance for tests): new or changed files only, in dependency
+order, in one transaction (see migrate_schema.py). Seconds instead of the
+2-5 minutes of the GitHub Actions round trip.
+
+--workflow triggers the setup-database.yml workflow instead (no direct
+database access needed, the workflow uses the service role key).
 """
 import os
 import sys
+import time
+import argparse
 import subprocess
 import requests
 import urllib3
 from dotenv import load_dotenv
+from loguru import logger
+from migrate_schema import migrate
 
 # Disable SSL warnings (corporate proxy)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -81,6 +93,34 @@ def trigger_setup_workflow():
         return False
 
 
+def deploy_schema(db_url: str) -> bool:
+    """Apply the new or changed DDL files directly, in one transaction"""
+    logger.info("=" * 60)
+    logger.info("ETL STEP 4: SQL to DB (Setup database structure)")
+    logger.info("=" * 60)
+
+    started = time.perf_counter()
+    try:
+        migrate(db_url)
+    except Exception as e:
+        logger.error(f"✗ Schema setup rolled back, nothing applied: {str(e)[:500]}")
+        return False
+    logger.success(f"✓ Database structure ready ({time.perf_counter() - started:.1f}s)")
+    return True
+
+
 if __name__ == '__main__':
-    success = trigger_setup_workflow()
+    parser = argparse.ArgumentParser(description='Apply TABLES/*.sql to Supabase')
+    parser.add_argument('--workflow', action='store_true',
+                        help='Trigger the setup-database.yml GitHub Actions workflow instead of connecting directly')
+    args = parser.parse_args()
+
+    if args.workflow:
+        success = trigger_setup_workflow()
+    elif os.getenv('SUPABASE_DB_URL'):
+        success = deploy_schema(os.getenv('SUPABASE_DB_URL'))
+    else:
+        logger.error("Missing SUPABASE_DB_URL in .env (direct Postgres connection); "
+                     "use --workflow to go through GitHub Actions")
+        success = False
     sys.exit(0 if success else 1)
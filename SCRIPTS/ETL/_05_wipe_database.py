@@ -1,17 +1,23 @@
 """
 ETL STEP 5: Wipe Database (OPTIONAL)
-Wipe all data from Supabase database in reverse dependency order
+Wipe all data from Supabase database
 Use this before loading data to ensure a clean slate
+
+The wipe is one call to the server-side function wipe_managed_tables()
+(TABLES/07_FUNCTIONS: a single TRUNCATE ... CASCADE, one round trip). If the
+function is missing or not allowed for the API key, or with --per-table,
+tables are emptied one by one through PostgREST in reverse dependency order.
 """
 import os
 import sys
+import argparse
 from pathlib import Path
 from dotenv import load_dotenv
-from supabase import create_client, Client
 from loguru import logger
+from load_state import LoadJournal, RowHashState
+from http_transport import create_client, rest_headers
 import ssl
 import urllib3
-import httpx
 
 # Disable SSL warnings for corporate proxy
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -32,15 +38,10 @@ if not SUPABASE_URL or not SUPABASE_KEY:
 if not SUPABASE_URL.endswith('/'):
     SUPABASE_URL = SUPABASE_URL + '/'
 
-# Create httpx client with SSL verification disabled (corporate proxy)
-http_client = httpx.Client(verify=False)
-
-# Create Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-# Patch PostgREST session to use custom httpx client
-if hasattr(supabase.postgrest, 'session'):
-    supabase.postgrest.session = http_client
+# PostgREST endpoint, shared transport (pooling, retries, SSL verification disabled for the corporate proxy)
+REST_URL = f'{SUPABASE_URL}rest/v1/'
+REST_HEADERS = {**rest_headers(SUPABASE_KEY), 'Prefer': 'return=minimal'}
+http_client = create_client()
 
 # Load order from _06_csv_to_db.py (must match for consistency)
 LOAD_ORDER = [
@@ -66,8 +67,13 @@ LOAD_ORDER = [
     ('farm_substation_details', 'farm_substation_details.csv'),
     ('farm_turbine_details', 'farm_turbine_details.csv'),
     ('farm_ice_detection_systems', 'farm_ice_detection_systems.csv'),
+    ('farm_actual_performances', 'farm_actual_performances.csv'),
+    ('farm_target_performances', 'farm_target_performances.csv'),
 ]
 
+# Server-side wipe function (TABLES/07_FUNCTIONS/wipe_managed_tables.sql)
+WIPE_FUNCTION = 'wipe_managed_tables'
+
 # Map table names to the column to use for deletion (must be non-null)
 # 'id' -> .neq('id', -1)
 # 'uuid' -> .neq('uuid', '00000000-0000-0000-0000-000000000000')
@@ -98,10 +104,31 @@ DELETE_KEYS = {
     'farm_substation_details': 'farm_uuid',
     'farm_turbine_details': 'wind_farm_uuid',  # Special case: uses wind_farm_uuid
     'farm_ice_detection_systems': 'farm_uuid',
+    'farm_actual_performances': 'farm_uuid',
+    'farm_target_performances': 'farm_uuid',
 }
 
+def wipe_server_side() -> bool:
+    """Empty all tables with one call to the server-side function; False if it is unavailable"""
+    try:
+        response = http_client.post(f'{REST_URL}rpc/{WIPE_FUNCTION}', json={}, headers=REST_HEADERS)
+    except Exception as e:
+        logger.warning(f"⚠ {WIPE_FUNCTION}() call failed ({str(e)[:150]}), wiping table by table")
+        return False
+    if response.is_error:
+        logger.warning(f"⚠ {WIPE_FUNCTION}() unavailable (HTTP {response.status_code}: {response.text[:150]}), "
+                       "wiping table by table")
+        return False
+    return True
+
+
 def wipe_data():
-    """Wipe all data from Supabase in reverse dependency order"""
+    """Wipe all data from Supabase (server-side TRUNCATE, or per table in reverse dependency order)"""
+
+    parser = argparse.ArgumentParser(description='Wipe all GOLD-loaded data from Supabase')
+    parser.add_argument('--per-table', action='store_true',
+                        help=f'Delete table by table through PostgREST instead of calling {WIPE_FUNCTION}()')
+    args = parser.parse_args()
 
     # Configure logger to force colors
     logger.remove()
@@ -110,31 +137,32 @@ def wipe_data():
     logger.warning("=" * 80)
     logger.warning("ETL STEP 5: WIPE DATABASE")
     logger.warning("=" * 80)
-    logger.warning("⚠ Deleting all data in reverse dependency order")
+    logger.warning("⚠ Deleting all data")
     logger.warning("")
 
-    # Process in reverse order (Children first, then parents)
-    wipe_order = reversed(LOAD_ORDER)
-
     success_count = 0
     warning_count = 0
     failed_count = 0
 
+    if not args.per_table and wipe_server_side():
+        logger.success(f"  ✓ {len(LOAD_ORDER)} tables wiped ({WIPE_FUNCTION}(), one TRUNCATE)")
+        success_count = len(LOAD_ORDER)
+        wipe_order = []
+    else:
+        # Process in reverse order (Children first, then parents)
+        wipe_order = reversed(LOAD_ORDER)
+
     for table_name, _ in wipe_order:
         key = DELETE_KEYS.get(table_name, 'id')  # Default to id
 
         try:
-            if key == 'id':
-                supabase.table(table_name).delete().neq('id', -1).execute()
-            elif key == 'uuid':
-                supabase.table(table_name).delete().neq('uuid', '00000000-0000-0000-0000-000000000000').execute()
-            elif key == 'farm_uuid':
-                supabase.table(table_name).delete().neq('farm_uuid', '00000000-0000-0000-0000-000000000000').execute()
-            elif key == 'wind_farm_uuid':
-                supabase.table(table_name).delete().neq('wind_farm_uuid', '00000000-0000-0000-0000-000000000000').execute()
+            if key in ('uuid', 'farm_uuid', 'wind_farm_uuid'):
+                match_all = 'neq.00000000-0000-0000-0000-000000000000'
             else:
-                # Fallback
-                supabase.table(table_name).delete().neq(key, -1).execute()
+                match_all = 'neq.-1'
+            response = http_client.delete(f'{REST_URL}{table_name}', params={key: match_all}, headers=REST_HEADERS)
+            if response.is_error:
+                raise RuntimeError(f"HTTP {response.status_code}: {response.text}")
 
             logger.success(f"  ✓ {table_name} wiped")
             success_count += 1
@@ -149,6 +177,12 @@ def wipe_data():
                 logger.error(f"  ✗ Failed to wipe {table_name}: {error_msg[:150]}")
                 failed_count += 1
 
+    http_client.close()
+
+    # The remote tables no longer match the recorded row hashes or checkpoint: next load sends everything
+    RowHashState.clear_all()
+    LoadJournal.discard()
+
     logger.info("")
     logger.warning("=" * 80)
     logger.warning("WIPE COMPLETE")
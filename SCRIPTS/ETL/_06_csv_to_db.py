@@ -6,21 +6,63 @@ Loads data into:
 1. Supabase (cloud database)
 2. SQLite local database (WNDMNGR.APP)
 
-This script always uses UPSERT mode (safe).
+Supabase tables are loaded in dependency waves derived from the
+REFERENCES clauses in TABLES/*.sql: the tables of a wave, and the batches
+of each table, are upserted concurrently through PostgREST. Each gold file is
+read once and fanned out to Supabase and SQLite concurrently (sinks.py).
+Only rows changed since the last confirmed load are sent (row hashes in
+DATA/LOAD_STATE/row_hashes), rows gone from GOLD are deleted; --full resends all.
+--reconcile compares with the remote tables themselves: primary keys present
+remotely but absent from GOLD (e.g. a farm dropped from the source) are
+deleted, children first, whatever the local state holds.
+
+Before any network call, every table is checked against the DDL (NOT NULL,
+lengths, numeric ranges, unique and foreign keys, see gold_constraints.py):
+offending rows are left out of the load and written to DATA/LOAD_STATE/validation.
+
+Each run is recorded in ingestion_versions, with per-table throughput
+(rows, bytes, batches, retries, latency percentiles) in ingestion_versions_metrics.
+
+With SUPABASE_DB_URL set, tables go over a direct Postgres connection instead
+(COPY into a staging table + INSERT ... ON CONFLICT, see postgres_copy.py).
+With --swap, every table is reloaded in a staging schema, validated, and
+swapped with the live one in a single transaction (see postgres_swap.py).
+With --compact, they go to the compact schema variant instead (native UUID
+keys, farm_code on farms only, see compact_schema.py).
+With --sqlserver, tables go to the SQL Server database of SCRIPTS/SETUP
+instead (fast_executemany into #staging + MERGE, see sqlserver_sink.py).
+
+Without --swap this script uses UPSERT mode (safe).
 To wipe data first, run _05_wipe_database.py before this script,
 or use: invoke csv-to-db --truncate
 """
 import os
 import sys
+import json
+import argparse
+import time
+import asyncio
+from collections import deque
 from pathlib import Path
 import pandas as pd
 from dotenv import load_dotenv
-from supabase import create_client, Client
 from loguru import logger
 import ssl
 import urllib3
 import httpx
-import sqlite3
+from ddl_schema import load_schema, dependency_waves
+from load_state import AdaptiveBatchSizer, LoadJournal, RowHashState, gold_snapshot, row_hash, write_quarantine
+import postgres_copy
+from http_transport import create_async_client, rest_headers
+from sinks import GoldTable, Sink, ThreadedSink, STATUS_RANK, coerce_to_ddl, fan_out, read_all_gold
+from gold_constraints import validate_gold, report_violations
+import load_metrics
+from load_metrics import LoadMetrics, TableMetrics
+from sqlite_sink import SQLiteSink, restore_previous
+from postgres_swap import PostgresSwapSink
+from compact_schema import COMPACT_SCHEMA, compact_tables
+import sqlserver_sink
+from sqlserver_sink import SQLServerSink
 
 # Disable SSL warnings for corporate proxy
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -41,23 +83,30 @@ SQLITE_DB_PATH = WNDMNGR_APP_DIR / 'DATA' / 'windmanager.db'
 SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_KEY = os.getenv('SUPABASE_API_KEY')
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    logger.error("Missing SUPABASE_URL or SUPABASE_API_KEY in .env")
-    sys.exit(1)
+# Optional direct Postgres connection (bulk COPY path instead of PostgREST)
+SUPABASE_DB_URL = os.getenv('SUPABASE_DB_URL')
 
 # Ensure URL ends with /
+SUPABASE_URL = SUPABASE_URL or ''
 if not SUPABASE_URL.endswith('/'):
     SUPABASE_URL = SUPABASE_URL + '/'
 
-# Create httpx client with SSL verification disabled (corporate proxy)
-http_client = httpx.Client(verify=False)
+# PostgREST endpoint and upsert headers (merge on primary key, no response body)
+REST_URL = f'{SUPABASE_URL}rest/v1/'
+UPSERT_HEADERS = {
+    **rest_headers(SUPABASE_KEY),
+    'Prefer': 'resolution=merge-duplicates,return=minimal',
+}
+
+# Upper bound on in-flight requests across all tables of a wave
+MAX_CONCURRENT_REQUESTS = int(os.getenv('SUPABASE_MAX_CONCURRENCY', '8'))
 
-# Create Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Primary keys per DELETE request (keeps the in.(...) filter well under URL limits)
+DELETE_BATCH_KEYS = 100
 
-# Patch PostgREST session to use custom httpx client
-if hasattr(supabase.postgrest, 'session'):
-    supabase.postgrest.session = http_client
+# Primary keys requested per GET when reconciling (PostgREST's max-rows may
+# cap it: the following pages use the size the server actually returned)
+RECONCILE_PAGE_ROWS = 1000
 
 # Load order (respects foreign key dependencies)
 LOAD_ORDER = [
@@ -98,11 +147,13 @@ LOAD_ORDER = [
     ('farm_substation_details', 'farm_substation_details.csv'),
     ('farm_turbine_details', 'farm_turbine_details.csv'),
     ('farm_ice_detection_systems', 'farm_ice_detection_systems.csv'),
-    # Note: farm_tariffs, farm_actual_performances, farm_target_performances,
-    # and farm_electrical_delegations are not generated by silver_to_gold.py
+    ('farm_actual_performances', 'farm_actual_performances.csv'),
+    ('farm_target_performances', 'farm_target_performances.csv'),
+    # Note: farm_tariffs and farm_electrical_delegations are not generated by silver_to_gold.py
 ]
 
-# Map table names to the column to use for deletion (must be non-null)
+# Map table names to the column to use for deletion (must be non-null),
+# also the reconcile key of the tables whose gold file lacks the primary key
 DELETE_KEYS = {
     'farm_types': 'id',
     'company_roles': 'id',
@@ -128,64 +179,294 @@ DELETE_KEYS = {
     'farm_substation_details': 'farm_uuid',
     'farm_turbine_details': 'wind_farm_uuid',  # Special case: uses wind_farm_uuid
     'farm_ice_detection_systems': 'farm_uuid',
+    'farm_actual_performances': 'farm_uuid',
+    'farm_target_performances': 'farm_uuid',
 }
 
 
-def load_table(table_name: str, csv_file: str):
-    """Load a CSV file into a Supabase table
+class BatchTooLarge(Exception):
+    """The server rejected or timed out on a batch: retry it in smaller pieces"""
 
-    Returns: 'success', 'warning', or 'failed'
-    """
 
-    csv_path = GOLD_DIR / csv_file
+class BatchRejected(Exception):
+    """The server refused the batch content (4xx): some rows violate a constraint"""
 
-    if not csv_path.exists():
-        logger.warning(f"  ⊘ {table_name}: File not found ({csv_file}), skipping")
-        return 'warning'
 
-    logger.info(f"Loading {table_name} to Supabase...")
+async def upsert_batch(client: httpx.AsyncClient, semaphore: asyncio.Semaphore, table_name: str,
+                       rows: list[bytes]) -> tuple[float, int]:
+    """Upsert one batch of pre-encoded JSON rows through PostgREST
 
-    try:
-        # Read CSV
-        df = pd.read_csv(csv_path)
+    Returns (request latency in seconds, transport retries).
+    """
+    payload = b'[' + b','.join(rows) + b']'
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            response = await client.post(f'{REST_URL}{table_name}', content=payload, headers=UPSERT_HEADERS)
+        except httpx.TimeoutException as e:
+            raise BatchTooLarge(f"Timeout: {e}") from e
+        seconds = time.perf_counter() - started
+    if response.status_code in (413, 504):
+        raise BatchTooLarge(f"HTTP {response.status_code}: {response.text}")
+    if 400 <= response.status_code < 500 and response.status_code not in (401, 403, 404, 408, 429):
+        raise BatchRejected(f"HTTP {response.status_code}: {response.text}")
+    if response.is_error:
+        raise RuntimeError(f"HTTP {response.status_code}: {response.text}")
+    return seconds, response.extensions.get('retries', 0)
+
+
+def _row_keys(df: pd.DataFrame, primary_key: list[str]) -> list[str]:
+    """JSON list of the primary key values of each row (RowHashState keys)"""
+    key_values = df[primary_key].astype(object).where(df[primary_key].notna(), None).values.tolist()
+    return [json.dumps(values, default=str) for values in key_values]
+
+
+def _gold_keys(table: GoldTable, primary_key: list[str]) -> pd.DataFrame | None:
+    """Reconcile key of the gold rows, those left out by the pre-validation included
+
+    The key is the primary key, or the DELETE_KEYS column when the file lacks
+    it (rows of farms absent from GOLD). None when the
+    file has neither (the table cannot be reconciled).
+    """
+    columns = table.typed.columns
+    if primary_key and set(primary_key) <= set(columns):
+        key = primary_key
+    elif DELETE_KEYS.get(table.name) in columns:
+        key = [DELETE_KEYS[table.name]]
+    else:
+        return None
+    keys = table.typed[key]
+    if table.excluded is not None and not table.excluded.empty:
+        keys = pd.concat([keys, coerce_to_ddl(table.excluded[key], table.schema)], ignore_index=True)
+    return keys.drop_duplicates()
 
-        if df.empty:
-            logger.warning(f"  → Empty file, skipping")
-            return 'warning'
 
-        # Replace Inf/-Inf and NaN with None (for proper NULL handling and JSON compliance)
-        import numpy as np
-        df = df.replace([np.inf, -np.inf, np.nan], None)
+def _filter_value(value) -> str:
+    """Quote a value for a PostgREST filter (commas, dots and parentheses are reserved)"""
+    text = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{text}"'
 
-        # Convert 1.0/0.0 to boolean for specific boolean columns
-        boolean_columns = {
-            'farm_administrations': ['has_remit_subscription'],
-            'ice_detection_systems': ['automatic_stop', 'automatic_restart']
-        }
-        if table_name in boolean_columns:
-            for col in boolean_columns[table_name]:
-                if col in df.columns:
-                    df[col] = df[col].apply(lambda x: True if x == 1.0 or x == 1 else (False if x == 0.0 or x == 0 else None))
 
-        # Convert to dict records
-        records = df.to_dict('records')
+async def delete_rows(client: httpx.AsyncClient, semaphore: asyncio.Semaphore, table_name: str,
+                      primary_key: list[str], keys: list[str]) -> list[str]:
+    """Delete rows by primary key through PostgREST, in batches of DELETE_BATCH_KEYS
 
-        logger.info(f"  → {len(records)} rows to insert")
+    `keys` are JSON lists of primary key values (RowHashState keys).
+    Returns the keys whose batch the server confirmed.
+    """
+    deleted = []
 
-        # Insert in batches (Supabase API has limits)
-        batch_size = 1000
-        total_inserted = 0
+    async def delete_batch(batch: list[str]):
+        values = [json.loads(key) for key in batch]
+        if len(primary_key) == 1:
+            params = {primary_key[0]: f"in.({','.join(_filter_value(value[0]) for value in values)})"}
+        else:
+            conditions = (
+                'and(' + ','.join(f'{col}.eq.{_filter_value(v)}' for col, v in zip(primary_key, value)) + ')'
+                for value in values
+            )
+            params = {'or': f"({','.join(conditions)})"}
+        async with semaphore:
+            response = await client.delete(f'{REST_URL}{table_name}', params=params, headers=UPSERT_HEADERS)
+        if response.is_error:
+            logger.error(f"  → {table_name} delete error: HTTP {response.status_code}: {response.text[:200]}")
+            return
+        deleted.extend(batch)
+
+    await asyncio.gather(*(delete_batch(keys[i:i + DELETE_BATCH_KEYS]) for i in range(0, len(keys), DELETE_BATCH_KEYS)))
+    return deleted
+
+
+async def fetch_remote_keys(client: httpx.AsyncClient, semaphore: asyncio.Semaphore, table_name: str,
+                            key: list[str]) -> list[list]:
+    """Values of the `key` columns of every row of a Supabase table
+
+    The first page also returns the row count (Prefer: count=exact); the
+    remaining pages are then requested concurrently.
+    """
+    params = {'select': ','.join(key), 'order': ','.join(key)}
+
+    async def fetch_page(start: int, size: int, count: bool = False) -> httpx.Response:
+        headers = {**rest_headers(SUPABASE_KEY), 'Range-Unit': 'items', 'Range': f'{start}-{start + size - 1}'}
+        if count:
+            headers['Prefer'] = 'count=exact'
+        async with semaphore:
+            response = await client.get(f'{REST_URL}{table_name}', params=params, headers=headers)
+        response.raise_for_status()
+        return response
+
+    first = await fetch_page(0, RECONCILE_PAGE_ROWS, count=True)
+    rows = first.json()
+    total = int(first.headers.get('Content-Range', '*/0').rpartition('/')[2])
+    if rows and total > len(rows):
+        page_size = len(rows)
+        pages = await asyncio.gather(*(fetch_page(start, page_size) for start in range(page_size, total, page_size)))
+        rows += [row for page in pages for row in page.json()]
+    if len(rows) != total:
+        raise RuntimeError(f"{len(rows)}/{total} keys fetched")
+    return [[row[col] for col in key] for row in rows]
+
+
+async def load_table(client: httpx.AsyncClient, semaphore: asyncio.Semaphore, table: GoldTable,
+                     sizer: AdaptiveBatchSizer, primary_key: list[str], full_load: bool, pending_deletes: dict,
+                     metrics: TableMetrics, journal: LoadJournal | None = None):
+    """Load a gold table into a Supabase table, batches sized by payload bytes and sent concurrently
+
+    Only rows added or changed since the last confirmed load are sent (row hashes
+    keyed by primary key, see RowHashState); `full_load` sends every row.
+    Rows that vanished from the file are queued in `pending_deletes`.
+    Confirmed batches are written to the checkpoint `journal`; rows it already
+    holds (resumed run) are not sent again.
+
+    A batch the server rejects is bisected until the offending rows are
+    isolated: the good rows are loaded, the bad ones go to the quarantine file.
+    Confirmed batches, resent requests and rejected rows go to `metrics`.
 
-        for i in range(0, len(records), batch_size):
-            batch = records[i:i + batch_size]
+    Returns: 'success', 'warning', or 'failed'
+    """
+    table_name, csv_file = table.name, table.csv_file
 
-            try:
-                response = supabase.table(table_name).upsert(batch).execute()  # type: ignore
-                total_inserted += len(batch)
-                logger.info(f"  → Batch {i // batch_size + 1}: {len(batch)} rows")
-            except Exception as e:
-                logger.error(f"  → Batch error: {str(e)[:200]}")
-                # Continue with next batch
+    try:
+        # Rows already encoded to JSON bytes from the DDL-typed frame (NaN/Inf → null,
+        # 1.0/0.0 → booleans), shared with the other sinks; no per-row dicts
+        df = table.typed
+        row_json = table.json_rows
+        hashes = [row_hash(row) for row in row_json]
+
+        # Delta mode: only rows whose hash differs from the last confirmed load are sent.
+        # Needs the primary key in the file and unique (otherwise every row is sent).
+        keys = None
+        state = None
+        if primary_key and all(col in df.columns for col in primary_key):
+            keys = _row_keys(df, primary_key)
+            if len(set(keys)) == len(keys):
+                state = RowHashState(table_name)
+            else:
+                logger.warning(f"  → {table_name}: duplicate primary keys in {csv_file}, sending every row")
+                keys = None
+
+        send_indices, vanished = list(range(len(row_json))), []
+        if state is not None and state.exists:
+            changed, vanished = state.diff(keys, hashes)
+            # Rows left out by the pre-validation are not deleted from the remote table
+            if vanished and table.excluded is not None and not table.excluded.empty:
+                excluded_keys = set(_row_keys(table.excluded, primary_key))
+                vanished = [key for key in vanished if key not in excluded_keys]
+            if not full_load:
+                send_indices = changed
+
+        # Resumed run: rows confirmed before the interruption are not sent again
+        resumed_indices = []
+        if journal is not None and journal.rows_confirmed(SupabaseRestSink.name, table_name):
+            confirmed_before = journal.rows_confirmed(SupabaseRestSink.name, table_name)
+            resumed_indices = [index for index in send_indices if hashes[index] in confirmed_before]
+            send_indices = [index for index in send_indices if hashes[index] not in confirmed_before]
+            logger.info(f"  ⟳ {table_name}: {len(resumed_indices)} rows already confirmed (checkpoint)")
+
+        if not send_indices and not vanished:
+            if state is not None and resumed_indices:
+                state.save({**(state.hashes or {}), **{keys[index]: hashes[index] for index in resumed_indices}})
+            if journal is not None:
+                journal.record_table(SupabaseRestSink.name, table_name)
+            logger.success(f"  ✓ {table_name}: unchanged ({len(row_json)} rows)")
+            return 'success'
+
+        row_sizes = [len(row_json[index]) for index in send_indices]
+        logger.info(f"  → {table_name}: {len(send_indices)}/{len(row_json)} rows to send, {len(vanished)} to delete, "
+                    f"{sum(row_sizes) // 1024} KiB, starting at {sizer.batch_bytes // 1024} KiB per batch")
+
+        # Workers cut the next batch with the current byte budget, so the size
+        # adapts to the latency observed on the batches already sent
+        cursor = 0
+        retry_ranges = deque()  # (start, end) ranges to resend in smaller pieces
+        rejected_rows = []  # single rows the server refused, with its error
+        sent_ranges = []  # (start, end) ranges confirmed by the server
+        total_inserted = 0
+        batch_count = 0
+
+        async def worker():
+            nonlocal cursor, total_inserted, batch_count
+            while True:
+                if retry_ranges:
+                    start, end = retry_ranges.popleft()
+                elif cursor < len(send_indices):
+                    start = cursor
+                    end = cursor = sizer.cut(row_sizes, cursor)
+                else:
+                    return
+
+                batch = [row_json[index] for index in send_indices[start:end]]
+                sent_bytes = sum(row_sizes[start:end]) + (end - start) + 1
+                try:
+                    seconds, retries = await upsert_batch(client, semaphore, table_name, batch)
+                except BatchTooLarge as e:
+                    sizer.record_too_large(sent_bytes)
+                    metrics.retries += 1
+                    if end - start > 1:
+                        middle = (start + end) // 2
+                        retry_ranges.extend([(start, middle), (middle, end)])
+                        logger.warning(f"  → {table_name} rows {start}-{end}: {str(e)[:100]}, "
+                                       f"retrying in halves (budget {sizer.batch_bytes // 1024} KiB)")
+                    else:
+                        # A single row the server still refuses: quarantined, not dropped
+                        rejected_rows.append({'row_index': send_indices[start], 'error': str(e), 'row': json.loads(batch[0])})
+                    continue
+                except BatchRejected as e:
+                    if end - start > 1:
+                        metrics.retries += 1
+                        middle = (start + end) // 2
+                        retry_ranges.extend([(start, middle), (middle, end)])
+                    else:
+                        rejected_rows.append({'row_index': send_indices[start], 'error': str(e), 'row': json.loads(batch[0])})
+                    continue
+                except Exception as e:
+                    # Transport or server error after the transport retries: every row of the batch is quarantined
+                    logger.error(f"  → {table_name} rows {start}-{end} batch error: {str(e)[:200]}")
+                    rejected_rows.extend({'row_index': index, 'error': str(e), 'row': json.loads(row)}
+                                         for index, row in zip(send_indices[start:end], batch))
+                    continue
+
+                sizer.record_success(seconds, sent_bytes)
+                metrics.record_batch(seconds, end - start, sent_bytes)
+                metrics.retries += retries
+                if journal is not None:
+                    journal.record_rows(SupabaseRestSink.name, table_name, [hashes[index] for index in send_indices[start:end]])
+                sent_ranges.append((start, end))
+                total_inserted += end - start
+                batch_count += 1
+
+        await asyncio.gather(*(worker() for _ in range(MAX_CONCURRENT_REQUESTS)))
+        logger.info(f"  → {table_name}: {batch_count} batches, ending at {sizer.batch_bytes // 1024} KiB per batch")
+
+        # Record what the remote table now holds: unsent rows are unchanged, rows that
+        # failed keep their previous hash so they are resent next run, and vanished
+        # rows stay until the delete pass confirms them
+        if state is not None:
+            confirmed = dict(state.hashes or {})
+            if full_load:
+                for index in send_indices:
+                    confirmed.pop(keys[index], None)
+            for start, end in sent_ranges:
+                for index in send_indices[start:end]:
+                    confirmed[keys[index]] = hashes[index]
+            for index in resumed_indices:
+                confirmed[keys[index]] = hashes[index]
+            state.save(confirmed)
+            if vanished:
+                pending_deletes[table_name] = (primary_key, vanished, state)
+
+        metrics.rows_rejected = len(rejected_rows)
+        quarantine_path = write_quarantine(table_name, sorted(rejected_rows, key=lambda entry: entry['row_index']))
+        unaccounted = len(send_indices) - total_inserted - len(rejected_rows)
+        if unaccounted:
+            logger.error(f"  ✗ {table_name}: {unaccounted} rows neither confirmed nor quarantined")
+            return 'failed'
+        if quarantine_path:
+            logger.warning(f"  ⚠ {table_name}: {total_inserted} rows loaded, {len(rejected_rows)} rejected → {quarantine_path}")
+            return 'warning'
+
+        if journal is not None and not vanished and total_inserted == len(send_indices):
+            journal.record_table(SupabaseRestSink.name, table_name)
 
         logger.success(f"  ✓ {table_name}: {total_inserted} rows loaded to Supabase")
         return 'success'
@@ -194,43 +475,245 @@ def load_table(table_name: str, csv_file: str):
         logger.error(f"  ✗ Error loading {table_name}: {str(e)[:200]}")
         return 'failed'
 
+    finally:
+        metrics.finish()
 
-def load_table_sqlite(table_name: str, csv_file: str, conn: sqlite3.Connection):
-    """Load a CSV file into a SQLite table (local WNDMNGR.APP database)
 
-    Returns: 'success', 'warning', or 'failed'
-    """
-
-    csv_path = GOLD_DIR / csv_file
+class SupabaseRestSink(Sink):
+    """Supabase through PostgREST: each wave's tables upserted concurrently
 
-    if not csv_path.exists():
-        return 'warning'  # Already logged warning in load_table()
+    Rows that vanished from the gold layer are deleted on close, children
+    before parents (waves in reverse order). With `reconcile`, the rows to
+    delete are those whose primary key the remote table holds and GOLD does not.
+    """
 
-    try:
-        # Read CSV
-        df = pd.read_csv(csv_path)
+    name = 'Supabase'
+    resumable = True
+
+    def __init__(self, primary_keys: dict, full_load: bool = False, journal: LoadJournal | None = None,
+                 metrics: LoadMetrics | None = None, reconcile: bool = False):
+        self.primary_keys = primary_keys
+        self.full_load = full_load
+        self.journal = journal
+        self.metrics = metrics
+        self.reconcile = reconcile
+        self.gold_keys = {}  # {table_name: (key columns, {key values as a tuple of strings})}, when reconciling
+        self.pending_deletes = {}
+        self.loaded_waves = []
+        self.semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        # Byte budget per table, starting from the sizes chosen on the previous run
+        self.saved_sizes = AdaptiveBatchSizer.saved_sizes()
+        self.sizers = {}
+        self.client = None
+
+    async def open(self) -> None:
+        self.client = create_async_client(MAX_CONCURRENT_REQUESTS)
+
+    async def load_wave(self, tables: list[GoldTable]) -> dict[str, str]:
+        self.loaded_waves.append([table.name for table in tables])
+        for table in tables:
+            self.sizers[table.name] = AdaptiveBatchSizer(table.name, self.saved_sizes.get(table.name))
+            if self.reconcile:
+                keys = _gold_keys(table, self.primary_keys.get(table.name, []))
+                if keys is None:
+                    logger.warning(f"  ⊘ {table.name}: no key column in {table.csv_file}, not reconciled")
+                else:
+                    self.gold_keys[table.name] = (list(keys.columns),
+                                                  set(keys.astype(str).itertuples(index=False, name=None)))
+        results = await asyncio.gather(
+            *(load_table(self.client, self.semaphore, table, self.sizers[table.name],
+                         self.primary_keys.get(table.name, []), self.full_load, self.pending_deletes,
+                         self.table_metrics(table), self.journal)
+              for table in tables)
+        )
+        return {table.name: status for table, status in zip(tables, results)}
+
+    async def delete_vanished(self, table_name: str) -> bool:
+        """Delete the rows gone from GOLD since the last load (row hash state); True when all were deleted"""
+        primary_key, vanished, state = self.pending_deletes[table_name]
+        deleted = set(await delete_rows(self.client, self.semaphore, table_name, primary_key, vanished))
+        state.save({key: digest for key, digest in state.hashes.items() if key not in deleted})
+        if len(deleted) < len(vanished):
+            logger.warning(f"  ⚠ {table_name}: {len(deleted)}/{len(vanished)} vanished rows deleted")
+            return False
+        logger.success(f"  ✓ {table_name}: {len(deleted)} vanished rows deleted")
+        return True
+
+    async def delete_orphans(self, table_name: str) -> bool:
+        """Delete the remote rows whose key is not in GOLD; True when all were deleted"""
+        key, gold = self.gold_keys[table_name]
+        try:
+            remote = await fetch_remote_keys(self.client, self.semaphore, table_name, key)
+        except Exception as e:
+            logger.error(f"  ✗ {table_name}: remote keys not fetched, not reconciled ({str(e)[:200]})")
+            return False
+
+        orphans = list(dict.fromkeys(json.dumps(values, default=str) for values in remote
+                                     if tuple(map(str, values)) not in gold))
+        deleted = set(await delete_rows(self.client, self.semaphore, table_name, key, orphans)) if orphans else set()
+
+        # Vanished rows the remote table no longer holds are settled as well
+        if table_name in self.pending_deletes and key == self.primary_keys[table_name]:
+            _, vanished, state = self.pending_deletes[table_name]
+            settled = set(vanished) - (set(orphans) - deleted)
+            state.save({key: digest for key, digest in state.hashes.items() if key not in settled})
+
+        if len(deleted) < len(orphans):
+            logger.warning(f"  ⚠ {table_name}: {len(deleted)}/{len(orphans)} orphan keys deleted")
+            return False
+        if orphans:
+            logger.success(f"  ✓ {table_name}: {len(deleted)} orphan keys deleted ({len(remote)} remote rows, "
+                           f"{len(gold)} keys in GOLD)")
+        return True
+
+    async def close(self, statuses: dict[str, str]) -> None:
+        try:
+            for wave in reversed(self.loaded_waves):
+                for table_name in wave:
+                    if self.reconcile and table_name in self.gold_keys:
+                        complete = await self.delete_orphans(table_name)
+                    elif table_name in self.pending_deletes:
+                        complete = await self.delete_vanished(table_name)
+                    else:
+                        continue
+                    if not complete:
+                        if statuses[table_name] == 'success':
+                            statuses[table_name] = 'warning'
+                    elif self.journal is not None and statuses[table_name] == 'success':
+                        self.journal.record_table(self.name, table_name)
+        finally:
+            await self.client.aclose()
+
+        AdaptiveBatchSizer.save_sizes([sizer for table_name, sizer in self.sizers.items()
+                                       if statuses.get(table_name) != 'failed'])
+
+
+class PostgresCopySink(ThreadedSink):
+    """Supabase over a direct Postgres connection: COPY + merge, in dependency order
+
+    With `reconcile`, rows whose primary key is not in GOLD are deleted on
+    close, children before parents. With `db_schema`, the tables of another
+    Postgres schema are loaded (e.g. compact_schema.py): only the columns
+    their DDL declares are sent.
+    """
 
-        if df.empty:
-            return 'warning'
+    name = 'Supabase (COPY)'
+    resumable = True
+
+    def __init__(self, db_url: str, schema: dict, journal: LoadJournal | None = None,
+                 metrics: LoadMetrics | None = None, reconcile: bool = False, db_schema: str = 'public'):
+        if db_schema != 'public':
+            self.name = f'Supabase (COPY, {db_schema})'
+        super().__init__()
+        self.db_url = db_url
+        self.db_schema = db_schema
+        self.schema = schema
+        self.journal = journal
+        self.metrics = metrics
+        self.reconcile = reconcile
+        self.gold_keys = {}  # {table_name: key columns of the gold rows (_gold_keys)}, in load order
+        self.conn = None
+
+    def connect(self) -> None:
+        self.conn = postgres_copy.connect(self.db_url, search_path=None if self.db_schema == 'public' else self.db_schema)
+
+    def load_table(self, table: GoldTable) -> str:
+        metrics = self.table_metrics(table)
+        try:
+            columns = self.schema[table.name].columns
+            df = table.typed[[col for col in table.typed.columns if col in columns]]
+            row_count = postgres_copy.copy_table(self.conn, self.schema[table.name], df, metrics)
+            metrics.finish()
+            if self.reconcile:
+                keys = _gold_keys(table, self.schema[table.name].primary_key)
+                if keys is None:
+                    logger.warning(f"  ⊘ {table.name}: no key column in {table.csv_file}, not reconciled")
+                else:
+                    self.gold_keys[table.name] = keys
+
+            # The REST row hashes no longer describe the remote table
+            if self.db_schema == 'public':
+                RowHashState(table.name).clear()
+            if self.journal is not None:
+                self.journal.record_table(self.name, table.name)
+
+            logger.success(f"  ✓ {table.name}: {row_count} rows merged via COPY ({metrics.rows_per_second:,.0f} rows/s)")
+            return 'success'
 
-        # Replace Inf/-Inf and NaN with None
-        import numpy as np
-        df = df.replace([np.inf, -np.inf, np.nan], None)
+        except Exception as e:
+            logger.error(f"  ✗ Error loading {table.name}: {str(e)[:200]}")
+            return 'failed'
 
-        # Load to SQLite (replace existing data)
-        df.to_sql(table_name, conn, if_exists='replace', index=False)
+    def delete_orphans(self, statuses: dict[str, str]) -> None:
+        for table_name, keys in reversed(self.gold_keys.items()):
+            try:
+                deleted = postgres_copy.delete_orphans(self.conn, table_name, keys)
+                if deleted:
+                    logger.success(f"  ✓ {table_name}: {deleted} orphan rows deleted")
+            except Exception as e:
+                logger.error(f"  ✗ {table_name}: not reconciled ({str(e)[:200]})")
+                if statuses[table_name] == 'success':
+                    statuses[table_name] = 'warning'
 
-        logger.success(f"  ✓ {table_name}: {len(df)} rows loaded to SQLite")
-        return 'success'
+    async def close(self, statuses: dict[str, str]) -> None:
+        if self.reconcile and self.conn is not None:
+            await self._run(self.delete_orphans, statuses)
+        await super().close(statuses)
 
-    except Exception as e:
-        logger.error(f"  ✗ Error loading {table_name} to SQLite: {str(e)[:200]}")
-        return 'failed'
+    def disconnect(self) -> None:
+        if self.conn:
+            self.conn.close()
 
 
 def main():
     """Load all GOLD data to Supabase and SQLite"""
 
+    parser = argparse.ArgumentParser(description='Load GOLD data to Supabase and SQLite')
+    parser.add_argument('--full', action='store_true',
+                        help='Send every row to Supabase, not only rows changed since the last load')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip tables and batches confirmed by the previous run, if GOLD is unchanged')
+    parser.add_argument('--reconcile', action='store_true',
+                        help='Delete the Supabase rows whose primary key is not in GOLD (e.g. dropped farms), children first')
+    parser.add_argument('--swap', action='store_true',
+                        help='Reload every table in a staging schema and swap it in atomically (needs SUPABASE_DB_URL)')
+    parser.add_argument('--compact', action='store_true',
+                        help=f"Load the '{COMPACT_SCHEMA}' schema variant (compact_schema.py) instead of public (needs SUPABASE_DB_URL)")
+    parser.add_argument('--sqlserver', action='store_true',
+                        help='Load into the SQL Server database (SERVER_NAME / DATABASE_NAME) instead of Supabase')
+    parser.add_argument('--strict', action='store_true',
+                        help='Stop before loading anything if a GOLD row violates the DDL constraints')
+    parser.add_argument('--rollback-sqlite', action='store_true',
+                        help='Put the SQLite database of the previous load back in place, then exit')
+    args = parser.parse_args()
+
+    if args.rollback_sqlite:
+        if restore_previous(SQLITE_DB_PATH):
+            logger.success(f"✓ Previous SQLite database restored: {SQLITE_DB_PATH}")
+            return
+        logger.error(f"No previous SQLite database to restore next to {SQLITE_DB_PATH}")
+        sys.exit(1)
+
+    if args.sqlserver:
+        if args.swap or args.reconcile or args.full:
+            logger.error("--swap, --reconcile and --full apply to Supabase, not to --sqlserver")
+            sys.exit(1)
+        try:
+            sqlserver_sink.db_connection.sqlserver_dsn()  # .env settings, checked before decoding GOLD
+        except RuntimeError as e:
+            logger.error(str(e))
+            sys.exit(1)
+    elif not SUPABASE_DB_URL and (not SUPABASE_URL or not SUPABASE_KEY):
+        logger.error("Missing SUPABASE_URL or SUPABASE_API_KEY in .env (or SUPABASE_DB_URL for a direct connection)")
+        sys.exit(1)
+
+    if (args.swap or args.compact) and not SUPABASE_DB_URL:
+        logger.error("--swap and --compact need a direct Postgres connection: set SUPABASE_DB_URL in .env")
+        sys.exit(1)
+    if args.compact and (args.swap or args.sqlserver):
+        logger.error("--compact loads the compact schema, it does not combine with --swap or --sqlserver")
+        sys.exit(1)
+
     # Configure logger to force colors
     logger.remove()
     logger.add(sys.stderr, colorize=True, format="<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>")
@@ -239,53 +722,116 @@ def main():
     logger.info("ETL STEP 6: CSV → DB (Load GOLD data to databases)")
     logger.info("=" * 80)
     logger.info("Targets:")
-    logger.info("  1. Supabase (cloud)")
+    logger.info(f"  1. SQL Server ({os.getenv('DATABASE_NAME')})" if args.sqlserver else "  1. Supabase (cloud)")
     logger.info(f"  2. SQLite local ({SQLITE_DB_PATH})")
     logger.info("")
-    logger.info("Mode: UPSERT (safe - updates existing, inserts new)")
+    if args.sqlserver:
+        logger.info(f"Mode: UPSERT (fast_executemany + MERGE, up to {sqlserver_sink.MAX_CONNECTIONS} connections)")
+    elif args.swap:
+        logger.info("Mode: SWAP (full reload in a staging schema, swapped in atomically)")
+    else:
+        logger.info("Mode: UPSERT (safe - updates existing, inserts new)")
+        if args.compact:
+            logger.info(f"Supabase path: direct Postgres connection into schema '{COMPACT_SCHEMA}' (COPY + merge, all rows)")
+        elif SUPABASE_DB_URL:
+            logger.info("Supabase path: direct Postgres connection (COPY + merge, all rows)")
+        else:
+            logger.info(f"Supabase rows: {'all (--full)' if args.full else 'changed since last load only'}")
+        if args.reconcile:
+            logger.info("Reconcile: remote rows absent from GOLD are deleted (children first)")
     logger.info(f"Tables to load: {len(LOAD_ORDER)}")
     logger.info("")
 
-    # Connect to SQLite
-    sqlite_conn = None
+    # Group tables in FK dependency waves (parents strictly before children)
+    csv_files = dict(LOAD_ORDER)
+    schema = load_schema()
+    waves = dependency_waves(schema, [table_name for table_name, _ in LOAD_ORDER])
+    waves = [[(table_name, csv_files[table_name]) for table_name in wave] for wave in waves]
+    logger.info(f"Dependency waves: {len(waves)} (max {MAX_CONCURRENT_REQUESTS} concurrent requests)")
+    logger.info("")
+
+    # Decode every gold file once and check it against the DDL before any network call
+    logger.info("Validating GOLD tables against the DDL constraints...")
+    gold_tables = read_all_gold(waves, GOLD_DIR, schema)
+    decoded, violations = validate_gold(gold_tables)
+    report_violations({table.name: table for table in gold_tables}, violations)
+    if not violations:
+        logger.success("✓ All GOLD rows satisfy the DDL constraints")
+    elif args.strict:
+        logger.error(f"✗ {len(violations)} tables violate the DDL constraints (--strict): nothing loaded")
+        sys.exit(1)
+    logger.info("")
+
+    # Checkpoint journal: completed tables/batches, for a later --resume
+    journal = LoadJournal(gold_snapshot([GOLD_DIR / csv_file for _, csv_file in LOAD_ORDER]), resume=args.resume)
+    if args.resume:
+        if journal.resumed:
+            logger.info(f"Resuming: {len(journal.done_tables)} tables already loaded (checkpoint)")
+        else:
+            logger.warning("Nothing to resume (no checkpoint, or GOLD changed since): loading everything")
+        logger.info("")
+
+    # One sink per target, all fed from a single decode of each gold file
+    metrics = LoadMetrics()
+    if args.sqlserver:
+        sinks = [SQLServerSink(schema, journal, metrics)]
+    elif args.swap:
+        sinks = [PostgresSwapSink(SUPABASE_DB_URL, [schema[table_name] for table_name, _ in LOAD_ORDER], metrics)]
+    elif args.compact:
+        sinks = [PostgresCopySink(SUPABASE_DB_URL, compact_tables(schema), journal, metrics, reconcile=args.reconcile,
+                                  db_schema=COMPACT_SCHEMA)]
+    elif SUPABASE_DB_URL:
+        sinks = [PostgresCopySink(SUPABASE_DB_URL, schema, journal, metrics, reconcile=args.reconcile)]
+    else:
+        primary_keys = {table_name: table.primary_key for table_name, table in schema.items()}
+        sinks = [SupabaseRestSink(primary_keys, full_load=args.full, journal=journal, metrics=metrics,
+                                  reconcile=args.reconcile)]
+
     if SQLITE_DB_PATH.exists():
-        try:
-            sqlite_conn = sqlite3.connect(SQLITE_DB_PATH)
-            logger.info(f"✓ Connected to SQLite: {SQLITE_DB_PATH}")
-        except Exception as e:
-            logger.warning(f"Could not connect to SQLite: {str(e)[:200]}")
+        sinks.append(SQLiteSink(SQLITE_DB_PATH, [schema[table_name] for table_name, _ in LOAD_ORDER], metrics))
     else:
         logger.warning(f"SQLite database not found: {SQLITE_DB_PATH}")
 
-    logger.info("")
+    statuses = asyncio.run(fan_out(waves, sinks, decoded, journal))
 
     success_count = 0
     warning_count = 0
     failed_count = 0
 
-    for table_name, csv_file in LOAD_ORDER:
-        # Load to Supabase
-        supabase_status = load_table(table_name, csv_file)
-
-        # Load to SQLite (if connected)
-        sqlite_status = 'success'
-        if sqlite_conn:
-            sqlite_status = load_table_sqlite(table_name, csv_file, sqlite_conn)
-
-        # Count worst status (failed > warning > success)
-        if supabase_status == 'failed' or sqlite_status == 'failed':
+    for table_name, _ in LOAD_ORDER:
+        # Count worst status across sinks (failed > warning > success)
+        worst = max((statuses[sink.name][table_name] for sink in sinks), key=STATUS_RANK.get)
+        if table_name in violations and worst == 'success':
+            worst = 'warning'  # rows left out by the pre-validation
+        if worst == 'failed':
             failed_count += 1
-        elif supabase_status == 'warning' or sqlite_status == 'warning':
+        elif worst == 'warning':
             warning_count += 1
         else:
             success_count += 1
 
-    # Close SQLite connection
-    if sqlite_conn:
-        sqlite_conn.commit()
-        sqlite_conn.close()
-        logger.info("")
-        logger.info("✓ SQLite connection closed")
+    # A run without failures leaves nothing to resume
+    journal.close(completed=failed_count == 0)
+
+    # Record the run and its throughput in ingestion_versions / ingestion_versions_metrics
+    logger.info("")
+    logger.info("Throughput:")
+    metrics.log_summary()
+    if args.sqlserver:
+        logger.info("Ingestion version not recorded (ingestion_versions is a Supabase table)")
+    else:
+        mode = 'swap' if args.swap else 'compact' if args.compact else 'copy' if SUPABASE_DB_URL else ('full' if args.full else 'delta')
+        run = metrics.run_row(statuses, sinks[0].name, [GOLD_DIR / csv_file for _, csv_file in LOAD_ORDER], violations,
+                              notes=f"_06_csv_to_db.py, mode: {mode}{', reconciled' if args.reconcile and not args.swap else ''}"
+                                    f"{', resumed' if journal.resumed else ''}")
+        try:
+            if SUPABASE_DB_URL:
+                version_number = load_metrics.write_postgres(SUPABASE_DB_URL, run, metrics, statuses)
+            else:
+                version_number = load_metrics.write_rest(REST_URL, rest_headers(SUPABASE_KEY), run, metrics, statuses)
+            logger.info(f"Ingestion version {version_number} recorded")
+        except Exception as e:
+            logger.warning(f"⚠ Could not record the ingestion version: {str(e)[:200]}")
 
     logger.info("")
     logger.info("=" * 80)
@@ -296,7 +842,7 @@ def main():
     if success_count > 0:
         logger.success(f"✓ Success: {success_count}/{len(LOAD_ORDER)}")
     if warning_count > 0:
-        logger.warning(f"⚠ Warning: {warning_count}/{len(LOAD_ORDER)} (empty/missing tables)")
+        logger.warning(f"⚠ Warning: {warning_count}/{len(LOAD_ORDER)} (empty/missing tables, invalid or quarantined rows)")
     if failed_count > 0:
         logger.error(f"✗ Failed: {failed_count}/{len(LOAD_ORDER)}")
 
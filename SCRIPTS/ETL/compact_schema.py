@@ -0,0 +1,160 @@
+"""
+Compact variant of the TABLES/ schema, generated from the DDL (ddl_schema.py)
+Deployed next to public, in its own Postgres schema, and loaded by
+_06_csv_to_db.py --compact
+
+- VARCHAR(36) uuid columns become native UUID: 16 bytes instead of 37, keys
+  compared as integers instead of collated strings
+- farm_code is kept on farms only: child tables join farms on farm_uuid;
+  keys and unique constraints on farm_code are rewritten on farm_uuid
+- indexes on farm_code move to farm_uuid; an index whose columns are a
+  prefix of another index becomes redundant and is left out
+
+GOLD stays as it is: the loader sends the columns of the compact tables only
+(farm_code of the children is dropped) and COPY parses the uuid text.
+
+Usage: python SCRIPTS/ETL/compact_schema.py [--print]
+Requires SUPABASE_DB_URL and psycopg (pip install "wndmngr-db[postgres]")
+"""
+import argparse
+import copy
+import os
+import re
+import sys
+from dotenv import load_dotenv
+from loguru import logger
+import postgres_copy
+from ddl_schema import ForeignKey, Index, Table, load_schema
+
+load_dotenv()
+
+COMPACT_SCHEMA = 'compact'
+
+# TABLES/ categories holding GOLD data (metadata and functions stay in public)
+DATA_CATEGORIES = ('01_REFERENCES', '02_ENTITIES', '03_RELATIONSHIPS', '04_LOOK_UPS')
+
+UUID_TYPE = 'VARCHAR(36)'
+UUID_TYPE_RE = re.compile(r'VARCHAR\s*\(\s*36\s*\)', re.IGNORECASE)
+FARM_CODE = 'farm_code'
+CHECK_RE = re.compile(r'(CONSTRAINT\s+\w+\s+)?CHECK\b', re.IGNORECASE)
+
+
+def _farm_code_to_uuid(columns: list[str]) -> list[str]:
+    return list(dict.fromkeys('farm_uuid' if col == FARM_CODE else col for col in columns))
+
+
+def _farm_code_clause_to_uuid(clause: str) -> str:
+    """UNIQUE / PRIMARY KEY / FOREIGN KEY clause on farm_code, keyed on farm_uuid instead"""
+    clause = re.sub(r'\b(farms\s*\(\s*)code(\s*\))', r'\1uuid\2', clause, flags=re.IGNORECASE)
+    clause = re.sub(rf'\b{FARM_CODE}\b', 'farm_uuid', clause)
+    # (farm_uuid, farm_code) became (farm_uuid, farm_uuid)
+    return re.sub(r'\(([^()]*)\)', lambda m: '(' + ', '.join(_farm_code_to_uuid(
+        [col.strip() for col in m.group(1).split(',')])) + ')', clause)
+
+
+def compact_table(table: Table) -> Table:
+    """The compact version of one table (see the module docstring)"""
+    table = copy.deepcopy(table)
+    for column in table.columns.values():
+        if column.type == UUID_TYPE:
+            column.type = 'UUID'
+            column.definition = UUID_TYPE_RE.sub('UUID', column.definition, count=1)
+
+    if table.name != 'farms' and FARM_CODE in table.columns:
+        del table.columns[FARM_CODE]
+        table.primary_key = _farm_code_to_uuid(table.primary_key)
+        constraints = {}
+        for name, clause in table.constraints.items():
+            if not re.search(rf'\b{FARM_CODE}\b', clause):
+                constraints[name] = clause
+            elif CHECK_RE.match(clause):
+                # Checks the value of the dropped copy: still enforced on farms.code
+                logger.info(f"{table.name}: {name} dropped, farm_code is not stored in the compact table")
+            else:
+                constraints[name] = _farm_code_clause_to_uuid(clause)
+        table.constraints = constraints
+        foreign_keys = {}
+        for fk in table.foreign_keys:
+            ref_columns = ['uuid' if fk.ref_table == 'farms' and col == 'code' else col for col in fk.ref_columns]
+            fk = ForeignKey(_farm_code_to_uuid(fk.columns), fk.ref_table, ref_columns, fk.name)
+            foreign_keys.setdefault((tuple(fk.columns), fk.ref_table), fk)  # same key as the farm_uuid one
+        table.foreign_keys = list(foreign_keys.values())
+        indexes = []
+        for index in table.indexes:
+            columns = _farm_code_to_uuid(index.columns)
+            indexes.append(Index(index.name.replace(FARM_CODE, 'farm_uuid'), columns, index.unique))
+        table.indexes = indexes
+
+    table.indexes = [index for index in table.indexes if index.unique or not any(
+        other is not index and len(other.columns) > len(index.columns)
+        and other.columns[:len(index.columns)] == index.columns for other in table.indexes
+    )]
+    return table
+
+
+def compact_tables(schema: dict[str, Table]) -> dict[str, Table]:
+    """{table_name: compact Table} of the GOLD data tables"""
+    return {name: compact_table(table) for name, table in schema.items()
+            if table.source is not None and table.source.parent.name in DATA_CATEGORIES}
+
+
+def _in_schema(clause: str) -> str:
+    return re.sub(r'\bpublic\.', f'{COMPACT_SCHEMA}.', clause)
+
+
+def create_statements(tables: dict[str, Table]) -> list[str]:
+    """Re-runnable DDL of the compact schema: tables, then foreign keys, then indexes"""
+    statements = [f'CREATE SCHEMA IF NOT EXISTS {COMPACT_SCHEMA}']
+    for table in tables.values():
+        items = [_in_schema(column.definition) for column in table.columns.values()]
+        if table.primary_key and not any('PRIMARY KEY' in table.columns[col].definition.upper()
+                                         for col in table.primary_key):
+            items.append(f"PRIMARY KEY ({', '.join(table.primary_key)})")
+        items += [_in_schema(clause) for clause in table.constraints.values() if 'FOREIGN KEY' not in clause.upper()]
+        statements.append(f'CREATE TABLE IF NOT EXISTS {COMPACT_SCHEMA}.{table.name} (\n    '
+                          + ',\n    '.join(items) + '\n)')
+
+    for table in tables.values():
+        for fk in table.foreign_keys:
+            if fk.ref_table not in tables:
+                continue
+            name = fk.name or f"fk_{table.name}_{'_'.join(fk.columns)}"
+            statements.append(f'ALTER TABLE {COMPACT_SCHEMA}.{table.name} DROP CONSTRAINT IF EXISTS {name}')
+            statements.append(f"ALTER TABLE {COMPACT_SCHEMA}.{table.name} ADD CONSTRAINT {name} "
+                              f"FOREIGN KEY ({', '.join(fk.columns)}) "
+                              f"REFERENCES {COMPACT_SCHEMA}.{fk.ref_table}({', '.join(fk.ref_columns)})")
+
+    for table in tables.values():
+        for index in table.indexes:
+            statements.append(f"CREATE {'UNIQUE ' if index.unique else ''}INDEX IF NOT EXISTS {index.name} "
+                              f"ON {COMPACT_SCHEMA}.{table.name}({', '.join(index.columns)})")
+    return statements
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Create the compact schema variant (UUID keys, farm_code on farms only)')
+    parser.add_argument('--print', action='store_true', help='Print the DDL instead of running it')
+    args = parser.parse_args()
+
+    statements = create_statements(compact_tables(load_schema()))
+    if args.print:
+        print(';\n\n'.join(statements) + ';')
+        return
+
+    db_url = os.getenv('SUPABASE_DB_URL')
+    if not db_url:
+        logger.error("Missing SUPABASE_DB_URL in .env (direct Postgres connection)")
+        sys.exit(1)
+
+    logger.info(f"Creating schema '{COMPACT_SCHEMA}' ({len(statements)} statements)...")
+    try:
+        with postgres_copy.connect(db_url) as conn, conn.cursor() as cur:
+            cur.execute(';\n'.join(statements))
+    except Exception as e:
+        logger.error(f"✗ Compact schema not created, rolled back: {str(e)[:500]}")
+        sys.exit(1)
+    logger.success(f"✓ Schema '{COMPACT_SCHEMA}' ready: load it with _06_csv_to_db.py --compact")
+
+
+if __name__ == '__main__':
+    main()
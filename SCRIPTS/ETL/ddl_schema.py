@@ -0,0 +1,217 @@
+"""
+Schema model parsed from the DDL files in TABLES/
+Used by the loaders to derive the foreign key dependency graph between tables,
+and by migrate_schema.py to diff the DDL against the live database
+"""
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+TABLES_DIR = Path(__file__).parent.parent.parent / 'TABLES'
+
+CREATE_TABLE_RE = re.compile(r'CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(?:public\.)?(\w+)\s*\(', re.IGNORECASE)
+ALTER_FK_RE = re.compile(
+    r'ALTER\s+TABLE\s+(?:public\.)?(\w+)\s+ADD\s+CONSTRAINT\s+(\w+)\s+'
+    r'FOREIGN\s+KEY\s*\(([^)]*)\)\s*REFERENCES\s+(?:public\.)?(\w+)\s*\(([^)]*)\)',
+    re.IGNORECASE
+)
+TABLE_FK_RE = re.compile(
+    r'(?:CONSTRAINT\s+(\w+)\s+)?FOREIGN\s+KEY\s*\(([^)]*)\)\s*REFERENCES\s+(?:public\.)?(\w+)\s*\(([^)]*)\)',
+    re.IGNORECASE
+)
+INLINE_FK_RE = re.compile(r'REFERENCES\s+(?:public\.)?(\w+)\s*\(([^)]*)\)', re.IGNORECASE)
+PRIMARY_KEY_RE = re.compile(r'PRIMARY\s+KEY\s*\(([^)]*)\)', re.IGNORECASE)
+DEFAULT_RE = re.compile(r'DEFAULT\s+(\'[^\']*\'|\w+\s*\(\s*\)|[\w.+-]+)', re.IGNORECASE)
+CREATE_INDEX_RE = re.compile(
+    r'CREATE\s+(UNIQUE\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s+ON\s+(?:public\.)?(\w+)\s*\(([^)]*)\)',
+    re.IGNORECASE
+)
+COLUMN_RE = re.compile(r'(\w+)\s+([A-Za-z]+(?:\s*\(\s*\d+(?:\s*,\s*\d+)?\s*\))?)(.*)', re.DOTALL)
+TABLE_CONSTRAINT_KEYWORDS = ('CONSTRAINT', 'PRIMARY', 'FOREIGN', 'UNIQUE', 'CHECK')
+
+
+@dataclass
+class Column:
+    name: str
+    type: str
+    not_null: bool = False
+    unique: bool = False
+    default: str | None = None  # SQL expression as written, e.g. 'gen_random_uuid()'
+    definition: str = ''  # the column clause as written, e.g. 'code VARCHAR(10) NOT NULL UNIQUE'
+
+
+@dataclass
+class ForeignKey:
+    columns: list[str]
+    ref_table: str
+    ref_columns: list[str]
+    name: str | None = None
+
+
+@dataclass
+class Index:
+    name: str
+    columns: list[str]  # as written, may carry ASC/DESC
+    unique: bool = False
+
+
+@dataclass
+class Table:
+    name: str
+    source: Path | None = None
+    columns: dict[str, Column] = field(default_factory=dict)
+    primary_key: list[str] = field(default_factory=list)
+    foreign_keys: list[ForeignKey] = field(default_factory=list)
+    indexes: list[Index] = field(default_factory=list)
+    constraints: dict[str, str] = field(default_factory=dict)  # named table constraints: {name: clause as written}
+
+    def references(self) -> set[str]:
+        """Names of the other tables this table points to"""
+        return {fk.ref_table for fk in self.foreign_keys if fk.ref_table != self.name}
+
+
+def _split_names(text: str) -> list[str]:
+    return [name.strip() for name in text.split(',') if name.strip()]
+
+
+def _strip_comments(sql: str) -> str:
+    return re.sub(r'--[^\n]*', '', sql)
+
+
+def _split_top_level(body: str) -> list[str]:
+    """Split a CREATE TABLE body on commas that are not nested in parentheses"""
+    items, depth, current = [], 0, []
+    for char in body:
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        if char == ',' and depth == 0:
+            items.append(''.join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    if ''.join(current).strip():
+        items.append(''.join(current).strip())
+    return items
+
+
+def _table_body(sql: str, start: int) -> str:
+    """Return the text between the parenthesis opened at `start` and its matching close"""
+    depth = 0
+    for position in range(start, len(sql)):
+        if sql[position] == '(':
+            depth += 1
+        elif sql[position] == ')':
+            depth -= 1
+            if depth == 0:
+                return sql[start + 1:position]
+    raise ValueError("Unbalanced parentheses in CREATE TABLE statement")
+
+
+def _parse_create_table(name: str, body: str, source: Path) -> Table:
+    table = Table(name=name, source=source)
+
+    for item in _split_top_level(body):
+        upper = item.upper()
+
+        if upper.startswith(TABLE_CONSTRAINT_KEYWORDS):
+            named = re.match(r'CONSTRAINT\s+(\w+)', item, re.IGNORECASE)
+            if named:
+                table.constraints[named.group(1)] = item
+            primary_key = PRIMARY_KEY_RE.search(item)
+            if primary_key and 'FOREIGN' not in upper:
+                table.primary_key = _split_names(primary_key.group(1))
+            foreign_key = TABLE_FK_RE.search(item)
+            if foreign_key:
+                constraint_name, columns, ref_table, ref_columns = foreign_key.groups()
+                table.foreign_keys.append(ForeignKey(_split_names(columns), ref_table, _split_names(ref_columns), constraint_name))
+            continue
+
+        match = COLUMN_RE.match(item)
+        if not match:
+            continue
+        column_name, column_type, modifiers = match.groups()
+        modifiers_upper = modifiers.upper()
+        default = DEFAULT_RE.search(modifiers)
+        column = Column(
+            name=column_name,
+            type=re.sub(r'\s+', '', column_type).upper(),
+            not_null='NOT NULL' in modifiers_upper or 'PRIMARY KEY' in modifiers_upper,
+            unique=bool(re.search(r'\bUNIQUE\b', modifiers_upper)),
+            default=default.group(1) if default else None,
+            definition=item
+        )
+        table.columns[column_name] = column
+
+        if 'PRIMARY KEY' in modifiers_upper:
+            table.primary_key = [column_name]
+        inline_fk = INLINE_FK_RE.search(modifiers)
+        if inline_fk:
+            table.foreign_keys.append(ForeignKey([column_name], inline_fk.group(1), _split_names(inline_fk.group(2))))
+
+    return table
+
+
+def load_schema(tables_dir: Path = TABLES_DIR) -> dict[str, Table]:
+    """Parse every TABLES/**/*.sql file into {table_name: Table}
+
+    Foreign keys declared in separate ALTER TABLE files (05_FOREIGN_KEYS)
+    and CREATE INDEX statements are attached to the table they apply to.
+    """
+    tables: dict[str, Table] = {}
+    alter_fks: list[tuple[str, ForeignKey]] = []
+    indexes: list[tuple[str, Index]] = []
+
+    for sql_file in sorted(tables_dir.rglob('*.sql')):
+        sql = _strip_comments(sql_file.read_text(encoding='utf-8'))
+
+        for match in CREATE_TABLE_RE.finditer(sql):
+            name = match.group(1)
+            tables[name] = _parse_create_table(name, _table_body(sql, match.end() - 1), sql_file)
+
+        for match in ALTER_FK_RE.finditer(sql):
+            table_name, constraint_name, columns, ref_table, ref_columns = match.groups()
+            alter_fks.append((table_name, ForeignKey(_split_names(columns), ref_table, _split_names(ref_columns), constraint_name)))
+
+        for match in CREATE_INDEX_RE.finditer(sql):
+            unique, index_name, table_name, columns = match.groups()
+            indexes.append((table_name, Index(index_name, _split_names(columns), bool(unique))))
+
+    for table_name, foreign_key in alter_fks:
+        if table_name in tables and foreign_key.name not in {fk.name for fk in tables[table_name].foreign_keys}:
+            tables[table_name].foreign_keys.append(foreign_key)
+
+    for table_name, index in indexes:
+        if table_name in tables:
+            tables[table_name].indexes.append(index)
+
+    return tables
+
+
+def dependency_waves(tables: dict[str, Table], names: list[str]) -> list[list[str]]:
+    """Split `names` into topological waves
+
+    Every table only references tables of earlier waves, so the tables of
+    one wave can be loaded concurrently. Order within a wave follows `names`.
+    Tables without DDL, or references to tables outside `names`, add no edge.
+    """
+    selected = set(names)
+    depends_on = {
+        name: (tables[name].references() & selected) if name in tables else set()
+        for name in names
+    }
+
+    waves: list[list[str]] = []
+    done: set[str] = set()
+    remaining = list(names)
+
+    while remaining:
+        wave = [name for name in remaining if depends_on[name] <= done]
+        if not wave:
+            raise ValueError(f"Circular foreign key dependencies between: {', '.join(remaining)}")
+        waves.append(wave)
+        done.update(wave)
+        remaining = [name for name in remaining if name not in done]
+
+    return waves
@@ -0,0 +1,186 @@
+"""
+Constraint pre-validation of the GOLD tables against the DDL in TABLES/
+Used by _06_csv_to_db.py before anything is sent to a database
+
+Checks, column-wise on the typed frames (no per-row Python):
+- NOT NULL (primary key columns included), and NOT NULL columns missing from the file
+- VARCHAR(n) length
+- DECIMAL(p,s) and INT/SMALLINT range
+- duplicate primary keys and UNIQUE values (the first occurrence is kept)
+- foreign keys, by hash-set membership against the parent's gold keys
+
+Tables are checked in dependency order, parents first: rows dropped from a
+parent make their children fail the foreign key check in turn. A parent that
+is not loaded this run is not checked against (the database may hold it).
+"""
+import re
+from dataclasses import dataclass, replace
+import pandas as pd
+from loguru import logger
+from ddl_schema import Table
+from load_state import write_quarantine
+from sinks import GoldTable
+
+VARCHAR_RE = re.compile(r'(?:VARCHAR|CHAR|CHARACTER VARYING)\((\d+)\)')
+DECIMAL_RE = re.compile(r'(?:DECIMAL|NUMERIC)\((\d+)(?:,(\d+))?\)')
+INTEGER_RANGES = {
+    'SMALLINT': (-2 ** 15, 2 ** 15 - 1),
+    'INT': (-2 ** 31, 2 ** 31 - 1),
+    'INTEGER': (-2 ** 31, 2 ** 31 - 1),
+    'SERIAL': (1, 2 ** 31 - 1),
+}
+
+# Offending row indices listed per violation in the log
+LOG_SAMPLE_ROWS = 5
+
+
+@dataclass
+class Violation:
+    table: str
+    constraint: str  # e.g. 'NOT NULL', 'VARCHAR(100)', 'FK fk_substations_farm → farms(uuid)'
+    columns: list[str]
+    rows: pd.Index  # labels of the offending rows in the gold frame (= row index in the file)
+
+    def __str__(self) -> str:
+        sample = ', '.join(str(row) for row in self.rows[:LOG_SAMPLE_ROWS])
+        more = f', … +{len(self.rows) - LOG_SAMPLE_ROWS}' if len(self.rows) > LOG_SAMPLE_ROWS else ''
+        return f"{', '.join(self.columns)}: {self.constraint}, {len(self.rows)} rows ({sample}{more})"
+
+
+def _column_violations(df: pd.DataFrame, table: Table) -> list[Violation]:
+    violations = []
+    not_null = {name for name, column in table.columns.items() if column.not_null} | set(table.primary_key)
+
+    for name, column in table.columns.items():
+        if name not in df.columns:
+            # The database default fills it in; without one every row fails
+            if name in not_null and column.default is None and column.type != 'SERIAL':
+                violations.append(Violation(table.name, 'NOT NULL (column missing from the file)', [name], df.index))
+            continue
+
+        values = df[name]
+        present = values.notna()
+        if name in not_null and not present.all():
+            violations.append(Violation(table.name, 'NOT NULL', [name], df.index[~present]))
+
+        if (match := VARCHAR_RE.fullmatch(column.type)) and present.any():
+            lengths = values[present].astype(str).str.len()
+            too_long = lengths.index[lengths > int(match.group(1))]
+            if len(too_long):
+                violations.append(Violation(table.name, column.type, [name], too_long))
+
+        numeric_bounds = None
+        if match := DECIMAL_RE.fullmatch(column.type):
+            precision, scale = int(match.group(1)), int(match.group(2) or 0)
+            limit = 10 ** (precision - scale)
+            numeric_bounds = (lambda numbers, scale=scale, limit=limit: numbers.round(scale).abs() >= limit)
+        elif column.type in INTEGER_RANGES:
+            low, high = INTEGER_RANGES[column.type]
+            numeric_bounds = (lambda numbers, low=low, high=high: (numbers < low) | (numbers > high))
+
+        if numeric_bounds is not None and present.any():
+            numbers = pd.to_numeric(values[present].astype(object), errors='coerce').astype('float64')
+            not_numeric = numbers.index[numbers.isna()]
+            if len(not_numeric):
+                violations.append(Violation(table.name, f'{column.type} (not a number)', [name], not_numeric))
+            out_of_range = numbers.index[numeric_bounds(numbers).fillna(False).astype(bool)]
+            if len(out_of_range):
+                violations.append(Violation(table.name, f'{column.type} (out of range)', [name], out_of_range))
+
+    return violations
+
+
+def _key_violations(df: pd.DataFrame, table: Table) -> list[Violation]:
+    violations = []
+    keys = {tuple(table.primary_key): 'PRIMARY KEY'}
+    unique_keys = [(name,) for name, column in table.columns.items() if column.unique]
+    unique_keys += [tuple(col.split()[0] for col in index.columns) for index in table.indexes if index.unique]
+    for columns in unique_keys:
+        keys.setdefault(columns, 'UNIQUE')
+
+    for columns, constraint in keys.items():
+        columns = list(columns)
+        if not columns or not set(columns) <= set(df.columns):
+            continue
+        subset = df[columns]
+        # NULLs never collide in a UNIQUE constraint (they are NOT NULL violations in a primary key)
+        duplicated = subset.duplicated(keep='first') & subset.notna().all(axis=1)
+        if duplicated.any():
+            violations.append(Violation(table.name, f'{constraint} (duplicate)', columns, df.index[duplicated]))
+    return violations
+
+
+def _key_index(df: pd.DataFrame, columns: list[str]) -> pd.Index:
+    """Hashable key values of `columns` (single Index, or MultiIndex for composite keys)"""
+    if len(columns) == 1:
+        return pd.Index(df[columns[0]].astype(object))
+    return pd.MultiIndex.from_frame(df[columns].astype(object))
+
+
+def _foreign_key_violations(df: pd.DataFrame, table: Table, parents: dict[str, pd.DataFrame]) -> list[Violation]:
+    violations = []
+    for fk in table.foreign_keys:
+        parent = parents.get(fk.ref_table)
+        if parent is None or not set(fk.columns) <= set(df.columns) or not set(fk.ref_columns) <= set(parent.columns):
+            continue
+
+        # MATCH SIMPLE: a key with a NULL part is not checked
+        child = df[fk.columns]
+        complete = child.notna().all(axis=1)
+        parent_keys = _key_index(parent.dropna(subset=fk.ref_columns), fk.ref_columns)
+        missing = ~_key_index(child[complete], fk.columns).isin(parent_keys)
+        if missing.any():
+            target = f"{fk.ref_table}({', '.join(fk.ref_columns)})"
+            violations.append(Violation(table.name, f"FK {fk.name + ' ' if fk.name else ''}→ {target}",
+                                        list(fk.columns), child.index[complete][missing]))
+    return violations
+
+
+def validate_gold(tables: list[GoldTable]) -> tuple[dict[str, GoldTable], dict[str, list[Violation]]]:
+    """Check the gold tables against their DDL and drop the offending rows
+
+    Args:
+        tables: decoded gold tables, in dependency order (parents first)
+    Returns: ({table_name: table without the offending rows}, {table_name: violations})
+    """
+    clean = {}
+    violations = {}
+    parents = {}  # typed frames of the clean tables, for the foreign key checks
+
+    for table in tables:
+        if table.df is None or table.schema is None:
+            clean[table.name] = table
+            continue
+
+        df = table.typed
+        found = (_column_violations(df, table.schema) + _key_violations(df, table.schema)
+                 + _foreign_key_violations(df, table.schema, parents))
+        if found:
+            bad_rows = pd.Index([]).append([violation.rows for violation in found]).unique()
+            table = replace(table, df=table.df.drop(index=bad_rows), excluded=table.df.loc[bad_rows])
+            violations[table.name] = found
+        clean[table.name] = table
+        parents[table.name] = table.typed
+
+    return clean, violations
+
+
+def report_violations(original: dict[str, GoldTable], violations: dict[str, list[Violation]]) -> None:
+    """Log the violations and write the offending rows to validation/<table>.jsonl (stale files are removed)"""
+    for table_name, table in original.items():
+        errors = {}
+        for violation in violations.get(table_name, []):
+            logger.warning(f"  ⚠ {table_name}: {violation}")
+            for row in violation.rows:
+                errors.setdefault(row, []).append(f"{', '.join(violation.columns)}: {violation.constraint}")
+        if not errors:
+            write_quarantine(table_name, [], folder='validation')
+            continue
+
+        rows = table.df.loc[sorted(errors)]
+        rejected = [
+            {'row_index': row, 'error': '; '.join(errors[row]), 'row': values}
+            for row, values in zip(rows.index, rows.astype(object).where(rows.notna(), None).to_dict('records'))
+        ]
+        path = write_quarantine(table_name, rejected, folder='validation')
+        logger.warning(f"  ⚠ {table_name}: {len(rejected)}/{len(table.df)} rows excluded from the load → {path}")
@@ -0,0 +1,150 @@
+"""
+Shared HTTP transport for the Supabase REST API (PostgREST)
+Used by _05_wipe_database.py and _06_csv_to_db.py
+
+- connection pool sized to the number of concurrent requests, kept alive
+- HTTP/2 when the h2 package is installed (many streams over one connection)
+- gzip request bodies (opt-in: SUPABASE_GZIP_REQUESTS=1, the gateway must decode them)
+- connect/read/write/pool timeouts
+- retry with jittered exponential backoff on 429/5xx and dropped connections
+  (the count is left in response.extensions['retries'])
+- SSL verification disabled and system proxy used (corporate proxy)
+"""
+import asyncio
+import gzip
+import importlib.util
+import os
+import random
+import time
+import urllib.request
+import httpx
+from loguru import logger
+
+HTTP2 = os.getenv('SUPABASE_HTTP2', '1') == '1' and importlib.util.find_spec('h2') is not None
+GZIP_REQUESTS = os.getenv('SUPABASE_GZIP_REQUESTS', '0') == '1'
+GZIP_MIN_BYTES = 1024
+
+TIMEOUT = httpx.Timeout(connect=10.0, read=60.0, write=60.0, pool=60.0)
+MAX_RETRIES = int(os.getenv('SUPABASE_MAX_RETRIES', '4'))
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30.0
+
+# 504 is not retried as is: the loader answers it by splitting the batch
+RETRY_STATUSES = {429, 500, 502, 503}
+RETRY_ERRORS = (httpx.ConnectError, httpx.ReadError, httpx.WriteError, httpx.RemoteProtocolError)
+
+
+def rest_headers(api_key: str) -> dict:
+    return {
+        'apikey': api_key,
+        'Authorization': f'Bearer {api_key}',
+        'Content-Type': 'application/json',
+    }
+
+
+def _backoff_seconds(attempt: int, response: httpx.Response | None = None) -> float:
+    """Full-jitter exponential backoff, or the server's Retry-After when it sends one"""
+    if response is not None:
+        retry_after = response.headers.get('Retry-After', '')
+        if retry_after.isdigit():
+            return min(float(retry_after), BACKOFF_MAX_SECONDS)
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+def _gzip_request(request: httpx.Request) -> httpx.Request:
+    """Compress the body of a request that has one (JSON batches compress ~10x)"""
+    if not GZIP_REQUESTS or 'Content-Encoding' in request.headers:
+        return request
+    body = request.read()
+    if len(body) < GZIP_MIN_BYTES:
+        return request
+    headers = dict(request.headers)
+    headers.pop('content-length', None)
+    headers['Content-Encoding'] = 'gzip'
+    return httpx.Request(request.method, request.url, headers=headers,
+                         content=gzip.compress(body, compresslevel=5), extensions=request.extensions)
+
+
+def _should_retry(response: httpx.Response | None, attempt: int) -> bool:
+    return attempt < MAX_RETRIES and (response is None or response.status_code in RETRY_STATUSES)
+
+
+class RetryTransport(httpx.BaseTransport):
+    def __init__(self, transport: httpx.BaseTransport):
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request = _gzip_request(request)
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                response = self._transport.handle_request(request)
+            except RETRY_ERRORS as e:
+                if not _should_retry(None, attempt):
+                    raise
+                logger.debug(f"{request.method} {request.url.path}: {type(e).__name__}, retry {attempt + 1}")
+                time.sleep(_backoff_seconds(attempt))
+                continue
+            if not _should_retry(response, attempt):
+                response.extensions['retries'] = attempt
+                return response
+            response.read()
+            response.close()
+            logger.debug(f"{request.method} {request.url.path}: HTTP {response.status_code}, retry {attempt + 1}")
+            time.sleep(_backoff_seconds(attempt, response))
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncRetryTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request = _gzip_request(request)
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                response = await self._transport.handle_async_request(request)
+            except RETRY_ERRORS as e:
+                if not _should_retry(None, attempt):
+                    raise
+                logger.debug(f"{request.method} {request.url.path}: {type(e).__name__}, retry {attempt + 1}")
+                await asyncio.sleep(_backoff_seconds(attempt))
+                continue
+            if not _should_retry(response, attempt):
+                response.extensions['retries'] = attempt
+                return response
+            await response.aread()
+            await response.aclose()
+            logger.debug(f"{request.method} {request.url.path}: HTTP {response.status_code}, retry {attempt + 1}")
+            await asyncio.sleep(_backoff_seconds(attempt, response))
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _transport_options(max_connections: int) -> dict:
+    # The client ignores verify/limits/proxy once a transport is given: set them here.
+    # getproxies() reads the environment and, on Windows, the system proxy settings.
+    return {
+        'verify': False,
+        'http2': HTTP2,
+        'limits': httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections,
+                               keepalive_expiry=60.0),
+        'proxy': urllib.request.getproxies().get('https'),
+        'retries': 1,  # connection attempts only; requests are retried by RetryTransport
+    }
+
+
+def create_client(max_connections: int = 4) -> httpx.Client:
+    """Blocking client for the REST API"""
+    transport = RetryTransport(httpx.HTTPTransport(**_transport_options(max_connections)))
+    return httpx.Client(transport=transport, timeout=TIMEOUT, trust_env=False)
+
+
+def create_async_client(max_connections: int = 8) -> httpx.AsyncClient:
+    """Async client for the REST API, pool sized for `max_connections` requests in flight"""
+    transport = AsyncRetryTransport(httpx.AsyncHTTPTransport(**_transport_options(max_connections)))
+    return httpx.AsyncClient(transport=transport, timeout=TIMEOUT, trust_env=False)
@@ -0,0 +1,224 @@
+"""
+Throughput metrics of a load run
+Used by _06_csv_to_db.py
+
+Sinks fill one TableMetrics per (sink, table): confirmed batches with their
+latency and payload size, resent requests, rejected rows. At the end of the
+run one row is written to ingestion_versions and one row per table and sink
+to ingestion_versions_metrics (TABLES/06_METADATA), through PostgREST or the
+direct Postgres connection, so load speed can be followed over time.
+"""
+import getpass
+import json
+import math
+import os
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from loguru import logger
+import postgres_copy
+from http_transport import create_client
+
+RUNS_TABLE = 'ingestion_versions'
+TABLES_TABLE = 'ingestion_versions_metrics'
+# Inserts of the run row when its version number was taken by a concurrent run
+VERSION_ATTEMPTS = 5
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    """Nearest-rank percentile (q in 0-100), None without values"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+@dataclass
+class TableMetrics:
+    sink: str
+    table: str
+    rows_in_gold: int = 0
+    rows_sent: int = 0
+    rows_rejected: int = 0
+    bytes_sent: int = 0
+    batches: int = 0
+    retries: int = 0
+    latencies: list[float] = field(default_factory=list)  # seconds per confirmed batch
+    duration: float = 0.0
+    started: float = field(default_factory=time.perf_counter)
+
+    def record_batch(self, seconds: float, rows: int, sent_bytes: int) -> None:
+        self.latencies.append(seconds)
+        self.rows_sent += rows
+        self.bytes_sent += sent_bytes
+        self.batches += 1
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_sent / self.duration if self.duration > 0 else 0.0
+
+    def row(self, version_id: int, status: str) -> dict:
+        """Row of ingestion_versions_metrics"""
+        p50, p95 = percentile(self.latencies, 50), percentile(self.latencies, 95)
+        return {
+            'ingestion_version_id': version_id,
+            'target': self.sink,
+            'table_name': self.table,
+            'status': status,
+            'rows_in_gold': self.rows_in_gold,
+            'rows_sent': self.rows_sent,
+            'rows_rejected': self.rows_rejected,
+            'bytes_sent': self.bytes_sent,
+            'batches': self.batches,
+            'retries': self.retries,
+            'latency_p50_ms': None if p50 is None else round(p50 * 1000),
+            'latency_p95_ms': None if p95 is None else round(p95 * 1000),
+            'rows_per_second': round(self.rows_per_second, 1),
+            'duration_seconds': round(self.duration, 3),
+        }
+
+
+def _commit_sha() -> str | None:
+    if os.getenv('GITHUB_SHA'):
+        return os.getenv('GITHUB_SHA')
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class LoadMetrics:
+    """Metrics of one load run, shared by all sinks (thread-safe creation)"""
+
+    def __init__(self):
+        self.started_at = datetime.now()
+        self.started = time.perf_counter()
+        self.tables: dict[tuple[str, str], TableMetrics] = {}
+        self._lock = threading.Lock()
+
+    def table(self, sink: str, table: str) -> TableMetrics:
+        """Start (or restart) the metrics of `table` on `sink`"""
+        with self._lock:
+            metrics = self.tables[(sink, table)] = TableMetrics(sink, table)
+            return metrics
+
+    def log_summary(self) -> None:
+        for metrics in self.tables.values():
+            if not metrics.batches:
+                continue
+            p50, p95 = percentile(metrics.latencies, 50), percentile(metrics.latencies, 95)
+            logger.info(f"  {metrics.sink:<16} {metrics.table:<34} {metrics.rows_sent:>8} rows "
+                        f"{metrics.bytes_sent / 1024:>9.0f} KiB {metrics.batches:>5} batches {metrics.retries:>3} retries "
+                        f"p50 {p50 * 1000:>6.0f} ms  p95 {p95 * 1000:>6.0f} ms  {metrics.rows_per_second:>9,.0f} rows/s")
+
+    def run_row(self, statuses: dict[str, dict[str, str]], primary_sink: str, gold_files: list[Path],
+                violations: dict, notes: str) -> dict:
+        """Row of ingestion_versions (version_number is assigned by the writer)
+
+        Args:
+            statuses: {sink: {table: status}} after the load
+            primary_sink: the sink whose rows count as inserted (the cloud database)
+            gold_files: the GOLD CSV files of the load
+            violations: pre-validation result {table: [Violation]} (gold_constraints.py)
+        """
+        primary = [metrics for (sink, _), metrics in self.tables.items() if sink == primary_sink]
+        failed = sorted({table for sink_statuses in statuses.values()
+                         for table, status in sink_statuses.items() if status == 'failed'})
+        existing = [path for path in gold_files if path.exists()]
+        found = [violation for table_violations in violations.values() for violation in table_violations]
+        return {
+            'ingestion_source': 'github-actions' if os.getenv('GITHUB_ACTIONS') else 'manual',
+            'triggered_by': os.getenv('GITHUB_ACTOR') or getpass.getuser(),
+            'commit_sha': _commit_sha(),
+            'status': 'failed' if failed else 'completed',
+            'tables_affected': sum(1 for metrics in primary if metrics.rows_sent),
+            'total_rows_inserted': sum(metrics.rows_sent for metrics in primary),
+            'execution_time_seconds': round(time.perf_counter() - self.started),
+            'ingestion_date': self.started_at.isoformat(timespec='seconds'),
+            'gold_generation_timestamp': (datetime.fromtimestamp(max(path.stat().st_mtime for path in existing))
+                                          .isoformat(timespec='seconds') if existing else None),
+            'gold_csv_count': len(existing),
+            'validation_passed': not found,
+            'test_foreign_keys': not any(violation.constraint.startswith('FK') for violation in found),
+            'test_required_fields': not any(violation.constraint.startswith('NOT NULL') for violation in found),
+            'validation_errors': json.dumps([f'{violation.table}: {violation}' for violation in found],
+                                            ensure_ascii=False) if found else None,
+            'error_message': f"Failed tables: {', '.join(failed)}" if failed else None,
+            'notes': notes,
+        }
+
+    def table_rows(self, version_id: int, statuses: dict[str, dict[str, str]]) -> list[dict]:
+        return [metrics.row(version_id, statuses.get(sink, {}).get(table, 'failed'))
+                for (sink, table), metrics in self.tables.items()]
+
+
+def write_rest(rest_url: str, headers: dict, run: dict, metrics: LoadMetrics, statuses: dict) -> int:
+    """Insert the run and its table metrics through PostgREST; returns the version number
+
+    PostgREST cannot compute the next version number server side: it is read
+    then inserted, and a concurrent run taking the same number first trips
+    UQ_ingestion_version (409), in which case the number is read again.
+    """
+    with create_client() as client:
+        for attempt in range(1, VERSION_ATTEMPTS + 1):
+            response = client.get(f'{rest_url}{RUNS_TABLE}', headers=headers,
+                                  params={'select': 'version_number', 'order': 'version_number.desc', 'limit': '1'})
+            response.raise_for_status()
+            latest = response.json()
+            version_number = (latest[0]['version_number'] if latest else 0) + 1
+
+            response = client.post(f'{rest_url}{RUNS_TABLE}', json=[{**run, 'version_number': version_number}],
+                                   headers={**headers, 'Prefer': 'return=representation'})
+            if response.status_code == 409 and attempt < VERSION_ATTEMPTS:
+                logger.warning(f"  → version {version_number} taken by a concurrent run, retrying")
+                continue
+            response.raise_for_status()
+            break
+        version_id = response.json()[0]['id']
+
+        response = client.post(f'{rest_url}{TABLES_TABLE}', json=metrics.table_rows(version_id, statuses),
+                               headers={**headers, 'Prefer': 'return=minimal'})
+        response.raise_for_status()
+    return version_number
+
+
+def write_postgres(db_url: str, run: dict, metrics: LoadMetrics, statuses: dict) -> int:
+    """Insert the run and its table metrics over a direct connection; returns the version number
+
+    The version number is computed by the INSERT itself; two runs committing
+    the same number are told apart by UQ_ingestion_version and the loser
+    retries from a savepoint.
+    """
+    columns = list(run)
+    with postgres_copy.connect(db_url) as conn, conn.cursor() as cur:
+        sql = postgres_copy.sql
+        insert_run = sql.SQL('INSERT INTO {} (version_number, {}) '
+                             'SELECT COALESCE(MAX(version_number), 0) + 1, {} FROM {} RETURNING id, version_number').format(
+            sql.Identifier(RUNS_TABLE), sql.SQL(', ').join(map(sql.Identifier, columns)),
+            sql.SQL(', ').join(sql.Placeholder() * len(columns)), sql.Identifier(RUNS_TABLE),
+        )
+        for attempt in range(1, VERSION_ATTEMPTS + 1):
+            try:
+                with conn.transaction():
+                    cur.execute(insert_run, list(run.values()))
+                break
+            except postgres_copy.psycopg.errors.UniqueViolation:
+                if attempt == VERSION_ATTEMPTS:
+                    raise
+                logger.warning("  → version number taken by a concurrent run, retrying")
+        version_id, version_number = cur.fetchone()
+
+        rows = metrics.table_rows(version_id, statuses)
+        if rows:
+            row_columns = list(rows[0])
+            cur.executemany(sql.SQL('INSERT INTO {} ({}) VALUES ({})').format(
+                sql.Identifier(TABLES_TABLE), sql.SQL(', ').join(map(sql.Identifier, row_columns)),
+                sql.SQL(', ').join(sql.Placeholder() * len(row_columns)),
+            ), [list(row.values()) for row in rows])
+    return version_number
@@ -0,0 +1,246 @@
+"""
+Persisted state of the load step (DATA/LOAD_STATE)
+Survives between runs of _06_csv_to_db.py
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+
+STATE_DIR = Path(__file__).parent.parent.parent / 'DATA' / 'LOAD_STATE'
+
+# Batch payload budget (bytes of serialized JSON per request)
+DEFAULT_BATCH_BYTES = 256 * 1024
+MIN_BATCH_BYTES = 8 * 1024
+MAX_BATCH_BYTES = 8 * 1024 * 1024
+
+# Requests slower than this shrink the budget, much faster ones grow it
+TARGET_BATCH_SECONDS = float(os.getenv('SUPABASE_TARGET_BATCH_SECONDS', '2.0'))
+
+
+def read_state(file_name: str, default):
+    """Read a JSON state file, or return `default` if it does not exist yet"""
+    path = STATE_DIR / file_name
+    if not path.exists():
+        return default
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except json.JSONDecodeError:
+        return default
+
+
+def write_state(file_name: str, data) -> None:
+    """Write a JSON state file atomically (temp file + rename)"""
+    path = STATE_DIR / file_name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    tmp_path.write_text(json.dumps(data, indent=2, sort_keys=True), encoding='utf-8')
+    tmp_path.replace(path)
+
+
+def write_quarantine(table_name: str, rejected: list[dict], folder: str = 'quarantine') -> Path | None:
+    """Write rejected rows (with their error) to <folder>/<table>.jsonl
+
+    quarantine/ holds the rows the server refused, validation/ the rows
+    excluded before the load (gold_constraints.py).
+    The file is replaced on every run; it is removed when nothing was rejected.
+    Returns the path written, or None.
+    """
+    path = STATE_DIR / folder / f'{table_name}.jsonl'
+    if not rejected:
+        path.unlink(missing_ok=True)
+        return None
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open('w', encoding='utf-8') as f:
+        for entry in rejected:
+            f.write(json.dumps(entry, default=str, ensure_ascii=False) + '\n')
+    return path
+
+
+def row_hash(row_json: bytes) -> str:
+    """Digest of one serialized row, compared between runs to detect changes"""
+    return hashlib.blake2b(row_json, digest_size=16).hexdigest()
+
+
+class RowHashState:
+    """Hashes of the rows last confirmed in the remote table, keyed by primary key
+
+    Keys are the JSON list of the primary key values, so they can be turned
+    back into delete filters for rows that vanished from the gold layer.
+    Without a state file (first run, after a wipe) every row is sent.
+    """
+
+    STATE_DIR_NAME = 'row_hashes'
+
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+        self.file_name = f'{self.STATE_DIR_NAME}/{table_name}.json'
+        self.hashes: dict[str, str] | None = read_state(self.file_name, None)
+
+    @property
+    def exists(self) -> bool:
+        return self.hashes is not None
+
+    def diff(self, keys: list[str], hashes: list[str]) -> tuple[list[int], list[str]]:
+        """Return (indices of new or changed rows, keys of rows no longer present)"""
+        previous = self.hashes or {}
+        changed = [index for index, (key, digest) in enumerate(zip(keys, hashes)) if previous.get(key) != digest]
+        vanished = sorted(previous.keys() - set(keys))
+        return changed, vanished
+
+    def save(self, hashes: dict[str, str]) -> None:
+        self.hashes = hashes
+        write_state(self.file_name, hashes)
+
+    def clear(self) -> None:
+        """Forget this table: the next load sends every row"""
+        self.hashes = None
+        (STATE_DIR / self.file_name).unlink(missing_ok=True)
+
+    @classmethod
+    def clear_all(cls) -> None:
+        """Forget every table: the remote content is no longer known (wipe)"""
+        shutil.rmtree(STATE_DIR / cls.STATE_DIR_NAME, ignore_errors=True)
+
+
+def gold_snapshot(paths: list[Path]) -> str:
+    """Digest of the gold files' names and contents: a resumed run must load the same data"""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in sorted(paths):
+        digest.update(path.name.encode('utf-8'))
+        if path.exists():
+            with path.open('rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LoadJournal:
+    """Checkpoint journal of a load run (append-only JSON lines)
+
+    Records, per sink and table, the row hashes of every batch the server
+    confirmed and the tables that completed. A run started with resume=True
+    skips that work, provided the gold snapshot is the one the journal was
+    written for; otherwise the journal starts over.
+    """
+
+    FILE_NAME = 'checkpoint.jsonl'
+
+    def __init__(self, snapshot: str, resume: bool = False):
+        self.path = STATE_DIR / self.FILE_NAME
+        self.snapshot = snapshot
+        self.done_tables: set[tuple[str, str]] = set()
+        self.confirmed_rows: dict[tuple[str, str], set[str]] = {}
+        self.resumed = resume and self._replay()
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if not self.resumed:
+            self.path.write_text(json.dumps({'snapshot': snapshot, 'started': datetime.now().isoformat()}) + '\n',
+                                 encoding='utf-8')
+        self._file = self.path.open('a', encoding='utf-8')
+
+    def _replay(self) -> bool:
+        if not self.path.exists():
+            return False
+        with self.path.open(encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        try:
+            if not lines or json.loads(lines[0]).get('snapshot') != self.snapshot:
+                return False
+        except json.JSONDecodeError:
+            return False
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                break  # last line cut by the crash
+            key = (entry['sink'], entry['table'])
+            if entry.get('done'):
+                self.done_tables.add(key)
+            else:
+                self.confirmed_rows.setdefault(key, set()).update(entry['rows'])
+        return True
+
+    def _append(self, entry: dict) -> None:
+        with self._lock:
+            self._file.write(json.dumps(entry) + '\n')
+            self._file.flush()
+
+    def table_done(self, sink: str, table: str) -> bool:
+        return (sink, table) in self.done_tables
+
+    def rows_confirmed(self, sink: str, table: str) -> set[str]:
+        return self.confirmed_rows.get((sink, table), set())
+
+    def record_rows(self, sink: str, table: str, row_hashes: list[str]) -> None:
+        self._append({'sink': sink, 'table': table, 'rows': row_hashes})
+
+    def record_table(self, sink: str, table: str) -> None:
+        self.done_tables.add((sink, table))
+        self._append({'sink': sink, 'table': table, 'done': True})
+
+    @classmethod
+    def discard(cls) -> None:
+        """Drop the journal: the remote content it describes is gone (wipe)"""
+        (STATE_DIR / cls.FILE_NAME).unlink(missing_ok=True)
+
+    def close(self, completed: bool) -> None:
+        """Close the journal; a run that completed leaves nothing to resume"""
+        self._file.close()
+        if completed:
+            self.path.unlink(missing_ok=True)
+
+
+class AdaptiveBatchSizer:
+    """Byte budget for the batches of one table, tuned from observed requests
+
+    - full batch faster than half the target latency: budget x1.5
+    - batch slower than the target latency: budget x0.7
+    - 413 Payload Too Large or timeout: budget at most half the rejected batch,
+      and the rejected size becomes a ceiling the budget never grows back to
+    The budget starts from the size chosen on the previous run.
+    """
+
+    STATE_FILE = 'batch_sizes.json'
+
+    def __init__(self, table_name: str, initial_bytes: int | None = None):
+        self.table_name = table_name
+        self.batch_bytes = int(initial_bytes or DEFAULT_BATCH_BYTES)
+        self.ceiling_bytes = MAX_BATCH_BYTES
+
+    def _clamp(self, value: float) -> None:
+        self.batch_bytes = int(min(self.ceiling_bytes * 0.9, MAX_BATCH_BYTES, max(MIN_BATCH_BYTES, value)))
+
+    def cut(self, row_sizes: list[int], start: int) -> int:
+        """Return the end index of the next batch starting at `start` (always >= 1 row)"""
+        end, total = start, 0
+        while end < len(row_sizes) and (end == start or total + row_sizes[end] + 1 <= self.batch_bytes):
+            total += row_sizes[end] + 1  # +1 for the separating comma
+            end += 1
+        return end
+
+    def record_success(self, seconds: float, sent_bytes: int) -> None:
+        if seconds > TARGET_BATCH_SECONDS:
+            self._clamp(min(self.batch_bytes, sent_bytes) * 0.7)
+        elif seconds < TARGET_BATCH_SECONDS / 2 and sent_bytes >= self.batch_bytes * 0.8:
+            # Only full batches say something about a larger budget
+            self._clamp(self.batch_bytes * 1.5)
+
+    def record_too_large(self, sent_bytes: int) -> None:
+        self.ceiling_bytes = max(MIN_BATCH_BYTES, min(self.ceiling_bytes, sent_bytes))
+        self._clamp(min(self.batch_bytes, sent_bytes / 2))
+
+    @classmethod
+    def saved_sizes(cls) -> dict:
+        return read_state(cls.STATE_FILE, {})
+
+    @classmethod
+    def save_sizes(cls, sizers: list['AdaptiveBatchSizer']) -> None:
+        """Record the budget each table ended with, as the starting point of the next run"""
+        sizes = cls.saved_sizes()
+        sizes.update({sizer.table_name: sizer.batch_bytes for sizer in sizers})
+        write_state(cls.STATE_FILE, sizes)
@@ -0,0 +1,299 @@
+"""
+Checksum-based schema migrations: TABLES/*.sql → Postgres (Supabase)
+
+Each DDL file applied to the database is recorded in schema_migrations with
+its SHA-256. A run compares the files with those checksums (one query on an
+up-to-date database) and applies only the new or changed files, all in one
+transaction, in dependency order: a table is created after the tables it
+references, otherwise in the order of TABLES/ (as setup-database.yml).
+
+The statements of a pending file are planned against the live catalog:
+- CREATE TABLE of a missing table runs as written; of an existing table it
+  becomes ALTER TABLE statements: missing columns added, type, NOT NULL and
+  default changes, named constraints (CONSTRAINT x ...) added when missing
+- CREATE INDEX runs when no index of that name exists
+- any other statement runs as written, so it must be re-runnable
+  (DROP ... IF EXISTS + ADD, CREATE OR REPLACE, COMMENT ON, GRANT)
+
+Never generated: dropping a column gone from the DDL (logged, kept), primary
+key changes, constraints changed under the same name (give them a new name).
+
+Usage: python SCRIPTS/ETL/migrate_schema.py [--dry-run]
+Requires SUPABASE_DB_URL and psycopg (pip install "wndmngr-db[postgres]")
+"""
+import argparse
+import hashlib
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from dotenv import load_dotenv
+from loguru import logger
+import postgres_copy
+from ddl_schema import TABLES_DIR, CREATE_INDEX_RE, CREATE_TABLE_RE, Table, load_schema
+
+load_dotenv()
+
+MIGRATIONS_TABLE = 'schema_migrations'
+
+# DDL types (as normalized by ddl_schema) → format_type() of the live column
+PG_TYPES = {
+    'INT': 'integer',
+    'INTEGER': 'integer',
+    'SERIAL': 'integer',
+    'SMALLINT': 'smallint',
+    'BIGINT': 'bigint',
+    'TEXT': 'text',
+    'DATE': 'date',
+    'TIMESTAMP': 'timestamp without time zone',
+    'BOOLEAN': 'boolean',
+}
+SIZED_TYPES = {'VARCHAR': 'character varying', 'CHAR': 'character', 'DECIMAL': 'numeric', 'NUMERIC': 'numeric'}
+SIZED_TYPE_RE = re.compile(r'(VARCHAR|CHAR|DECIMAL|NUMERIC)\((\d+)(?:,(\d+))?\)')
+DOLLAR_QUOTE_RE = re.compile(r'\$\w*\$')
+
+
+@dataclass
+class LiveSchema:
+    """The public schema as the catalog describes it"""
+    columns: dict[str, dict[str, tuple[str, bool, bool]]] = field(default_factory=dict)  # {table: {column: (type, not null, has default)}}
+    constraints: dict[str, set[str]] = field(default_factory=dict)  # {table: constraint names}
+    indexes: set[str] = field(default_factory=set)
+
+    def add_table(self, table: Table) -> None:
+        """Record a table created by this run, as its DDL describes it"""
+        self.columns[table.name] = {
+            name: (pg_type(column.type), column.not_null or name in table.primary_key,
+                   column.default is not None or column.type == 'SERIAL')
+            for name, column in table.columns.items()
+        }
+        self.constraints[table.name] = {name.lower() for name in table.constraints}
+
+
+def file_checksum(path: Path) -> str:
+    """SHA-256 of a DDL file, line endings normalized (same checksum on Windows and in CI)"""
+    return hashlib.sha256(path.read_bytes().replace(b'\r\n', b'\n')).hexdigest()
+
+
+def pg_type(ddl_type: str) -> str:
+    """The type format_type() reports for a column declared with `ddl_type`"""
+    match = SIZED_TYPE_RE.fullmatch(ddl_type)
+    if match:
+        base, size, scale = match.groups()
+        if SIZED_TYPES[base] == 'numeric':
+            return f'numeric({size},{scale or 0})'
+        return f'{SIZED_TYPES[base]}({size})'
+    return PG_TYPES.get(ddl_type, ddl_type.lower())
+
+
+def split_statements(sql: str) -> list[str]:
+    """Split a DDL file on the semicolons outside quotes and $$ bodies (comments dropped)"""
+    statements, current, position = [], [], 0
+    while position < len(sql):
+        char = sql[position]
+        if sql.startswith('--', position):
+            end = sql.find('\n', position)
+            position = len(sql) if end == -1 else end
+            continue
+        dollar = DOLLAR_QUOTE_RE.match(sql, position)
+        if char in ("'", '"') or dollar:
+            quote = dollar.group(0) if dollar else char
+            end = sql.find(quote, position + len(quote))
+            end = len(sql) if end == -1 else end + len(quote)
+            current.append(sql[position:end])
+            position = end
+            continue
+        if char == ';':
+            statements.append(''.join(current).strip())
+            current = []
+        else:
+            current.append(char)
+        position += 1
+    statements.append(''.join(current).strip())
+    return [statement for statement in statements if statement]
+
+
+def dependency_order(files: dict[str, Path], schema: dict[str, Table]) -> list[str]:
+    """Names of `files` ordered so each table is created after the tables it references
+
+    The order of `files` is kept wherever the references allow it.
+    """
+    creators = {table.name: table.source for table in schema.values()}
+    needs = {name: set() for name in files}
+    for table in schema.values():
+        for name, path in files.items():
+            if path == table.source:
+                needs[name] |= {creators[ref] for ref in table.references() if creators[ref] != path}
+
+    ordered, created = [], set()
+    remaining = list(files)
+    while remaining:
+        # First file whose referenced tables exist; on a reference cycle, the next file as listed
+        name = next((name for name in remaining if needs[name] <= created), remaining[0])
+        ordered.append(name)
+        created.add(files[name])
+        remaining.remove(name)
+    return ordered
+
+
+def read_applied(conn) -> dict[str, str]:
+    """{file_path: checksum} of the applied files ({} on a database never migrated)"""
+    try:
+        with conn.transaction(), conn.cursor() as cur:
+            cur.execute(f'SELECT file_path, checksum FROM {MIGRATIONS_TABLE}')
+            return dict(cur.fetchall())
+    except postgres_copy.psycopg.errors.UndefinedTable:
+        return {}
+
+
+def read_catalog(cur) -> LiveSchema:
+    live = LiveSchema()
+    cur.execute("""
+        SELECT c.relname, a.attname, format_type(a.atttypid, a.atttypmod), a.attnotnull, a.atthasdef
+        FROM pg_attribute a JOIN pg_class c ON c.oid = a.attrelid
+        WHERE c.relnamespace = 'public'::regnamespace AND c.relkind IN ('r', 'p')
+          AND a.attnum > 0 AND NOT a.attisdropped
+    """)
+    for table, column, column_type, not_null, has_default in cur.fetchall():
+        live.columns.setdefault(table, {})[column] = (column_type, not_null, has_default)
+
+    cur.execute("""
+        SELECT c.relname, con.conname
+        FROM pg_constraint con JOIN pg_class c ON c.oid = con.conrelid
+        WHERE c.relnamespace = 'public'::regnamespace
+    """)
+    for table, constraint in cur.fetchall():
+        live.constraints.setdefault(table, set()).add(constraint)
+
+    cur.execute("SELECT indexname FROM pg_indexes WHERE schemaname = 'public'")
+    live.indexes = {index for index, in cur.fetchall()}
+    return live
+
+
+def alter_table(table: Table, live: LiveSchema) -> list[str]:
+    """ALTER TABLE statements bringing the live table in line with its DDL"""
+    statements = []
+    target = f'public.{table.name}'
+    live_columns = live.columns[table.name]
+
+    for name, column in table.columns.items():
+        if name not in live_columns:
+            statements.append(f'ALTER TABLE {target} ADD COLUMN {column.definition}')
+            continue
+        live_type, live_not_null, live_default = live_columns[name]
+        if pg_type(column.type) != live_type:
+            new_type = 'INTEGER' if column.type == 'SERIAL' else column.type
+            statements.append(f'ALTER TABLE {target} ALTER COLUMN {name} TYPE {new_type} USING {name}::{new_type}')
+        not_null = column.not_null or name in table.primary_key
+        if not_null != live_not_null:
+            statements.append(f"ALTER TABLE {target} ALTER COLUMN {name} {'SET' if not_null else 'DROP'} NOT NULL")
+        # SERIAL owns its default (nextval); other defaults are compared by presence only
+        if column.type != 'SERIAL' and (column.default is not None) != live_default:
+            action = f'SET DEFAULT {column.default}' if column.default is not None else 'DROP DEFAULT'
+            statements.append(f'ALTER TABLE {target} ALTER COLUMN {name} {action}')
+
+    for name in live_columns.keys() - table.columns.keys():
+        logger.warning(f"  ⚠ {table.name}.{name}: not in the DDL any more, kept (drop it by hand)")
+
+    live_constraints = live.constraints.get(table.name, set())
+    for name, clause in table.constraints.items():
+        if name.lower() not in live_constraints:
+            statements.append(f'ALTER TABLE {target} ADD {clause}')
+
+    return statements
+
+
+def plan_file(path: Path, schema: dict[str, Table], live: LiveSchema) -> list[str]:
+    """Statements applying one DDL file to the live schema (see the module docstring)"""
+    statements = []
+    for statement in split_statements(path.read_text(encoding='utf-8')):
+        if match := CREATE_TABLE_RE.match(statement):
+            table = schema[match.group(1)]
+            if table.name in live.columns:
+                statements += alter_table(table, live)
+            else:
+                statements.append(statement)
+            live.add_table(table)
+        elif match := CREATE_INDEX_RE.match(statement):
+            index = match.group(2).lower()
+            if index not in live.indexes:
+                statements.append(statement)
+                live.indexes.add(index)
+        else:
+            statements.append(statement)
+    return statements
+
+
+def migrate(db_url: str, dry_run: bool = False, tables_dir: Path = TABLES_DIR) -> int:
+    """Apply the new or changed DDL files of `tables_dir`, in one transaction
+
+    Returns the number of files applied (planned, with `dry_run`).
+    """
+    files = {path.relative_to(tables_dir).as_posix(): path for path in sorted(tables_dir.rglob('*.sql'))}
+    checksums = {name: file_checksum(path) for name, path in files.items()}
+
+    with postgres_copy.connect(db_url) as conn:
+        applied = read_applied(conn)
+        pending = [name for name in files if applied.get(name) != checksums[name]]
+        if not pending:
+            logger.success(f"✓ Schema up to date ({len(files)} DDL files)")
+            return 0
+
+        logger.info(f"{len(pending)}/{len(files)} DDL files new or changed{' (dry run)' if dry_run else ''}")
+        schema = load_schema(tables_dir)
+        pending = [name for name in dependency_order(files, schema) if name in pending]
+        with conn.transaction(), conn.cursor() as cur:
+            live = read_catalog(cur)
+            records = []
+            for name in pending:
+                statements = plan_file(files[name], schema, live)
+                state = 'changed' if name in applied else 'new'
+                if statements:
+                    logger.info(f"  → {name} ({state}): {len(statements)} statements")
+                else:
+                    logger.info(f"  = {name} ({state}): matches the database")
+                for statement in statements:
+                    logger.info(f"      {' '.join(statement.split())[:120]}")
+                if statements and not dry_run:
+                    # One round trip per file: the error, if any, names its file
+                    try:
+                        cur.execute(';\n'.join(statements))
+                    except Exception as e:
+                        raise RuntimeError(f"{name}: {str(e).strip()}") from e
+                records.append((name, checksums[name], len(statements)))
+
+            if not dry_run:
+                cur.executemany(
+                    f'INSERT INTO {MIGRATIONS_TABLE} (file_path, checksum, statements) VALUES (%s, %s, %s) '
+                    'ON CONFLICT (file_path) DO UPDATE SET checksum = EXCLUDED.checksum, '
+                    'statements = EXCLUDED.statements, applied_at = NOW()',
+                    records,
+                )
+    return len(pending)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply the new or changed DDL files of TABLES/ to Supabase')
+    parser.add_argument('--dry-run', action='store_true', help='Print the statements without running them')
+    args = parser.parse_args()
+
+    db_url = os.getenv('SUPABASE_DB_URL')
+    if not db_url:
+        logger.error("Missing SUPABASE_DB_URL in .env (direct Postgres connection)")
+        sys.exit(1)
+
+    logger.info("=" * 80)
+    logger.info("SCHEMA MIGRATION: TABLES/*.sql → Supabase")
+    logger.info("=" * 80)
+    try:
+        count = migrate(db_url, dry_run=args.dry_run)
+    except Exception as e:
+        logger.error(f"✗ Migration rolled back, nothing applied: {str(e)[:500]}")
+        sys.exit(1)
+    if count and not args.dry_run:
+        logger.success(f"✓ {count} DDL files applied")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+"""
+Staging-schema load of the Supabase tables, swapped in atomically
+Used by _06_csv_to_db.py --swap (direct connection, SUPABASE_DB_URL)
+
+Everything happens in one transaction:
+1. each managed table is recreated empty in STAGING_SCHEMA from the live
+   catalog (columns, defaults, CHECK constraints) and filled with COPY;
+   tables without a gold file this run are copied from the live table
+2. primary keys, unique constraints and indexes are built on the loaded
+   data, then the foreign keys: adding them validates every row
+3. row counts are checked against the gold files
+4. live tables move to RETIRED_SCHEMA and staging tables to public
+   (ALTER TABLE ... SET SCHEMA); grants, row level security policies, SERIAL
+   sequences and the foreign keys of other tables follow the new tables,
+   views reading them are re-created on the new tables (CREATE OR REPLACE)
+5. the retired tables are dropped, without CASCADE, and PostgREST reloads
+   its schema cache
+
+Readers see the previous tables until the commit, and a failure anywhere
+rolls the whole transaction back: live data is never touched. Anything
+else still depending on a retired table (materialized view, function on
+its row type...) fails the drop and so aborts the swap. Triggers on the
+managed tables are not carried over.
+"""
+import re
+from loguru import logger
+from ddl_schema import Table
+from sinks import GoldTable, ThreadedSink
+from load_metrics import LoadMetrics
+from load_state import RowHashState
+import postgres_copy
+from postgres_copy import sql
+
+STAGING_SCHEMA = 'wndmngr_staging'
+RETIRED_SCHEMA = 'wndmngr_retired'
+
+# How long the swap may wait for the live tables' locks before giving up
+SWAP_LOCK_TIMEOUT = '30s'
+
+
+def _live(name: str):
+    return sql.Identifier('public', name)
+
+
+def _staging(name: str):
+    return sql.Identifier(STAGING_SCHEMA, name)
+
+
+class PostgresSwapSink(ThreadedSink):
+    """Supabase over a direct Postgres connection: full reload in a staging schema, then swap"""
+
+    name = 'Supabase (swap)'
+
+    def __init__(self, db_url: str, tables: list[Table], metrics: LoadMetrics | None = None):
+        super().__init__()
+        self.db_url = db_url
+        self.tables = tables
+        self.metrics = metrics
+        self.expected_rows: dict[str, int] = {}
+        self.failed = False
+        self.swapped = False
+        self.conn = None
+        self.cur = None
+
+    def connect(self) -> None:
+        self.conn = postgres_copy.connect(self.db_url)
+        self.cur = self.conn.cursor()
+        # Catalog definitions are read with public as the only schema: names of
+        # public tables come back unqualified and resolve to staging tables first below
+        self.cur.execute('SET LOCAL search_path = public')
+
+        missing = [table.name for table in self.tables
+                   if self.cur.execute('SELECT to_regclass(%s)', (f'public.{table.name}',)).fetchone()[0] is None]
+        if missing:
+            raise RuntimeError(f"Tables missing from the live schema (run the setup first): {', '.join(missing)}")
+
+        self.cur.execute(sql.SQL('DROP SCHEMA IF EXISTS {} CASCADE').format(sql.Identifier(STAGING_SCHEMA)))
+        self.cur.execute(sql.SQL('CREATE SCHEMA {}').format(sql.Identifier(STAGING_SCHEMA)))
+        for table in self.tables:
+            # Keys, indexes and foreign keys are added once the data is in
+            self.cur.execute(sql.SQL(
+                'CREATE TABLE {} (LIKE {} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING IDENTITY '
+                'INCLUDING GENERATED INCLUDING STORAGE INCLUDING COMMENTS)'
+            ).format(_staging(table.name), _live(table.name)))
+        logger.info(f"✓ Staging schema {STAGING_SCHEMA}: {len(self.tables)} tables created")
+
+    def load_table(self, table: GoldTable) -> str:
+        metrics = self.table_metrics(table)
+        try:
+            with self.conn.transaction():  # savepoint: a failed COPY does not abort the other tables
+                postgres_copy.copy_rows(self.cur, _staging(table.name), table.typed, metrics)
+            metrics.finish()
+            self.expected_rows[table.name] = len(table.typed)
+            logger.success(f"  ✓ {table.name}: {len(table.typed)} rows copied to staging ({metrics.rows_per_second:,.0f} rows/s)")
+            return 'success'
+        except Exception as e:
+            self.failed = True
+            logger.error(f"  ✗ Error loading {table.name} to staging: {str(e)[:200]}")
+            return 'failed'
+
+    def _fetch(self, query: str, *params) -> list[tuple]:
+        return self.cur.execute(query, params).fetchall()
+
+    def _build_staging(self) -> None:
+        """Carry over unloaded tables, then keys, indexes and foreign keys, then check counts"""
+        for table in self.tables:
+            if table.name not in self.expected_rows:
+                self.cur.execute(sql.SQL('INSERT INTO {} SELECT * FROM {}').format(_staging(table.name), _live(table.name)))
+                logger.info(f"  → {table.name}: {self.cur.rowcount} rows kept from the live table")
+
+        # Definitions of the live tables (public names unqualified, see connect())
+        constraints, indexes = {}, {}
+        for table in self.tables:
+            constraints[table.name] = self._fetch(
+                "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'x', 'f') ORDER BY contype = 'f', conname",
+                f'public.{table.name}')
+            indexes[table.name] = [definition for (definition,) in self._fetch(
+                "SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i WHERE i.indrelid = %s::regclass AND NOT EXISTS "
+                "(SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid AND c.conrelid = i.indrelid)",
+                f'public.{table.name}')]
+
+        self.cur.execute(sql.SQL('SET LOCAL search_path = {}, public').format(sql.Identifier(STAGING_SCHEMA)))
+        for table in self.tables:
+            for name, kind, definition in constraints[table.name]:
+                if kind != 'f':
+                    self.cur.execute(sql.SQL('ALTER TABLE {} ADD CONSTRAINT {} {}').format(
+                        _staging(table.name), sql.Identifier(name), sql.SQL(definition)))
+            for definition in indexes[table.name]:
+                definition = re.sub(rf' ON (ONLY )?public\.{re.escape(table.name)} ', rf' ON \g<1>{STAGING_SCHEMA}.{table.name} ',
+                                    definition, count=1)
+                self.cur.execute(definition)
+
+        # Every row is checked as each foreign key is added
+        for table in self.tables:
+            for name, kind, definition in constraints[table.name]:
+                if kind == 'f':
+                    try:
+                        self.cur.execute(sql.SQL('ALTER TABLE {} ADD CONSTRAINT {} {}').format(
+                            _staging(table.name), sql.Identifier(name), sql.SQL(definition)))
+                    except Exception as e:
+                        raise RuntimeError(f"{table.name}.{name}: {str(e).splitlines()[0]}") from e
+        self.cur.execute('SET LOCAL search_path = public')
+
+        for table_name, expected in self.expected_rows.items():
+            (count,) = self.cur.execute(sql.SQL('SELECT count(*) FROM {}').format(_staging(table_name))).fetchone()
+            if count != expected:
+                raise RuntimeError(f"{table_name}: {count} rows in staging, {expected} in GOLD")
+        logger.info("✓ Staging validated: foreign keys and row counts")
+
+    def _copy_access(self, table: Table) -> None:
+        """Grants and row level security policies of the live table, onto the staging table"""
+        grants = {}
+        for grantee, privilege in self._fetch(
+                "SELECT CASE WHEN a.grantee = 0 THEN 'PUBLIC' ELSE pg_get_userbyid(a.grantee) END, a.privilege_type "
+                "FROM pg_class c, aclexplode(c.relacl) a WHERE c.oid = %s::regclass", f'public.{table.name}'):
+            grants.setdefault(grantee, []).append(privilege)
+        for grantee, privileges in grants.items():
+            self.cur.execute(sql.SQL('GRANT {} ON {} TO {}').format(
+                sql.SQL(', ').join(map(sql.SQL, privileges)), _staging(table.name),
+                sql.SQL('PUBLIC') if grantee == 'PUBLIC' else sql.Identifier(grantee)))
+
+        (rls, force_rls), = self._fetch("SELECT relrowsecurity, relforcerowsecurity FROM pg_class WHERE oid = %s::regclass",
+                                        f'public.{table.name}')
+        if rls:
+            self.cur.execute(sql.SQL('ALTER TABLE {} ENABLE ROW LEVEL SECURITY').format(_staging(table.name)))
+        if force_rls:
+            self.cur.execute(sql.SQL('ALTER TABLE {} FORCE ROW LEVEL SECURITY').format(_staging(table.name)))
+        for name, permissive, roles, command, using, check in self._fetch(
+                "SELECT policyname, permissive, roles, cmd, qual, with_check FROM pg_policies "
+                "WHERE schemaname = 'public' AND tablename = %s", table.name):
+            statement = sql.SQL('CREATE POLICY {} ON {} AS {} FOR {} TO {}').format(
+                sql.Identifier(name), _staging(table.name), sql.SQL(permissive), sql.SQL(command),
+                sql.SQL(', ').join(sql.SQL(role) if role == 'public' else sql.Identifier(role) for role in roles))
+            if using:
+                statement += sql.SQL(' USING ({})').format(sql.SQL(using))
+            if check:
+                statement += sql.SQL(' WITH CHECK ({})').format(sql.SQL(check))
+            self.cur.execute(statement)
+
+    def _swap(self) -> None:
+        names = [table.name for table in self.tables]
+        oids = [f'public.{name}' for name in names]
+
+        # Foreign keys of other tables point at the live tables by oid: re-created on the new ones
+        outside_keys = self._fetch(
+            "SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE contype = 'f' AND confrelid = ANY(%s::regclass[]) AND NOT conrelid = ANY(%s::regclass[])", oids, oids)
+        # Views read the live tables by oid: re-created on the new tables from their definition, read
+        # now while public names are unqualified (see connect()); the views themselves keep their oid,
+        # grants and dependents
+        views = self._fetch(
+            "SELECT DISTINCT v.oid::regclass::text, pg_get_viewdef(v.oid), v.reloptions FROM pg_depend d "
+            "JOIN pg_rewrite r ON r.oid = d.objid JOIN pg_class v ON v.oid = r.ev_class "
+            "WHERE d.classid = 'pg_rewrite'::regclass AND d.refobjid = ANY(%s::regclass[]) AND v.relkind = 'v'", oids)
+        # SERIAL sequences are owned by the live column: handed over instead of dropped with it
+        sequences = [(name, column, sequence) for name in names for column, sequence in self._fetch(
+            "SELECT attname, pg_get_serial_sequence(%s, attname) FROM pg_attribute "
+            "WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped AND attidentity = ''",
+            f'public.{name}', f'public.{name}')
+            if sequence]
+
+        self.cur.execute(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'")
+        # Only ever holds tables inside this transaction: never left behind
+        self.cur.execute(sql.SQL('DROP SCHEMA IF EXISTS {}').format(sql.Identifier(RETIRED_SCHEMA)))
+        self.cur.execute(sql.SQL('CREATE SCHEMA {}').format(sql.Identifier(RETIRED_SCHEMA)))
+        for table_name, constraint, _ in outside_keys:
+            self.cur.execute(sql.SQL('ALTER TABLE {} DROP CONSTRAINT {}').format(sql.SQL(table_name), sql.Identifier(constraint)))
+        for _, _, sequence in sequences:
+            self.cur.execute(sql.SQL('ALTER SEQUENCE {} OWNED BY NONE').format(sql.SQL(sequence)))
+
+        for name in names:
+            self.cur.execute(sql.SQL('ALTER TABLE {} SET SCHEMA {}').format(_live(name), sql.Identifier(RETIRED_SCHEMA)))
+            self.cur.execute(sql.SQL('ALTER TABLE {} SET SCHEMA public').format(_staging(name)))
+
+        for name, column, sequence in sequences:
+            self.cur.execute(sql.SQL('ALTER SEQUENCE {} OWNED BY {}').format(
+                sql.SQL(sequence), sql.Identifier('public', name, column)))
+            self.cur.execute(sql.SQL('SELECT setval(%s, COALESCE(MAX({}), 0) + 1, false) FROM {}').format(
+                sql.Identifier(column), _live(name)), (sequence,))
+        for table_name, constraint, definition in outside_keys:
+            self.cur.execute(sql.SQL('ALTER TABLE {} ADD CONSTRAINT {} {}').format(
+                sql.SQL(table_name), sql.Identifier(constraint), sql.SQL(definition)))
+
+        for view, definition, options in views:
+            statement = sql.SQL('CREATE OR REPLACE VIEW {}').format(sql.SQL(view))
+            if options:
+                statement += sql.SQL(' WITH ({})').format(sql.SQL(', ').join(map(sql.SQL, options)))
+            self.cur.execute(statement + sql.SQL(' AS ') + sql.SQL(definition.rstrip().rstrip(';')))
+        if views:
+            logger.info(f"  → {len(views)} views re-created on the new tables")
+
+        try:
+            self.cur.execute(sql.SQL('DROP TABLE {}').format(
+                sql.SQL(', ').join(sql.Identifier(RETIRED_SCHEMA, name) for name in names)))
+        except postgres_copy.psycopg.errors.DependentObjectsStillExist as e:
+            raise RuntimeError(f"Objects depend on the replaced tables and would be dropped with them: "
+                               f"{' '.join((e.diag.message_detail or str(e)).split())}") from e
+        self.cur.execute(sql.SQL('DROP SCHEMA {}').format(sql.Identifier(RETIRED_SCHEMA)))
+        self.cur.execute(sql.SQL('DROP SCHEMA {}').format(sql.Identifier(STAGING_SCHEMA)))
+        self.cur.execute("NOTIFY pgrst, 'reload schema'")  # sent on commit
+
+    def disconnect(self) -> None:
+        if not self.conn:
+            return
+        try:
+            if self.failed:
+                self.conn.rollback()
+                logger.error("✗ Swap load failed, live tables left untouched")
+                return
+            self._build_staging()
+            for table in self.tables:
+                self._copy_access(table)
+            self._swap()
+            self.conn.commit()
+            self.swapped = True
+
+            # The REST row hashes no longer describe the remote tables
+            RowHashState.clear_all()
+            logger.success(f"✓ {len(self.tables)} tables swapped in atomically from {STAGING_SCHEMA}")
+
+        except Exception as e:
+            self.conn.rollback()
+            logger.error(f"✗ Swap aborted, live tables left untouched: {str(e)[:300]}")
+        finally:
+            self.conn.close()
+
+    async def close(self, statuses: dict[str, str]) -> None:
+        await super().close(statuses)
+        if not self.swapped:
+            statuses.update({table_name: 'failed' for table_name in statuses})
@@ -0,0 +1,32 @@
+"""
+Shared modules of SCRIPTS/SETUP, for the ETL and TESTS scripts
+Used by sqlserver_sink.py and validate_grid_wtg_to_db.py
+
+The scripts run as files (python SCRIPTS/ETL/...), so SCRIPTS/SETUP is not
+on the import path. Its modules are loaded here from their file, once, under
+their own name: the SETUP scripts and the ETL share the same module (and the
+same connection pools) and sys.path is left alone.
+"""
+import importlib.util
+import sys
+from pathlib import Path
+
+SETUP_DIR = Path(__file__).parent.parent / 'SETUP'
+
+
+def load(name: str):
+    """Module `name` of SCRIPTS/SETUP (the one already imported, if any)"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, SETUP_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+
+db_connection = load('db_connection')
@@ -0,0 +1,221 @@
+"""
+Read-once, fan-out loading of GOLD tables into several targets (sinks)
+Used by _06_csv_to_db.py
+
+Every gold file is decoded once (read_csv, DDL type casts, JSON encoding on
+demand), up front so it can be validated before any load, and the same
+GoldTable is handed to every sink. Sinks run concurrently, each walking the
+FK dependency waves at its own pace: the slowest sink sets the total time.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+import pandas as pd
+from loguru import logger
+from ddl_schema import Table
+from load_state import LoadJournal
+from load_metrics import LoadMetrics, TableMetrics
+
+# Worst status wins when a table goes to several sinks
+STATUS_RANK = {'success': 0, 'warning': 1, 'failed': 2}
+
+INTEGER_TYPES = ('INT', 'INTEGER', 'BIGINT', 'SMALLINT', 'SERIAL')
+
+
+def coerce_to_ddl(df: pd.DataFrame, table: Table) -> pd.DataFrame:
+    """Cast gold columns to the types declared in the DDL
+
+    Integers read back as floats (3.0) because of NaN become Int64, and
+    1.0/0.0 flags of BOOLEAN columns become booleans.
+    """
+    df = df.copy(deep=False)  # columns are replaced, never modified in place
+    for col in df.columns:
+        column = table.columns.get(col)
+        if column is None:
+            continue
+        if column.type == 'BOOLEAN':
+            numeric = df[col].astype('float64')
+            df[col] = (numeric != 0).astype('boolean').mask(numeric.isna())
+        elif column.type in INTEGER_TYPES and pd.api.types.is_float_dtype(df[col]):
+            df[col] = df[col].round().astype('Int64')
+    return df
+
+
+@dataclass
+class GoldTable:
+    """One decoded gold file, shared (read-only) by every sink"""
+    name: str
+    csv_file: str
+    df: pd.DataFrame | None  # None when the file is missing or empty
+    schema: Table | None = None  # parsed DDL of the table, when there is one
+    excluded: pd.DataFrame | None = None  # rows dropped by the pre-validation (gold_constraints.py)
+
+    @cached_property
+    def typed(self) -> pd.DataFrame:
+        """The DDL columns only, cast to their declared types (see coerce_to_ddl)"""
+        if self.schema is None:
+            return self.df
+        return coerce_to_ddl(self.df[[col for col in self.df.columns if col in self.schema.columns]], self.schema)
+
+    @cached_property
+    def json_rows(self) -> list[bytes]:
+        """One JSON object per row, encoded by pandas' C encoder from the typed frame
+
+        NaN/Inf/NA become null, booleans true/false, Int64 plain integers.
+        Newlines inside strings are escaped, so lines split one row each.
+        """
+        text = self.typed.to_json(orient='records', lines=True, double_precision=15, force_ascii=False)
+        rows = text.encode('utf-8').split(b'\n')
+        return rows[:-1] if rows and not rows[-1] else rows
+
+
+def read_gold(gold_dir: Path, table_name: str, csv_file: str, schema: Table | None = None) -> GoldTable:
+    csv_path = gold_dir / csv_file
+
+    if not csv_path.exists():
+        logger.warning(f"  ⊘ {table_name}: File not found ({csv_file}), skipping")
+        return GoldTable(table_name, csv_file, None, schema)
+
+    df = pd.read_csv(csv_path)
+    if df.empty:
+        logger.warning(f"  ⊘ {table_name}: Empty file, skipping")
+        return GoldTable(table_name, csv_file, None, schema)
+
+    return GoldTable(table_name, csv_file, df, schema)
+
+
+def read_all_gold(waves: list, gold_dir: Path, schema: dict[str, Table]) -> list[GoldTable]:
+    """Decode every gold file of the waves in parallel threads, in wave order"""
+    files = [(table_name, csv_file) for wave in waves for table_name, csv_file in wave]
+    with ThreadPoolExecutor(max_workers=8, thread_name_prefix='read_gold') as executor:
+        return list(executor.map(lambda item: read_gold(gold_dir, *item, schema.get(item[0])), files))
+
+
+class Sink:
+    """A load target
+
+    load_wave() receives the tables of one dependency wave and returns
+    {table_name: 'success' | 'warning' | 'failed'}. close() may downgrade
+    those statuses (e.g. a clean-up pass that failed).
+
+    A resumable sink records its completed tables in the LoadJournal; on a
+    resumed run fan_out() does not hand them to it again.
+    Throughput goes to the run's LoadMetrics, when it has one.
+    """
+
+    name = 'sink'
+    resumable = False
+    metrics: LoadMetrics | None = None
+
+    def table_metrics(self, table: GoldTable) -> TableMetrics:
+        """Start the metrics of one table on this sink"""
+        metrics = self.metrics.table(self.name, table.name) if self.metrics else TableMetrics(self.name, table.name)
+        metrics.rows_in_gold = len(table.df)
+        return metrics
+
+    async def open(self) -> None:
+        pass
+
+    async def load_wave(self, tables: list[GoldTable]) -> dict[str, str]:
+        raise NotImplementedError
+
+    async def close(self, statuses: dict[str, str]) -> None:
+        pass
+
+
+class ThreadedSink(Sink):
+    """A sink with a blocking driver (sqlite3, psycopg, pyodbc)
+
+    connect(), load_table() and disconnect() all run in one dedicated thread,
+    so the connection never crosses threads and never blocks the event loop.
+    disconnect() also runs after a failed connect() or an aborted load, with
+    `failed` set: it must then only release what was opened.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.name)
+        self.failed = False
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    def connect(self) -> None:
+        pass
+
+    def load_table(self, table: GoldTable) -> str:
+        raise NotImplementedError
+
+    def disconnect(self) -> None:
+        pass
+
+    async def open(self) -> None:
+        await self._run(self.connect)
+
+    async def load_wave(self, tables: list[GoldTable]) -> dict[str, str]:
+        return {table.name: await self._run(self.load_table, table) for table in tables}
+
+    async def close(self, statuses: dict[str, str]) -> None:
+        if 'failed' in statuses.values():
+            self.failed = True
+        try:
+            await self._run(self.disconnect)
+        finally:
+            self._executor.shutdown(wait=False)
+
+
+async def fan_out(waves: list, sinks: list[Sink], decoded: dict[str, GoldTable],
+                  journal: LoadJournal | None = None) -> dict[str, dict[str, str]]:
+    """Load the decoded gold tables into all sinks concurrently
+
+    Args:
+        waves: FK dependency waves of (table_name, csv_file)
+        decoded: {table_name: GoldTable} (read_all_gold(), then validated)
+        journal: checkpoint journal; tables it marks done are skipped by resumable sinks
+    Returns: {sink.name: {table_name: status}}
+    """
+    statuses = {sink.name: {} for sink in sinks}
+
+    async def close_sink(sink: Sink, sink_statuses: dict[str, str]):
+        # A failing close() must not cancel the other sinks nor skip the run summary
+        try:
+            await sink.close(sink_statuses)
+        except Exception as e:
+            logger.error(f"✗ {sink.name}: close failed ({str(e)[:200]})")
+            sink_statuses.update({table_name: 'failed' for table_name in decoded})
+
+    async def run_sink(sink: Sink):
+        sink_statuses = statuses[sink.name]
+        try:
+            await sink.open()
+        except Exception as e:
+            logger.error(f"✗ {sink.name}: could not open ({str(e)[:200]})")
+            sink_statuses.update({table_name: 'failed' for table_name in decoded})
+            await close_sink(sink, sink_statuses)  # executor, half-opened connection
+            return
+
+        try:
+            for wave in waves:
+                tables = [decoded[table_name] for table_name, _ in wave]
+                sink_statuses.update({table.name: 'warning' for table in tables if table.df is None})
+                loadable = [table for table in tables if table.df is not None]
+                if journal is not None and sink.resumable:
+                    for table in [table for table in loadable if journal.table_done(sink.name, table.name)]:
+                        logger.info(f"  ⟳ {table.name}: already loaded to {sink.name} (checkpoint)")
+                        sink_statuses[table.name] = 'success'
+                        loadable.remove(table)
+                if loadable:
+                    sink_statuses.update(await sink.load_wave(loadable))
+        except Exception as e:
+            logger.error(f"✗ {sink.name}: load aborted ({str(e)[:200]})")
+            sink_statuses.update({table_name: 'failed' for table_name in decoded if table_name not in sink_statuses})
+        finally:
+            await close_sink(sink, sink_statuses)
+
+    results = await asyncio.gather(*(run_sink(sink) for sink in sinks), return_exceptions=True)
+    for sink, result in zip(sinks, results):
+        if isinstance(result, BaseException):
+            logger.error(f"✗ {sink.name}: {type(result).__name__} ({str(result)[:200]})")
+            statuses[sink.name].update({table_name: 'failed' for table_name in decoded})
+    return statuses
@@ -0,0 +1,405 @@
+"""
+SQLite sink for the local WNDMNGR.APP database
+Used by _06_csv_to_db.py
+
+Tables are created from the DDL in TABLES/ translated to SQLite (types,
+NOT NULL, primary and foreign keys), filled with executemany in a single
+transaction under load-time pragmas, then indexed and analysed.
+
+The database is built in a separate file next to the live one, compacted
+with VACUUM INTO and renamed over the live path in one atomic step: the app
+never reads a half-loaded database. The live file is first taken out of WAL
+mode (it must not be open elsewhere) and copied to .bak with the backup API;
+the new file takes the journal mode the app left the live one in. Connections
+opened before the swap keep the previous file and must reopen; on Windows
+they must be closed, the rename is refused while the file is open.
+"""
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+import pandas as pd
+from loguru import logger
+from ddl_schema import Table
+from sinks import GoldTable, ThreadedSink, INTEGER_TYPES
+from load_metrics import LoadMetrics
+
+# Build-time pragmas: nobody reads the build file and it is thrown away if
+# anything goes wrong, so durability is traded for speed (the in-memory
+# journal still allows rolling back a failed table)
+LOAD_PRAGMAS = [
+    'PRAGMA journal_mode = MEMORY',
+    'PRAGMA synchronous = OFF',
+    'PRAGMA cache_size = -262144',  # 256 MiB
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA foreign_keys = OFF',
+]
+
+# Postgres defaults that have a SQLite equivalent (others are dropped)
+UUID4_SQL = (
+    "(lower(hex(randomblob(4))) || '-' || lower(hex(randomblob(2))) || '-4' || substr(lower(hex(randomblob(2))), 2) "
+    "|| '-' || substr('89ab', 1 + (abs(random()) % 4), 1) || substr(lower(hex(randomblob(2))), 2) "
+    "|| '-' || lower(hex(randomblob(6))))"
+)
+SQLITE_DEFAULTS = {
+    'GEN_RANDOM_UUID()': UUID4_SQL,
+    'NOW()': 'CURRENT_TIMESTAMP',
+}
+
+
+def sqlite_type(ddl_type: str) -> str:
+    """Map a DDL type to its SQLite storage class"""
+    base = ddl_type.split('(')[0]
+    if base in INTEGER_TYPES or base == 'BOOLEAN':
+        return 'INTEGER'
+    if base in ('DECIMAL', 'NUMERIC', 'FLOAT', 'REAL', 'DOUBLE'):
+        return 'REAL'
+    return 'TEXT'  # VARCHAR, TEXT, DATE, TIMESTAMP, UUID
+
+
+def sqlite_default(default: str | None) -> str | None:
+    if default is None:
+        return None
+    if default.upper() in SQLITE_DEFAULTS:
+        return SQLITE_DEFAULTS[default.upper()]
+    if default.startswith("'") or default.replace('.', '', 1).lstrip('-').isdigit():
+        return default
+    return None
+
+
+def create_table_sql(table: Table) -> str:
+    """CREATE TABLE statement for SQLite (CHECK constraints are not carried over)"""
+    lines = []
+    single_serial_key = (len(table.primary_key) == 1
+                         and table.columns[table.primary_key[0]].type == 'SERIAL')
+
+    for column in table.columns.values():
+        if single_serial_key and column.name == table.primary_key[0]:
+            lines.append(f'"{column.name}" INTEGER PRIMARY KEY')
+            continue
+        line = f'"{column.name}" {sqlite_type(column.type)}'
+        if column.not_null:
+            line += ' NOT NULL'
+        if column.unique:
+            line += ' UNIQUE'
+        default = sqlite_default(column.default)
+        if default:
+            line += f' DEFAULT {default}'
+        lines.append(line)
+
+    if table.primary_key and not single_serial_key:
+        lines.append(f"PRIMARY KEY ({', '.join(table.primary_key)})")
+    for fk in table.foreign_keys:
+        lines.append(f"FOREIGN KEY ({', '.join(fk.columns)}) REFERENCES {fk.ref_table} ({', '.join(fk.ref_columns)})")
+
+    return f'CREATE TABLE "{table.name}" (\n    ' + ',\n    '.join(lines) + '\n)'
+
+
+def create_index_sql(table: Table) -> list[str]:
+    """Indexes declared in the DDL, plus one per foreign key not covered by the primary key"""
+    statements = [
+        f"CREATE {'UNIQUE ' if index.unique else ''}INDEX IF NOT EXISTS {index.name} ON {table.name} ({', '.join(index.columns)})"
+        for index in table.indexes
+    ]
+    for fk in table.foreign_keys:
+        if table.primary_key[:len(fk.columns)] == fk.columns:
+            continue
+        statements.append(f"CREATE INDEX IF NOT EXISTS ix_{table.name}_{'_'.join(fk.columns)} ON {table.name} ({', '.join(fk.columns)})")
+    return statements
+
+
+def sqlite_rows(df: pd.DataFrame) -> list[tuple]:
+    """Rows as plain Python values (None for NULL, 0/1 for booleans)"""
+    df = df.copy()
+    for col in df.columns:
+        if pd.api.types.is_bool_dtype(df[col]) or str(df[col].dtype) == 'boolean':
+            df[col] = df[col].astype('Int64')
+    values = df.astype(object).where(df.notna(), None)
+    return list(values.itertuples(index=False, name=None))
+
+
+# Seconds to wait for app connections to release the live database
+BUSY_TIMEOUT = 30
+# Renames onto the live path, 1 s, 2 s, ... apart, while Windows reports it open
+REPLACE_ATTEMPTS = 5
+
+
+@contextmanager
+def _live_file_released(db_path: Path):
+    """Take the live database out of WAL mode and hold off its writers while it is backed up
+
+    Leaving WAL checkpoints the -wal into the file and deletes it with the
+    -shm, so no stale WAL can be applied to the file taking the path. SQLite
+    refuses to leave WAL while another connection has the database open: a
+    database in use fails the swap instead of being corrupted. The RESERVED
+    lock (BEGIN IMMEDIATE) keeps writers out, readers may still read (the
+    backup is one of them). Yields the journal mode the app left the file
+    in; the lock connection is closed on exit, before any rename.
+    """
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT, isolation_level=None)
+    try:
+        live_mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+        mode = conn.execute('PRAGMA journal_mode = DELETE').fetchone()[0]
+        if mode.lower() != 'delete':
+            raise sqlite3.OperationalError(f'{db_path.name} is in use, still in {mode} mode')
+        conn.execute('BEGIN IMMEDIATE')
+        for suffix in ('-wal', '-shm'):
+            db_path.with_name(db_path.name + suffix).unlink(missing_ok=True)
+        yield live_mode
+    finally:
+        conn.close()  # releases the lock, nothing was written
+
+
+def _set_journal_mode(path: Path, mode: str = 'DELETE') -> None:
+    """Persist the journal mode in the file header (WAL sidecars are removed when the connection closes)"""
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute(f'PRAGMA journal_mode = {mode}')
+    finally:
+        conn.close()
+
+
+def _file_stamp(path: Path) -> tuple[int, int]:
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _replace_live(source: Path, db_path: Path, stamp: tuple[int, int]) -> None:
+    """Rename `source` over the live database, unless it was written since `stamp`
+
+    On Windows a file another process holds open cannot be renamed over
+    (SQLite opens without FILE_SHARE_DELETE) and os.replace raises
+    PermissionError: the rename is retried for a few seconds, then the swap
+    is aborted with the live file left in place.
+    """
+    for attempt in range(1, REPLACE_ATTEMPTS + 1):
+        if _file_stamp(db_path) != stamp:
+            raise sqlite3.OperationalError(f'{db_path.name} was written during the swap, not replaced')
+        try:
+            os.replace(source, db_path)
+            return
+        except PermissionError as e:
+            if attempt == REPLACE_ATTEMPTS:
+                raise PermissionError(f'{db_path.name} is held open by another process, not replaced') from e
+            logger.warning(f"  → {db_path.name} is held open, retrying the swap in {attempt} s")
+            time.sleep(attempt)
+
+
+def backup_live(db_path: Path, backup_path: Path) -> Path:
+    """Consistent copy of the live database through the SQLite backup API (never a second link to it)
+
+    The copy is left as .partial next to `backup_path` and only promoted by
+    the caller once the swap went through: an aborted swap keeps the
+    previous backup.
+    """
+    partial_path = backup_path.with_name(backup_path.name + '.partial')
+    partial_path.unlink(missing_ok=True)
+    source = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT)
+    target = sqlite3.connect(partial_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    _set_journal_mode(partial_path)
+    return partial_path
+
+
+def _swap(db_path: Path, source: Path, backup_path: Path | None) -> None:
+    """Replace the live database by `source` in the journal mode the app left it in
+
+    The live file spends the swap in rollback journal mode. The replacing
+    file is given the app's mode (WAL stays WAL) before the rename, and if
+    the swap is aborted the live file is put back in it.
+    """
+    partial_path = None
+    try:
+        with _live_file_released(db_path) as live_mode:
+            if backup_path:
+                partial_path = backup_live(db_path, backup_path)
+            stamp = _file_stamp(db_path)
+        try:
+            _set_journal_mode(source, live_mode)
+            _replace_live(source, db_path, stamp)
+        except Exception:
+            _set_journal_mode(db_path, live_mode)
+            raise
+        if partial_path:
+            os.replace(partial_path, backup_path)
+    finally:
+        if partial_path:
+            partial_path.unlink(missing_ok=True)
+
+
+def swap_in(db_path: Path, new_path: Path) -> Path | None:
+    """Replace the live database by `new_path`, keeping a backup of the previous one as .bak
+
+    Connections opened on the previous file keep reading it: the app must
+    reopen its connection to see the new data. On Windows no connection may
+    stay open at all, the rename is refused until it is closed (see
+    _replace_live). Returns the backup path, or None if there was no live
+    database.
+    """
+    backup_path = db_path.with_name(db_path.name + '.bak')
+
+    if not db_path.exists():
+        os.replace(new_path, db_path)
+        return None
+
+    _swap(db_path, new_path, backup_path)
+    return backup_path
+
+
+def restore_previous(db_path: Path) -> bool:
+    """Put the .bak database back in place (rollback of the last load)"""
+    backup_path = db_path.with_name(db_path.name + '.bak')
+    if not backup_path.exists():
+        return False
+    if not db_path.exists():
+        os.replace(backup_path, db_path)
+        return True
+    _swap(db_path, backup_path, None)
+    return True
+
+
+class SQLiteSink(ThreadedSink):
+    """Local SQLite database of WNDMNGR.APP, rebuilt from the DDL and swapped in
+
+    Tables without a gold file this run, and tables the load does not own,
+    are carried over from the live database. If any table fails, the live
+    database is left untouched.
+    """
+
+    name = 'SQLite'
+
+    def __init__(self, db_path: Path, tables: list[Table], metrics: LoadMetrics | None = None):
+        super().__init__()
+        self.metrics = metrics
+        self.db_path = db_path
+        self.build_path = db_path.with_name(db_path.name + '.build')
+        self.new_path = db_path.with_name(db_path.name + '.new')
+        self.tables = tables
+        self.loaded: set[str] = set()
+        self.failed = False
+        self.swapped = False
+        self.conn = None
+
+    def connect(self) -> None:
+        for path in (self.build_path, self.new_path):
+            path.unlink(missing_ok=True)
+
+        self.conn = sqlite3.connect(self.build_path, isolation_level=None, uri=True)
+        for pragma in LOAD_PRAGMAS:
+            self.conn.execute(pragma)
+        self.conn.execute('BEGIN')
+        for table in self.tables:
+            self.conn.execute(create_table_sql(table))
+        logger.info(f"✓ Building SQLite: {self.build_path}")
+
+    def load_table(self, table: GoldTable) -> str:
+        if table.schema is None or table.name not in {t.name for t in self.tables}:
+            logger.error(f"  ✗ {table.name}: no DDL in TABLES/, not loaded to SQLite")
+            self.failed = True
+            return 'failed'
+
+        metrics = self.table_metrics(table)
+        self.conn.execute(f'SAVEPOINT "{table.name}"')
+        try:
+            df = table.typed
+            columns = ', '.join(f'"{col}"' for col in df.columns)
+            placeholders = ', '.join('?' for _ in df.columns)
+            started = time.perf_counter()
+            self.conn.executemany(f'INSERT INTO "{table.name}" ({columns}) VALUES ({placeholders})', sqlite_rows(df))
+            self.conn.execute(f'RELEASE "{table.name}"')
+            metrics.record_batch(time.perf_counter() - started, len(df), 0)
+            metrics.finish()
+
+            self.loaded.add(table.name)
+            logger.success(f"  ✓ {table.name}: {len(df)} rows loaded to SQLite")
+            return 'success'
+
+        except Exception as e:
+            self.conn.execute(f'ROLLBACK TO "{table.name}"')
+            self.conn.execute(f'RELEASE "{table.name}"')
+            self.failed = True
+            logger.error(f"  ✗ Error loading {table.name} to SQLite: {str(e)[:200]}")
+            return 'failed'
+
+    def _carry_over_live_tables(self) -> None:
+        """Copy from the live database what this load does not provide"""
+        if not self.db_path.exists():
+            return
+
+        # ATTACH/DETACH cannot run inside a transaction
+        self.conn.execute('COMMIT')
+        self.conn.execute('ATTACH DATABASE ? AS live', (f'file:{self.db_path.as_posix()}?mode=ro',))
+        self.conn.execute('BEGIN')
+        try:
+            owned = {table.name for table in self.tables}
+            live_tables = self.conn.execute(
+                "SELECT name, sql FROM live.sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+            ).fetchall()
+
+            for name, create_sql in live_tables:
+                if name in self.loaded:
+                    continue
+                if name not in owned:
+                    self.conn.execute(create_sql)  # table owned by the app, copied as is
+                live_columns = {row[1] for row in self.conn.execute(f'PRAGMA live.table_info("{name}")')}
+                main_columns = [row[1] for row in self.conn.execute(f'PRAGMA main.table_info("{name}")')]
+                columns = ', '.join(f'"{col}"' for col in main_columns if col in live_columns)
+                self.conn.execute(f'INSERT INTO main."{name}" ({columns}) SELECT {columns} FROM live."{name}"')
+                logger.info(f"  → {name}: kept from the live database")
+
+            for (create_sql,) in self.conn.execute(
+                "SELECT sql FROM live.sqlite_master WHERE type = 'index' AND sql IS NOT NULL AND tbl_name NOT IN "
+                f"({', '.join('?' for _ in owned)})", sorted(owned)
+            ).fetchall():
+                self.conn.execute(create_sql)
+        finally:
+            self.conn.execute('COMMIT')
+            self.conn.execute('DETACH DATABASE live')
+            self.conn.execute('BEGIN')
+
+    def disconnect(self) -> None:
+        if not self.conn:
+            return
+        try:
+            if self.failed:
+                self.conn.execute('ROLLBACK')
+                logger.error(f"✗ SQLite: load failed, live database left untouched ({self.db_path})")
+                return
+
+            self._carry_over_live_tables()
+            for table in self.tables:
+                for statement in create_index_sql(table):
+                    self.conn.execute(statement)
+            self.conn.execute('ANALYZE')
+            self.conn.execute('COMMIT')
+
+            # Compact copy of the build, in rollback journal mode: no -wal to carry over the rename
+            self.conn.execute('VACUUM INTO ?', (str(self.new_path),))
+            self.conn.close()
+            self.conn = None
+            _set_journal_mode(self.new_path)
+
+            backup_path = swap_in(self.db_path, self.new_path)
+            self.swapped = True
+            logger.info(f"✓ SQLite: {len(self.loaded)} tables loaded and swapped in, app connections must reopen"
+                        + (f" (previous: {backup_path.name})" if backup_path else ""))
+
+        except Exception as e:
+            if self.conn and self.conn.in_transaction:
+                self.conn.execute('ROLLBACK')
+            logger.error(f"✗ SQLite: swap aborted, live database left untouched: {str(e)[:300]}")
+        finally:
+            if self.conn:
+                self.conn.close()
+            self.build_path.unlink(missing_ok=True)
+            self.new_path.unlink(missing_ok=True)
+
+    async def close(self, statuses: dict[str, str]) -> None:
+        await super().close(statuses)
+        if not self.swapped:
+            statuses.update({table_name: 'failed' for table_name in statuses})
@@ -0,0 +1,149 @@
+"""
+SQL Server sink: bulk insert into a #temp staging table, then one MERGE per table
+Used by _06_csv_to_db.py --sqlserver (the database of SCRIPTS/SETUP, same .env settings)
+
+Each table is sent with pyodbc fast_executemany (parameter arrays, one round
+trip per chunk) into #staging created from the target itself (SELECT TOP 0
+... INTO: same types and collations), then merged on the primary key in one
+MERGE statement, in one transaction per table. Tables of a dependency wave
+are independent: they are loaded in parallel, each on a connection taken
+from the shared SQL Server pool of SCRIPTS/SETUP/db_connection.py.
+
+Requires pyodbc and the ODBC Driver 17 for SQL Server
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from loguru import logger
+from ddl_schema import Table
+from load_state import LoadJournal
+from load_metrics import LoadMetrics
+from sinks import GoldTable, Sink
+from setup_modules import db_connection
+
+# Connections (tables loaded at once within a wave)
+MAX_CONNECTIONS = int(os.getenv('SQLSERVER_MAX_CONNECTIONS', '4'))
+
+# Rows per fast_executemany call (one parameter array on the wire)
+EXECUTEMANY_ROWS = 10_000
+
+
+def quote(name: str) -> str:
+    return f"[{name.replace(']', ']]')}]"
+
+
+def merge_statement(table: Table, staging: str, columns: list[str]) -> str:
+    """MERGE of the staging table into `table` on its primary key (plain INSERT without one in the file)"""
+    column_list = ', '.join(map(quote, columns))
+    if not table.primary_key or not set(table.primary_key) <= set(columns):
+        return f'INSERT INTO {quote(table.name)} ({column_list}) SELECT {column_list} FROM {staging}'
+
+    on = ' AND '.join(f'target.{quote(col)} = source.{quote(col)}' for col in table.primary_key)
+    updates = [col for col in columns if col not in table.primary_key]
+    statement = f'MERGE INTO {quote(table.name)} WITH (HOLDLOCK) AS target USING {staging} AS source ON {on}'
+    if updates:
+        statement += ' WHEN MATCHED THEN UPDATE SET ' + ', '.join(
+            f'target.{quote(col)} = source.{quote(col)}' for col in updates)
+    statement += (f' WHEN NOT MATCHED BY TARGET THEN INSERT ({column_list}) VALUES ('
+                  + ', '.join(f'source.{quote(col)}' for col in columns) + ');')
+    return statement
+
+
+def sqlserver_rows(df: pd.DataFrame) -> list[tuple]:
+    """Rows as plain Python values (None for NULL, bool for BOOLEAN → BIT)"""
+    values = df.astype(object).where(df.notna(), None)
+    return list(values.itertuples(index=False, name=None))
+
+
+def merge_table(conn, table: Table, df: pd.DataFrame, metrics=None) -> int:
+    """fast_executemany `df` into a #temp copy of `table`, then merge it, in one transaction
+
+    `conn` is a pooled db_connection connection, `df` holds only DDL columns,
+    already cast to their types (GoldTable.typed).
+    Each executemany chunk is recorded as a batch in `metrics`.
+    Returns the number of rows inserted or updated.
+    """
+    columns = list(df.columns)
+    staging = quote(f'#staging_{table.name}')
+    column_list = ', '.join(map(quote, columns))
+    cur = conn.cursor()
+    cur.fast_executemany = True
+    try:
+        cur.execute(f"IF OBJECT_ID('tempdb..#staging_{table.name}') IS NOT NULL DROP TABLE {staging}")
+        cur.execute(f'SELECT TOP 0 {column_list} INTO {staging} FROM {quote(table.name)}')
+
+        insert = f"INSERT INTO {staging} ({column_list}) VALUES ({', '.join('?' for _ in columns)})"
+        rows = sqlserver_rows(df)
+        for start in range(0, len(rows), EXECUTEMANY_ROWS):
+            started = time.perf_counter()
+            chunk = rows[start:start + EXECUTEMANY_ROWS]
+            cur.executemany(insert, chunk)
+            if metrics is not None:
+                metrics.record_batch(time.perf_counter() - started, len(chunk), 0)
+
+        cur.execute(merge_statement(table, staging, columns))
+        merged = cur.rowcount
+        cur.execute(f'DROP TABLE {staging}')
+        conn.commit()
+        return merged
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+class SQLServerSink(Sink):
+    """SQL Server: fast_executemany + MERGE, the tables of a wave on parallel pooled connections"""
+
+    name = 'SQL Server'
+    resumable = True
+
+    def __init__(self, schema: dict[str, Table], journal: LoadJournal | None = None,
+                 metrics: LoadMetrics | None = None, max_connections: int = MAX_CONNECTIONS,
+                 database: str | None = None):
+        self.schema = schema
+        self.journal = journal
+        self.metrics = metrics
+        self.database = database  # DATABASE_NAME from .env by default
+        self._executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix='sqlserver')
+
+    def _check_connection(self) -> None:
+        with db_connection.connection('sqlserver', self.database):
+            pass
+
+    async def open(self) -> None:
+        # One connection up front: an unreachable server fails the sink before any table
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._check_connection)
+
+    def load_table(self, table: GoldTable) -> str:
+        if table.schema is None:
+            logger.error(f"  ✗ {table.name}: no DDL in TABLES/, not loaded to SQL Server")
+            return 'failed'
+
+        metrics = self.table_metrics(table)
+        try:
+            with db_connection.connection('sqlserver', self.database) as conn:
+                row_count = merge_table(conn, table.schema, table.typed, metrics)
+            metrics.finish()
+            if self.journal is not None:
+                self.journal.record_table(self.name, table.name)
+            logger.success(f"  ✓ {table.name}: {row_count} rows merged into SQL Server "
+                           f"({metrics.rows_per_second:,.0f} rows/s)")
+            return 'success'
+
+        except Exception as e:
+            logger.error(f"  ✗ Error loading {table.name} to SQL Server: {str(e)[:200]}")
+            return 'failed'
+
+    async def load_wave(self, tables: list[GoldTable]) -> dict[str, str]:
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*(loop.run_in_executor(self._executor, self.load_table, table)
+                                         for table in tables))
+        return {table.name: status for table, status in zip(tables, results)}
+
+    async def close(self, statuses: dict[str, str]) -> None:
+        self._executor.shutdown(wait=True)
+        db_connection.get_pool('sqlserver', self.database).close()
@@ -0,0 +1,214 @@
+"""
+Shared database connections for the SETUP and TESTS scripts
+Pooled, opened lazily, one driver interface over SQL Server, Postgres and SQLite
+
+Connections are opened on first use and handed back to a per-target pool
+instead of being closed, so a script (and ensure_database, which works on
+master) pays the connection setup through the proxy once per target, not
+once per call. Pools are closed at exit.
+
+    with connection() as conn:          # SQL Server, from .env
+        ...
+    with cursor('postgres') as cur:     # SUPABASE_DB_URL
+        ...
+
+The block commits on success and rolls back on error. A connection that
+failed is discarded, not pooled. SQL Server cursors have fast_executemany on.
+
+Targets: 'sqlserver' (SERVER_NAME, DATABASE_NAME, SQL_LOGIN_USER,
+SQL_LOGIN_PASSWORD; Windows authentication without user), 'postgres'
+(SUPABASE_DB_URL, requires psycopg) and 'sqlite' (pass the file path).
+"""
+import atexit
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable
+from dotenv import load_dotenv
+from loguru import logger
+
+try:
+    import pyodbc
+    pyodbc.pooling = False  # pooled here, per target
+except ImportError:
+    pyodbc = None
+
+try:
+    import psycopg
+except ImportError:
+    psycopg = None
+
+load_dotenv()
+
+SQLSERVER_DRIVER = '{ODBC Driver 17 for SQL Server}'
+POOL_SIZE = 4  # idle connections kept per target
+
+
+@dataclass(frozen=True)
+class Driver:
+    name: str
+    connect: Callable[[str], object]
+
+
+def _connect_sqlserver(dsn: str):
+    if pyodbc is None:
+        raise RuntimeError('pyodbc is not installed (pip install pyodbc)')
+    return pyodbc.connect(dsn)
+
+
+def _connect_postgres(dsn: str):
+    if psycopg is None:
+        raise RuntimeError('psycopg is not installed (pip install "wndmngr-db[postgres]")')
+    return psycopg.connect(dsn)
+
+
+def _connect_sqlite(dsn: str):
+    return sqlite3.connect(dsn, check_same_thread=False)
+
+
+DRIVERS = {
+    'sqlserver': Driver('sqlserver', _connect_sqlserver),
+    'postgres': Driver('postgres', _connect_postgres),
+    'sqlite': Driver('sqlite', _connect_sqlite),
+}
+
+
+def sqlserver_dsn(database: str | None = None) -> str:
+    """ODBC connection string from .env (`database` overrides DATABASE_NAME, e.g. 'master')"""
+    server = os.getenv('SERVER_NAME')
+    database = database or os.getenv('DATABASE_NAME')
+    user, password = os.getenv('SQL_LOGIN_USER'), os.getenv('SQL_LOGIN_PASSWORD')
+    if not server or not database:
+        raise RuntimeError('Missing SERVER_NAME / DATABASE_NAME in .env')
+    if user and password:
+        return f'DRIVER={SQLSERVER_DRIVER};SERVER={server};DATABASE={database};UID={user};PWD={password};Encrypt=no;'
+    return f'DRIVER={SQLSERVER_DRIVER};SERVER={server};DATABASE={database};Trusted_Connection=yes;TrustServerCertificate=yes;'
+
+
+def resolve(target: str, database: str | None = None) -> tuple[Driver, str]:
+    """(driver, connection string) of a target name; for 'sqlite', `database` is the file path"""
+    if target == 'sqlserver':
+        return DRIVERS[target], sqlserver_dsn(database)
+    if target == 'postgres':
+        dsn = database or os.getenv('SUPABASE_DB_URL')
+        if not dsn:
+            raise RuntimeError('Missing SUPABASE_DB_URL in .env (direct Postgres connection)')
+        return DRIVERS[target], dsn
+    if target == 'sqlite':
+        if not database:
+            raise RuntimeError('SQLite target needs the database file path')
+        return DRIVERS[target], str(database)
+    raise ValueError(f"Unknown target '{target}' (expected one of {', '.join(DRIVERS)})")
+
+
+class ConnectionPool:
+    """Idle connections of one target, opened on demand (thread-safe)"""
+
+    def __init__(self, driver: Driver, dsn: str, size: int = POOL_SIZE):
+        self.driver = driver
+        self.dsn = dsn
+        self.size = size
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self.driver.connect(self.dsn)
+
+    def release(self, conn, broken: bool = False) -> None:
+        with self._lock:
+            if not broken and len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        _close(conn)
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            _close(conn)
+
+
+def _set_autocommit(conn, on: bool) -> None:
+    if isinstance(conn, sqlite3.Connection):
+        conn.isolation_level = None if on else ''
+    else:
+        conn.autocommit = on
+
+
+def _close(conn) -> None:
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+_pools: dict[tuple[str, str], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(target: str = 'sqlserver', database: str | None = None) -> ConnectionPool:
+    driver, dsn = resolve(target, database)
+    with _pools_lock:
+        if (driver.name, dsn) not in _pools:
+            _pools[(driver.name, dsn)] = ConnectionPool(driver, dsn)
+        return _pools[(driver.name, dsn)]
+
+
+@atexit.register
+def close_all() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+@contextmanager
+def connection(target: str = 'sqlserver', database: str | None = None, autocommit: bool = False):
+    """Pooled connection: commit on success, rollback on error
+
+    With `autocommit` every statement commits on its own (CREATE DATABASE
+    cannot run in a transaction); the pooled connection is reset afterwards.
+    """
+    pool = get_pool(target, database)
+    conn = pool.acquire()
+    broken = False
+    try:
+        if autocommit:
+            _set_autocommit(conn, True)
+        yield conn
+        if not autocommit:
+            conn.commit()
+    except Exception:
+        broken = True
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        raise
+    finally:
+        if autocommit and not broken:
+            try:
+                _set_autocommit(conn, False)
+            except Exception:
+                logger.debug(f"Could not reset autocommit, {pool.driver.name} connection discarded")
+                broken = True
+        pool.release(conn, broken)
+
+
+@contextmanager
+def cursor(target: str = 'sqlserver', database: str | None = None, autocommit: bool = False):
+    """Cursor on a pooled connection (see connection()); fast_executemany on SQL Server"""
+    with connection(target, database, autocommit) as conn:
+        cur = conn.cursor()
+        if pyodbc is not None and isinstance(conn, pyodbc.Connection):
+            cur.fast_executemany = True
+        try:
+            yield cur
+        finally:
+            cur.close()
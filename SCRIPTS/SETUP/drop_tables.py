@@ -1,8 +1,8 @@
-import pyodbc
 from loguru import logger
 from pathlib import Path
 import os
 from dotenv import load_dotenv
+from db_connection import cursor
 
 # Load environment variables
 load_dotenv()
@@ -24,11 +24,7 @@ assert USER is not None
 assert PASSWORD is not None
 
 try:
-    with pyodbc.connect(
-        f'DRIVER={{ODBC Driver 17 for SQL Server}};'
-        f'SERVER={SERVER};DATABASE={DATABASE};'
-        f'UID={USER};PWD={PASSWORD};Encrypt=no;'
-    ).cursor() as cur:
+    with cursor() as cur:
         
         logger.info("Starting database cleanup...")
         
@@ -1,43 +1,25 @@
 import pyodbc
-import sys
 from loguru import logger
-from typing import Optional
+from db_connection import connection
 
-def ensure_database_exists(
-    server: str,
-    database: str,
-    driver: str = '{ODBC Driver 17 for SQL Server}',
-    user: Optional[str] = None,
-    password: Optional[str] = None,
-    auto_create: bool = False
-) -> bool:
+def ensure_database_exists(database: str, auto_create: bool = False) -> bool:
     """
     Check if database exists, create if needed.
 
     Args:
-        server: SQL Server instance
-        database: Database name
-        driver: ODBC driver
-        user: SQL Server login user (optional, uses Windows auth if not provided)
-        password: SQL Server login password (optional)
+        database: Database name (server and login from .env, see db_connection.py)
         auto_create: If True, create without prompt. If False, prompt user.
 
     Returns True if database is ready, False otherwise.
     """
     # Connect to master to check/create database
-    if user and password:
-        # SQL Server authentication
-        master_conn_str = f'DRIVER={driver};SERVER={server};DATABASE=master;UID={user};PWD={password};Encrypt=no;'
-    else:
-        # Windows authentication
-        master_conn_str = f'DRIVER={driver};SERVER={server};DATABASE=master;Trusted_Connection=yes;TrustServerCertificate=yes;'
-
+    # CREATE DATABASE must run in autocommit mode (not in transaction)
     try:
-        with pyodbc.connect(master_conn_str) as conn:
+        with connection(database='master', autocommit=True) as conn:
             cursor = conn.cursor()
 
             # Check if database exists
-            cursor.execute(f"SELECT database_id FROM sys.databases WHERE name = '{database}'")
+            cursor.execute("SELECT database_id FROM sys.databases WHERE name = ?", database)
             exists = cursor.fetchone() is not None
 
             if exists:
@@ -45,7 +27,7 @@ def ensure_database_exists(
                 return True
 
             # Database doesn't exist
-            logger.warning(f"Database '{database}' does not exist on server '{server}'")
+            logger.warning(f"Database '{database}' does not exist")
 
             # Auto-create or prompt
             should_create = auto_create
@@ -55,8 +37,6 @@ def ensure_database_exists(
 
             if should_create:
                 logger.info(f"Creating database '{database}'...")
-                # CREATE DATABASE must run in autocommit mode (not in transaction)
-                conn.autocommit = True
                 # Use UTF-8 collation for proper accent handling
                 cursor.execute(f"CREATE DATABASE [{database}] COLLATE French_CI_AS")
                 logger.success(f"Database '{database}' created successfully with French_CI_AS collation")
@@ -65,6 +45,7 @@ def ensure_database_exists(
                 logger.error(f"Database creation declined. Cannot proceed.")
                 return False
 
-    except pyodbc.Error as ex:
+    except (pyodbc.Error, RuntimeError) as ex:
+        # RuntimeError: settings missing from .env or driver not installed (db_connection.py)
         logger.error(f"Database check/creation failed: {ex}")
         return False
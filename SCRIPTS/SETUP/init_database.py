@@ -2,7 +2,9 @@ import pyodbc
 from loguru import logger
 from pathlib import Path
 from ensure_database import ensure_database_exists
+from db_connection import cursor
 import os
+import re
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -12,7 +14,6 @@ SERVER = os.getenv('SERVER_NAME')
 DATABASE = os.getenv('DATABASE_NAME')
 USER = os.getenv('SQL_LOGIN_USER')
 PASSWORD = os.getenv('SQL_LOGIN_PASSWORD')
-DRIVER = '{ODBC Driver 17 for SQL Server}'
 
 # Validate required environment variables
 if not all([SERVER, DATABASE, USER, PASSWORD]):
@@ -26,7 +27,7 @@ assert USER is not None
 assert PASSWORD is not None
 
 # Ensure database exists before proceeding (auto-create enabled for invoke)
-if not ensure_database_exists(SERVER, DATABASE, DRIVER, USER, PASSWORD, auto_create=True):
+if not ensure_database_exists(DATABASE, auto_create=True):
     exit(1)
 
 base_path = Path(__file__).parent.parent.parent
@@ -36,14 +37,37 @@ entities = tables_path / '02_ENTITIES'
 relationships = tables_path / '03_RELATIONSHIPS'
 look_ups = tables_path / '04_LOOK_UPS'
 foreign_keys = tables_path / '05_FOREIGN_KEYS'
+indexes = tables_path / '08_INDEXES'
+
+# Index pack statements, written for Postgres (IF NOT EXISTS, public schema, partial WHERE)
+INDEX_RE = re.compile(
+    r'CREATE INDEX IF NOT EXISTS (?P<name>\w+) ON public\.(?P<table>\w+)\s*\((?P<columns>[^)]+)\)(?:\s+WHERE (?P<where>[^;]+))?;',
+    re.IGNORECASE,
+)
+
+
+def sqlserver_indexes(path: Path) -> list[str]:
+    """T-SQL version of an index pack file: guarded on sys.indexes, partial indexes as filtered indexes
+
+    Tables not created on SQL Server are skipped.
+    """
+    text = path.read_text()
+    statements = []
+    for match in INDEX_RE.finditer(text):
+        name, table = match['name'], match['table']
+        statement = (f"IF OBJECT_ID('dbo.{table}', 'U') IS NOT NULL AND NOT EXISTS "
+                     f"(SELECT 1 FROM sys.indexes WHERE name = '{name}' AND object_id = OBJECT_ID('dbo.{table}'))\n"
+                     f"    CREATE INDEX {name} ON dbo.{table} ({match['columns']})")
+        if match['where']:
+            statement += f" WHERE {match['where'].strip()}"
+        statements.append(statement)
+    if len(statements) != text.upper().count('CREATE INDEX'):
+        raise ValueError(f'{path.name}: index statement not translatable to T-SQL')
+    return statements
 
 
 try:
-    with pyodbc.connect(
-        f'DRIVER={DRIVER};'
-        f'SERVER={SERVER};DATABASE={DATABASE};'
-        f'UID={USER};PWD={PASSWORD};Encrypt=no;'
-    ).cursor() as cur:
+    with cursor() as cur:
         logger.success("Database connection established")
         ### REFERENCES
         cur.execute((references / 'company_roles.sql').read_text())
@@ -111,6 +135,12 @@ try:
         cur.execute((foreign_keys / 'wind_turbine_generators_fk.sql').read_text())
         logger.info('foreign keys for wind_turbine_generators ensured')
         logger.success('All foreign keys ready')
+        ### INDEXES
+        for path in sorted(indexes.glob('*.sql')):
+            for statement in sqlserver_indexes(path):
+                cur.execute(statement)
+            logger.info(f'indexes of {path.stem} ensured')
+        logger.success('All indexes ready')
 
 except pyodbc.Error as ex:
     sqlstate = ex.args[0]
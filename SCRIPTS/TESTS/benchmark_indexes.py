@@ -0,0 +1,220 @@
+"""
+Benchmark of the secondary index pack (TABLES/08_INDEXES)
+Query plans and timings before / after the indexes, on a synthetic 10k-farm dataset
+
+The tables are created from their TABLES/ DDL in a scratch schema (dropped at
+the end), filled server-side with generate_series, then each query of the
+validators and views is run with EXPLAIN ANALYZE: once with the primary keys
+only, once with the index pack. The plans are written to
+SCRIPTS/TESTS/DATA/index_benchmark.txt.
+
+Usage: python SCRIPTS/TESTS/benchmark_indexes.py [--farms 10000]
+Requires SUPABASE_DB_URL (or a local Postgres URL) and psycopg
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from pathlib import Path
+import psycopg
+from psycopg import sql
+from dotenv import load_dotenv
+from loguru import logger
+
+load_dotenv()
+
+TABLES_DIR = Path(__file__).parent.parent.parent / 'TABLES'
+INDEXES_DIR = TABLES_DIR / '08_INDEXES'
+OUTPUT_DIR = Path(__file__).parent / 'DATA'
+OUTPUT_FILE = OUTPUT_DIR / 'index_benchmark.txt'
+
+SCHEMA = 'index_benchmark'
+DDL_FILES = [
+    '01_REFERENCES/farm_types.sql',
+    '01_REFERENCES/person_roles.sql',
+    '01_REFERENCES/company_roles.sql',
+    '02_ENTITIES/farms.sql',
+    '02_ENTITIES/persons.sql',
+    '02_ENTITIES/companies.sql',
+    '02_ENTITIES/substations.sql',
+    '02_ENTITIES/wind_turbine_generators.sql',
+    '03_RELATIONSHIPS/farm_company_roles.sql',
+    '03_RELATIONSHIPS/farm_referents.sql',
+    '04_LOOK_UPS/farm_tariffs.sql',
+]
+RUNS = 5  # EXPLAIN ANALYZE runs per query, the best one is kept
+
+# Per farm: 2 substations, 8 turbines, 3 person + 2 company referents, 3 company roles, 1 tariff
+# {n} = number of farms
+FILL = [
+    "INSERT INTO farm_types SELECT i, 'type ' || i FROM generate_series(1, 3) i",
+    "INSERT INTO person_roles SELECT i, 'person role ' || i FROM generate_series(1, 6) i",
+    "INSERT INTO company_roles SELECT i, 'company role ' || i FROM generate_series(1, 6) i",
+    "INSERT INTO farms SELECT 'farm-' || i, 'SPV ' || i, 'Project ' || i, 'F' || lpad(i::text, 6, '0'), 1 + i % 3 "
+    "FROM generate_series(1, {n}) i",
+    "INSERT INTO persons (uuid, first_name, last_name) SELECT 'person-' || i, 'First ' || i, 'Last ' || i "
+    "FROM generate_series(1, {n} / 5) i",
+    "INSERT INTO companies SELECT 'company-' || i, 'Company ' || i FROM generate_series(1, {n} / 10) i",
+    "INSERT INTO substations SELECT 'sub-' || i || '-' || s, 'Substation ' || s, 'farm-' || i, 'F' || lpad(i::text, 6, '0'), NULL "
+    "FROM generate_series(1, {n}) i, generate_series(1, 2) s",
+    "INSERT INTO wind_turbine_generators SELECT 'wtg-' || i || '-' || w, i * 10 + w, 'WTG' || w, 'farm-' || i, "
+    "'F' || lpad(i::text, 6, '0'), 'sub-' || i || '-' || (1 + w % 2), 'Maker', 'Type', DATE '2015-01-01' "
+    "FROM generate_series(1, {n}) i, generate_series(1, 8) w",
+    "INSERT INTO farm_referents (farm_uuid, farm_code, person_role_id, person_uuid) "
+    "SELECT 'farm-' || i, 'F' || lpad(i::text, 6, '0'), r, 'person-' || (1 + (i * 3 + r) % ({n} / 5)) "
+    "FROM generate_series(1, {n}) i, generate_series(1, 3) r",
+    "INSERT INTO farm_referents (farm_uuid, farm_code, company_role_id, company_uuid) "
+    "SELECT 'farm-' || i, 'F' || lpad(i::text, 6, '0'), r, 'company-' || (1 + (i * 2 + r) % ({n} / 10)) "
+    "FROM generate_series(1, {n}) i, generate_series(1, 2) r",
+    "INSERT INTO farm_company_roles SELECT 'farm-' || i, 'F' || lpad(i::text, 6, '0'), "
+    "'company-' || (1 + (i * 3 + r) % ({n} / 10)), r FROM generate_series(1, {n}) i, generate_series(1, 3) r",
+    "INSERT INTO farm_tariffs (uuid, farm_uuid, farm_code, aggregator_contract_signature_date, aggregator_contract_start_date, "
+    "aggregator_contract_duration, has_active_edf_contract, tariff_ppa_type, tariff_start_date, tariff_end_date, duration, "
+    "energy_price_per_kwh) SELECT 'tariff-' || i, 'farm-' || i, 'F' || lpad(i::text, 6, '0'), DATE '2020-01-01', "
+    "DATE '2020-01-01', 15, true, 'PPA', DATE '2020-01-01', DATE '2035-01-01', 15, 0.08 FROM generate_series(1, {n}) i",
+]
+
+# (name, query): the lookups of validate_grid_wtg_to_db.py and the joins of view_farm_*.py, for one farm / person / company
+QUERIES = [
+    ('substations of a farm',
+     "SELECT uuid FROM substations WHERE farm_code = {farm_code}"),
+    ('substation by farm and name',
+     "SELECT uuid, substation_name, farm_code, gps_coordinates FROM substations "
+     "WHERE farm_code = {farm_code} AND substation_name = 'Substation 1'"),
+    ('turbine by serial number and farm',
+     "SELECT uuid, serial_number, wtg_number, manufacturer, wtg_type, commercial_operation_date "
+     "FROM wind_turbine_generators WHERE serial_number = {serial_number} AND farm_code = {farm_code}"),
+    ('turbines of a farm (join)',
+     "SELECT f.code, w.wtg_number, s.substation_name FROM farms f "
+     "JOIN wind_turbine_generators w ON w.farm_uuid = f.uuid "
+     "JOIN substations s ON s.uuid = w.substation_uuid WHERE f.code = {farm_code}"),
+    ('view_farm_referents of a farm',
+     "SELECT f.code, f.spv, f.project, pr.role_name, p.first_name, p.last_name FROM farm_referents fr "
+     "JOIN farms f ON f.uuid = fr.farm_uuid JOIN persons p ON p.uuid = fr.person_uuid "
+     "LEFT JOIN person_roles pr ON pr.id = fr.person_role_id WHERE f.code = {farm_code}"),
+    ('farms of a person',
+     "SELECT f.code, fr.person_role_id FROM farm_referents fr JOIN farms f ON f.uuid = fr.farm_uuid "
+     "WHERE fr.person_uuid = {person_uuid}"),
+    ('farms of a company (referents)',
+     "SELECT f.code, fr.company_role_id FROM farm_referents fr JOIN farms f ON f.uuid = fr.farm_uuid "
+     "WHERE fr.company_uuid = {company_uuid}"),
+    ('view_farm_company_roles of a company',
+     "SELECT f.code, f.spv, c.name, cr.role_name FROM farm_company_roles fcr "
+     "JOIN farms f ON f.uuid = fcr.farm_uuid JOIN companies c ON c.uuid = fcr.company_uuid "
+     "JOIN company_roles cr ON cr.id = fcr.company_role_id WHERE fcr.company_uuid = {company_uuid}"),
+    ('tariffs of a farm',
+     "SELECT t.tariff_ppa_type, t.energy_price_per_kwh FROM farm_tariffs t WHERE t.farm_uuid = {farm_uuid}"),
+]
+
+
+def schema_sql(path: Path) -> str:
+    """DDL of a TABLES/ file, pointed at the scratch schema"""
+    return re.sub(r'\bpublic\.', f'{SCHEMA}.', path.read_text(encoding='utf-8'))
+
+
+def explain(cur, query: str) -> tuple[float, list[str]]:
+    """Best execution time (ms) over RUNS and the plan of that run"""
+    best, best_plan = None, []
+    for _ in range(RUNS):
+        cur.execute(f'EXPLAIN (ANALYZE, COSTS OFF) {query}')
+        plan = [line for line, in cur.fetchall()]
+        ms = float(re.search(r'Execution Time: ([\d.]+) ms', plan[-1]).group(1))
+        if best is None or ms < best:
+            best, best_plan = ms, plan
+    return best, best_plan
+
+
+def scan_nodes(plan: list[str]) -> str:
+    """Scan nodes of a plan, e.g. 'Seq Scan on substations + Index Scan using farms_code_key'"""
+    nodes = re.findall(r'((?:Parallel )?(?:Seq|Index Only|Index|Bitmap Index) Scan (?:on|using) \w+)', '\n'.join(plan))
+    return ' + '.join(dict.fromkeys(nodes))
+
+
+def run_queries(cur, params: dict) -> dict[str, tuple[float, list[str]]]:
+    return {name: explain(cur, query.format(**params)) for name, query in QUERIES}
+
+
+def benchmark(db_url: str, farms: int) -> bool:
+    with psycopg.connect(db_url, autocommit=True) as conn, conn.cursor() as cur:
+        cur.execute(sql.SQL('DROP SCHEMA IF EXISTS {} CASCADE').format(sql.Identifier(SCHEMA)))
+        cur.execute(sql.SQL('CREATE SCHEMA {}').format(sql.Identifier(SCHEMA)))
+        cur.execute(sql.SQL('SET search_path TO {}').format(sql.Identifier(SCHEMA)))
+        try:
+            for name in DDL_FILES:
+                cur.execute(schema_sql(TABLES_DIR / name))
+
+            start = time.perf_counter()
+            for statement in FILL:
+                cur.execute(statement.format(n=farms))
+            cur.execute('ANALYZE')
+            cur.execute("SELECT relname, n_live_tup FROM pg_stat_user_tables WHERE schemaname = %s ORDER BY relname", (SCHEMA,))
+            logger.info(f"Synthetic dataset ({time.perf_counter() - start:.1f}s): "
+                        + ', '.join(f'{table} {rows:,}' for table, rows in cur.fetchall()))
+
+            middle = farms // 2
+            params = {
+                'farm_code': sql.Literal(f'F{middle:06d}').as_string(conn),
+                'farm_uuid': sql.Literal(f'farm-{middle}').as_string(conn),
+                'serial_number': middle * 10 + 3,
+                'person_uuid': sql.Literal(f'person-{farms // 10}').as_string(conn),
+                'company_uuid': sql.Literal(f'company-{farms // 20}').as_string(conn),
+            }
+
+            logger.info("Primary keys only...")
+            before = run_queries(cur, params)
+
+            index_files = sorted(INDEXES_DIR.glob('*.sql'))
+            start = time.perf_counter()
+            for path in index_files:
+                cur.execute(schema_sql(path))
+            cur.execute('ANALYZE')
+            logger.info(f"Index pack: {len(index_files)} files built in {time.perf_counter() - start:.1f}s")
+            after = run_queries(cur, params)
+        finally:
+            cur.execute(sql.SQL('DROP SCHEMA IF EXISTS {} CASCADE').format(sql.Identifier(SCHEMA)))
+
+    logger.info("=" * 80)
+    logger.info(f"{'Query':<38} {'before':>10} {'after':>10} {'speed-up':>9}")
+    slower = []
+    report = [f'Index pack benchmark: {farms:,} synthetic farms, best of {RUNS} runs\n']
+    for name, _ in QUERIES:
+        (before_ms, before_plan), (after_ms, after_plan) = before[name], after[name]
+        logger.info(f"{name:<38} {before_ms:>8.3f}ms {after_ms:>8.3f}ms {before_ms / max(after_ms, 0.001):>8.1f}x")
+        logger.info(f"    before: {scan_nodes(before_plan)}")
+        logger.info(f"    after:  {scan_nodes(after_plan)}")
+        if after_ms > before_ms:
+            slower.append(name)
+        report += [f'=== {name}', '--- primary keys only', *before_plan, '--- with TABLES/08_INDEXES', *after_plan, '']
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    OUTPUT_FILE.write_text('\n'.join(report), encoding='utf-8')
+    logger.info(f"Plans written to {OUTPUT_FILE}")
+
+    if slower:
+        logger.warning(f"⚠ Slower with the index pack: {', '.join(slower)}")
+        return False
+    logger.success("✓ Every query is at least as fast with the index pack")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query plans before / after TABLES/08_INDEXES on synthetic data')
+    parser.add_argument('--farms', type=int, default=10000, help='Number of synthetic farms (default 10000)')
+    args = parser.parse_args()
+
+    db_url = os.getenv('SUPABASE_DB_URL')
+    if not db_url:
+        logger.error("Missing SUPABASE_DB_URL in .env (direct Postgres connection)")
+        sys.exit(1)
+
+    logger.info("=" * 80)
+    logger.info(f"INDEX PACK BENCHMARK: {args.farms:,} synthetic farms (schema {SCHEMA})")
+    logger.info("=" * 80)
+    if not benchmark(db_url, args.farms):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
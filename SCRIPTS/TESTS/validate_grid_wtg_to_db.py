@@ -4,21 +4,21 @@ Tests de traçabilité avec random sampling pour les substations et turbines
 """
 
 from pathlib import Path
+import sys
 import pandas as pd
-import pyodbc
 from loguru import logger
 import os
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).parent.parent / 'ETL'))
+from setup_modules import db_connection
+
 # Load environment variables
 load_dotenv()
 
 # Configuration from .env
 SERVER = os.getenv('SERVER_NAME')
 DATABASE = os.getenv('DATABASE_NAME')
-USER = os.getenv('SQL_LOGIN_USER')
-PASSWORD = os.getenv('SQL_LOGIN_PASSWORD')
-DRIVER = '{ODBC Driver 17 for SQL Server}'
 
 # Paths
 silver_dir = Path('DATABASES') / 'france_172074' / 'DATA' / 'SILVER'
@@ -234,12 +234,6 @@ def main():
     logger.info("VALIDATION: GRID & WTG → Database")
     logger.info("="*80)
 
-    # Connect to database
-    connection_string = f'DRIVER={DRIVER};SERVER={SERVER};DATABASE={DATABASE};UID={USER};PWD={PASSWORD};Encrypt=no;'
-    conn = pyodbc.connect(connection_string)
-    cursor = conn.cursor()
-    logger.success(f"Connected to {SERVER}/{DATABASE}")
-
     # Load SILVER data
     df_grid = pd.read_csv(silver_dir / 'dbgrid_sheet.csv', encoding='utf-8-sig')
     df_wtg = pd.read_csv(silver_dir / 'dbwtg_sheet.csv', encoding='utf-8-sig')
@@ -247,32 +241,36 @@ def main():
     logger.info(f"\nTotal GRID rows: {len(df_grid)}")
     logger.info(f"Total WTG rows: {len(df_wtg)}")
 
-    # ═══════════════════════════════════════════════════════════════════════════
-    # TEST GRID (SUBSTATIONS)
-    # ═══════════════════════════════════════════════════════════════════════════
-    logger.info("\n\n" + "="*80)
-    logger.info("TESTING GRID DATA (SUBSTATIONS)")
-    logger.info("="*80)
+    # Connect to database (pooled, see SCRIPTS/SETUP/db_connection.py)
+    with db_connection.cursor() as cursor:
+        logger.success(f"Connected to {SERVER}/{DATABASE}")
 
-    # Sample random rows
-    grid_sample = df_grid.sample(n=min(SAMPLE_SIZE, len(df_grid)), random_state=RANDOM_SEED)
+        # ═══════════════════════════════════════════════════════════════════════════
+        # TEST GRID (SUBSTATIONS)
+        # ═══════════════════════════════════════════════════════════════════════════
+        logger.info("\n\n" + "="*80)
+        logger.info("TESTING GRID DATA (SUBSTATIONS)")
+        logger.info("="*80)
 
-    for idx, row in grid_sample.iterrows():
-        validate_substation(row, cursor)
+        # Sample random rows
+        grid_sample = df_grid.sample(n=min(SAMPLE_SIZE, len(df_grid)), random_state=RANDOM_SEED)
 
-    # ═══════════════════════════════════════════════════════════════════════════
-    # TEST WTG (WIND TURBINE GENERATORS)
-    # ═══════════════════════════════════════════════════════════════════════════
-    logger.info("\n\n" + "="*80)
-    logger.info("TESTING WTG DATA (WIND TURBINE GENERATORS)")
-    logger.info("="*80)
+        for idx, row in grid_sample.iterrows():
+            validate_substation(row, cursor)
+
+        # ═══════════════════════════════════════════════════════════════════════════
+        # TEST WTG (WIND TURBINE GENERATORS)
+        # ═══════════════════════════════════════════════════════════════════════════
+        logger.info("\n\n" + "="*80)
+        logger.info("TESTING WTG DATA (WIND TURBINE GENERATORS)")
+        logger.info("="*80)
 
-    # Sample random rows (filter out rows without serial number)
-    wtg_with_serial = df_wtg[df_wtg['wtg_serial_number'].notna()]
-    wtg_sample = wtg_with_serial.sample(n=min(SAMPLE_SIZE, len(wtg_with_serial)), random_state=RANDOM_SEED)
+        # Sample random rows (filter out rows without serial number)
+        wtg_with_serial = df_wtg[df_wtg['wtg_serial_number'].notna()]
+        wtg_sample = wtg_with_serial.sample(n=min(SAMPLE_SIZE, len(wtg_with_serial)), random_state=RANDOM_SEED)
 
-    for idx, row in wtg_sample.iterrows():
-        validate_turbine(row, cursor)
+        for idx, row in wtg_sample.iterrows():
+            validate_turbine(row, cursor)
 
     # ═══════════════════════════════════════════════════════════════════════════
     # SUMMARY
@@ -291,9 +289,6 @@ def main():
     success_rate = (passed_tests / total_tests * 100) if total_tests > 0 else 0
     logger.info(f"Success rate: {success_rate:.1f}%")
 
-    cursor.close()
-    conn.close()
-
     if failed_tests == 0:
         logger.success("\n✓ All validation tests passed!")
         return 0
@@ -0,0 +1,111 @@
+"""
+Validation of the Supabase REST load: no row is dropped silently
+Runs _06_csv_to_db.load_table against a stub PostgREST (httpx.MockTransport), no server needed
+
+- one row answered 413 Payload Too Large even alone
+- one row whose batch fails at the transport (connection refused)
+Both must end up in the quarantine file with their error, every other row
+confirmed by the server, and the table reported as 'warning'.
+
+Usage: python SCRIPTS/TESTS/validate_rest_quarantine.py
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+import httpx
+import pandas as pd
+from loguru import logger
+
+# Stub credentials: read by _06_csv_to_db at import, never sent anywhere
+os.environ['SUPABASE_URL'] = 'http://postgrest.stub/'
+os.environ['SUPABASE_API_KEY'] = 'stub'
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'ETL'))
+import _06_csv_to_db as csv_to_db
+import load_state
+from load_metrics import TableMetrics
+from load_state import AdaptiveBatchSizer
+from sinks import GoldTable
+
+ROW_COUNT = 200
+TOO_LARGE_CODE = 'F013'  # 413 whatever the batch size
+UNREACHABLE_CODE = 'F150'  # connection refused for any batch holding it
+
+# Test counters
+total_tests = 0
+passed_tests = 0
+failed_tests = 0
+
+
+def log_test(test_name, passed, details=""):
+    """Log test result avec loguru"""
+    global total_tests, passed_tests, failed_tests
+    total_tests += 1
+
+    if passed:
+        passed_tests += 1
+        logger.success(f"  ✓ {test_name}")
+    else:
+        failed_tests += 1
+        logger.error(f"  ✗ {test_name}")
+        if details:
+            logger.error(f"    → {details}")
+
+
+def stub_postgrest(confirmed: set):
+    """PostgREST stand-in: records the codes of the rows it accepts"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        codes = [row['code'] for row in json.loads(request.content)]
+        if UNREACHABLE_CODE in codes:
+            raise httpx.ConnectError('Connection refused', request=request)
+        if TOO_LARGE_CODE in codes:
+            return httpx.Response(413, json={'message': 'Payload Too Large'})
+        confirmed.update(codes)
+        return httpx.Response(201)
+    return httpx.MockTransport(handler)
+
+
+async def run_load(confirmed: set) -> str:
+    df = pd.DataFrame({'code': [f'F{i:03d}' for i in range(ROW_COUNT)], 'project': 'P'})
+    table = GoldTable('farms_stub', 'farms_stub.csv', df)
+    async with httpx.AsyncClient(transport=stub_postgrest(confirmed)) as client:
+        return await csv_to_db.load_table(
+            client, asyncio.Semaphore(4), table, AdaptiveBatchSizer('farms_stub', 2048),
+            primary_key=[], full_load=True, pending_deletes={}, metrics=TableMetrics('Supabase', 'farms_stub'),
+        )
+
+
+def main():
+    logger.info("Validating REST load accounting (stub PostgREST)...")
+    with tempfile.TemporaryDirectory() as state_dir:
+        load_state.STATE_DIR = Path(state_dir)  # quarantine files out of DATA/LOAD_STATE
+        confirmed = set()
+        status = asyncio.run(run_load(confirmed))
+
+        quarantine_path = Path(state_dir) / 'quarantine' / 'farms_stub.jsonl'
+        rejected = ([json.loads(line) for line in quarantine_path.read_text(encoding='utf-8').splitlines()]
+                    if quarantine_path.exists() else [])
+
+    rejected_codes = {entry['row']['code'] for entry in rejected}
+    errors = {entry['row']['code']: entry['error'] for entry in rejected}
+
+    log_test("Status is 'warning'", status == 'warning', f"got '{status}'")
+    log_test("Quarantine file written", bool(rejected))
+    log_test(f"413 row {TOO_LARGE_CODE} quarantined with its error",
+             '413' in errors.get(TOO_LARGE_CODE, ''), f"quarantine: {sorted(rejected_codes)[:10]}")
+    log_test(f"Unreachable row {UNREACHABLE_CODE} quarantined with its error",
+             'refused' in errors.get(UNREACHABLE_CODE, '').lower(), f"quarantine: {sorted(rejected_codes)[:10]}")
+    log_test("Every row confirmed or quarantined", len(confirmed | rejected_codes) == ROW_COUNT,
+             f"{ROW_COUNT - len(confirmed | rejected_codes)} rows missing")
+    log_test("No row both confirmed and quarantined", not confirmed & rejected_codes,
+             f"{sorted(confirmed & rejected_codes)[:10]}")
+
+    logger.info(f"\n{passed_tests}/{total_tests} tests passed")
+    sys.exit(1 if failed_tests else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,9 @@ CREATE TABLE IF NOT EXISTS public.farm_actual_performances (
         farm_uuid VARCHAR(36) NOT NULL,
         farm_code VARCHAR(10) NOT NULL,
         year INT NOT NULL,
-        amount DECIMAL(15,2) NOT NULL,
+        amount DECIMAL(15,2),
+        productible_mwh DECIMAL(15,2),
         PRIMARY KEY (farm_uuid, year),
-        CONSTRAINT fk_fap_farm FOREIGN KEY (farm_uuid) REFERENCES public.farms(uuid)
+        CONSTRAINT fk_fap_farm FOREIGN KEY (farm_uuid) REFERENCES public.farms(uuid),
+        CONSTRAINT chk_fap_values CHECK (amount IS NOT NULL OR productible_mwh IS NOT NULL)
     );
\ No newline at end of file
@@ -1,10 +1,6 @@
-IF NOT EXISTS (
-    SELECT * 
-    FROM sys.foreign_keys 
-    WHERE name = 'fk_employees_person' 
-    AND parent_object_id = OBJECT_ID('public.employees')
-);
-
-    ALTER TABLE public.employees 
-    ADD CONSTRAINT fk_employees_person 
-    FOREIGN KEY (person_uuid) REFERENCES public.persons(uuid);
\ No newline at end of file
+-- Added once both tables exist (persons is created after employees).
+-- DROP IF EXISTS + ADD: the file can run again on an existing database.
+ALTER TABLE public.employees DROP CONSTRAINT IF EXISTS fk_employees_person;
+ALTER TABLE public.employees
+    ADD CONSTRAINT fk_employees_person
+    FOREIGN KEY (person_uuid) REFERENCES public.persons(uuid);
@@ -1,9 +1,4 @@
-IF NOT EXISTS (
-    SELECT * 
-    FROM sys.foreign_keys 
-    WHERE name = 'fk_substations_farm' 
-    AND parent_object_id = OBJECT_ID('public.substations')
-);
-
-    ALTER TABLE public.substations 
-    ADD CONSTRAINT fk_substations_farm FOREIGN KEY (farm_uuid) REFERENCES public.farms(uuid);
\ No newline at end of file
+-- DROP IF EXISTS + ADD: the file can run again on an existing database.
+ALTER TABLE public.substations DROP CONSTRAINT IF EXISTS fk_substations_farm;
+ALTER TABLE public.substations
+    ADD CONSTRAINT fk_substations_farm FOREIGN KEY (farm_uuid) REFERENCES public.farms(uuid);
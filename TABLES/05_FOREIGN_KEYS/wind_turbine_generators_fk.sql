@@ -1,17 +1,8 @@
-IF NOT EXISTS (
-    SELECT * FROM sys.foreign_keys
-    WHERE name = 'fk_wtg_farm'
-    AND parent_object_id = OBJECT_ID('public.wind_turbine_generators')
-);
-
-    ALTER TABLE public.wind_turbine_generators
+-- DROP IF EXISTS + ADD: the file can run again on an existing database.
+ALTER TABLE public.wind_turbine_generators DROP CONSTRAINT IF EXISTS fk_wtg_farm;
+ALTER TABLE public.wind_turbine_generators
     ADD CONSTRAINT fk_wtg_farm FOREIGN KEY (farm_uuid) REFERENCES public.farms(uuid);
 
-IF NOT EXISTS (
-    SELECT * FROM sys.foreign_keys
-    WHERE name = 'fk_wtg_substation'
-    AND parent_object_id = OBJECT_ID('public.wind_turbine_generators')
-);
-
-    ALTER TABLE public.wind_turbine_generators
-    ADD CONSTRAINT fk_wtg_substation FOREIGN KEY (substation_uuid) REFERENCES public.substations(uuid);
\ No newline at end of file
+ALTER TABLE public.wind_turbine_generators DROP CONSTRAINT IF EXISTS fk_wtg_substation;
+ALTER TABLE public.wind_turbine_generators
+    ADD CONSTRAINT fk_wtg_substation FOREIGN KEY (substation_uuid) REFERENCES public.substations(uuid);
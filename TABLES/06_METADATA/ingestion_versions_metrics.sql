@@ -0,0 +1,29 @@
+-- =============================================
+-- Table: ingestion_versions_metrics
+-- Description: Per-table load metrics of each ingestion version (one row per table and target)
+-- =============================================
+
+CREATE TABLE IF NOT EXISTS ingestion_versions_metrics (
+    id SERIAL PRIMARY KEY,
+    ingestion_version_id INT NOT NULL,
+    target VARCHAR(50) NOT NULL, -- 'Supabase', 'Supabase (COPY)', 'SQLite'
+    table_name VARCHAR(100) NOT NULL,
+    status VARCHAR(20) NOT NULL, -- 'success', 'warning', 'failed'
+    rows_in_gold INT, -- Rows in the GOLD file (after pre-validation)
+    rows_sent INT, -- Rows confirmed by the target
+    rows_rejected INT, -- Rows refused by the target (quarantined)
+    bytes_sent BIGINT, -- Payload bytes of the confirmed batches
+    batches INT, -- Batches confirmed by the target
+    retries INT, -- Requests resent (transport retries and batch splits)
+    latency_p50_ms INT, -- Median batch latency
+    latency_p95_ms INT, -- 95th percentile batch latency
+    rows_per_second DECIMAL(12,1), -- rows_sent / duration_seconds
+    duration_seconds DECIMAL(10,3), -- Wall time of the table on this target
+    CONSTRAINT fk_ivm_version FOREIGN KEY (ingestion_version_id) REFERENCES ingestion_versions(id) ON DELETE CASCADE,
+    CONSTRAINT UQ_ingestion_versions_metrics UNIQUE (ingestion_version_id, target, table_name)
+);
+
+-- Index for throughput history of one table
+CREATE INDEX IX_ingestion_versions_metrics_table ON ingestion_versions_metrics(table_name, target);
+
+COMMENT ON TABLE ingestion_versions_metrics IS 'Per-table throughput of each ingestion version (rows, bytes, batches, retries, latency percentiles), to track load speed over time';
@@ -0,0 +1,13 @@
+-- =============================================
+-- Table: schema_migrations
+-- Description: Checksum of each DDL file of TABLES/ applied to this database (SCRIPTS/ETL/migrate_schema.py)
+-- =============================================
+
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    file_path VARCHAR(255) PRIMARY KEY, -- Relative to TABLES/, e.g. '02_ENTITIES/farms.sql'
+    checksum VARCHAR(64) NOT NULL, -- SHA-256 of the file content (line endings normalized)
+    statements INT NOT NULL, -- Statements run for this version of the file (CREATE, generated ALTER, ...)
+    applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE schema_migrations IS 'DDL files of TABLES/ applied to this database, with their checksum: only new or changed files are applied again';
@@ -0,0 +1,56 @@
+-- =============================================
+-- Function: wipe_managed_tables
+-- Description: Empties every table loaded from GOLD in one statement (used by _05_wipe_database.py)
+-- =============================================
+-- One TRUNCATE over all the tables: a single transaction, no per-row work,
+-- no WAL per deleted row, constant time whatever the volume.
+-- CASCADE also empties tables outside this list that reference them.
+-- Keep the list in line with LOAD_ORDER in SCRIPTS/ETL/_06_csv_to_db.py.
+
+CREATE OR REPLACE FUNCTION public.wipe_managed_tables()
+RETURNS void
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    TRUNCATE TABLE
+        farm_target_performances,
+        farm_actual_performances,
+        farm_ice_detection_systems,
+        farm_turbine_details,
+        farm_substation_details,
+        farm_statuses,
+        farm_tcma_contracts,
+        farm_om_contracts,
+        farm_locations,
+        farm_financial_guarantees,
+        farm_environmental_installations,
+        farm_administrations,
+        farm_referents,
+        farm_company_roles,
+        employees,
+        wind_turbine_generators,
+        substations,
+        farms,
+        ice_detection_systems,
+        persons,
+        companies,
+        person_roles,
+        company_roles,
+        farm_types
+    CASCADE
+$$;
+
+-- Callable through PostgREST (POST /rest/v1/rpc/wipe_managed_tables) with the service role key only
+-- (the Supabase roles do not exist on a plain Postgres, where only the owner keeps EXECUTE)
+REVOKE ALL ON FUNCTION public.wipe_managed_tables() FROM PUBLIC;
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'service_role') THEN
+        REVOKE ALL ON FUNCTION public.wipe_managed_tables() FROM anon, authenticated;
+        GRANT EXECUTE ON FUNCTION public.wipe_managed_tables() TO service_role;
+    END IF;
+END
+$$;
+
+COMMENT ON FUNCTION public.wipe_managed_tables() IS 'Empties all tables loaded from GOLD in one TRUNCATE ... CASCADE (ETL step 5)';
@@ -0,0 +1,7 @@
+-- Secondary indexes: the DDL only indexes primary keys and UNIQUE columns.
+-- IF NOT EXISTS: the file can run again on an existing database.
+-- SQL Server: translated to T-SQL by SCRIPTS/SETUP/init_database.py (sys.indexes guard, filtered indexes).
+-- farm_uuid lookups already use the primary key (farm_uuid, company_uuid, company_role_id).
+
+-- Farms of a company (view_farm_company_roles.py join, fk_fcr_company)
+CREATE INDEX IF NOT EXISTS IX_farm_company_roles_company_uuid ON public.farm_company_roles(company_uuid);
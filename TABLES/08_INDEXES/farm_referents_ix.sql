@@ -0,0 +1,10 @@
+-- Secondary indexes: the DDL only indexes primary keys and UNIQUE columns.
+-- IF NOT EXISTS: the file can run again on an existing database.
+-- SQL Server: translated to T-SQL by SCRIPTS/SETUP/init_database.py (sys.indexes guard, filtered indexes).
+
+-- Referents of a farm (view_farm_referents.py join, fk_fr_farm)
+CREATE INDEX IF NOT EXISTS IX_farm_referents_farm_uuid ON public.farm_referents(farm_uuid);
+
+-- Farms of a person / of a company (fk_fr_person, fk_fr_company); each is NULL on about half the rows
+CREATE INDEX IF NOT EXISTS IX_farm_referents_person_uuid ON public.farm_referents(person_uuid) WHERE person_uuid IS NOT NULL;
+CREATE INDEX IF NOT EXISTS IX_farm_referents_company_uuid ON public.farm_referents(company_uuid) WHERE company_uuid IS NOT NULL;
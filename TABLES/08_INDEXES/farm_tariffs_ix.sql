@@ -0,0 +1,7 @@
+-- Secondary indexes: the DDL only indexes primary keys and UNIQUE columns.
+-- IF NOT EXISTS: the file can run again on an existing database.
+-- SQL Server: translated to T-SQL by SCRIPTS/SETUP/init_database.py (sys.indexes guard, filtered indexes).
+-- The other look-up tables are keyed by farm_uuid already; farm_tariffs has its own uuid.
+
+-- Tariffs of a farm (fk_ftariffs_farm)
+CREATE INDEX IF NOT EXISTS IX_farm_tariffs_farm_uuid ON public.farm_tariffs(farm_uuid);
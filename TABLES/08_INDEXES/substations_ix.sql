@@ -0,0 +1,9 @@
+-- Secondary indexes: the DDL only indexes primary keys and UNIQUE columns.
+-- IF NOT EXISTS: the file can run again on an existing database.
+-- SQL Server: translated to T-SQL by SCRIPTS/SETUP/init_database.py (sys.indexes guard, filtered indexes).
+
+-- Substations of a farm: WHERE farm_code = ? [AND substation_name = ?] (validate_grid_wtg_to_db.py)
+CREATE INDEX IF NOT EXISTS IX_substations_farm_code ON public.substations(farm_code, substation_name);
+
+-- Join / delete of a farm (fk_substations_farm)
+CREATE INDEX IF NOT EXISTS IX_substations_farm_uuid ON public.substations(farm_uuid);
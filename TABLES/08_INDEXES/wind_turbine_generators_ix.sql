@@ -0,0 +1,10 @@
+-- Secondary indexes: the DDL only indexes primary keys and UNIQUE columns.
+-- IF NOT EXISTS: the file can run again on an existing database.
+-- SQL Server: translated to T-SQL by SCRIPTS/SETUP/init_database.py (sys.indexes guard, filtered indexes).
+
+-- Turbines of a farm: WHERE farm_code = ? [AND serial_number = ?] (validate_grid_wtg_to_db.py)
+CREATE INDEX IF NOT EXISTS IX_wind_turbine_generators_farm_code ON public.wind_turbine_generators(farm_code, serial_number);
+
+-- Join / delete of a farm (fk_wtg_farm) and of a substation (fk_wtg_substation)
+CREATE INDEX IF NOT EXISTS IX_wind_turbine_generators_farm_uuid ON public.wind_turbine_generators(farm_uuid);
+CREATE INDEX IF NOT EXISTS IX_wind_turbine_generators_substation_uuid ON public.wind_turbine_generators(substation_uuid);
@@ -24,6 +24,22 @@ def setup_db(c):
     c.run(f"python {Path('SCRIPTS/SETUP') / 'init_database.py'}")
     logger.success("Database structure ready")
 
+@task
+def migrate_db(c, dry_run=False):
+    """Apply new or changed TABLES/*.sql to Supabase (checksums in schema_migrations, needs SUPABASE_DB_URL)
+
+    Args:
+        dry_run: If True, print the planned statements (CREATE or generated ALTER) without running them
+    """
+    logger.info("Migrating database structure...")
+    c.run(f"python {Path('SCRIPTS/ETL') / 'migrate_schema.py'}{' --dry-run' if dry_run else ''}")
+
+@task
+def compact_db(c):
+    """Create the compact schema variant next to public: UUID keys, farm_code on farms only (needs SUPABASE_DB_URL)"""
+    logger.info("Creating the compact schema...")
+    c.run(f"python {Path('SCRIPTS/ETL') / 'compact_schema.py'}")
+
 @task
 def drop_db(c):
     """Drop all tables (dev only - use SSMS for prod!)"""
@@ -38,16 +54,16 @@ def reset_db(c):
 
 @task
 def wipe_and_reload(c):
-    """DELETE all data and reload from GOLD (dev/debug - structure intact)"""
-    logger.warning("Wiping all data and reloading from GOLD...")
-    c.run(f"python {Path('SCRIPTS/ETL') / '_04_gold_to_db.py'} --truncate")
-    logger.success("Data wiped and reloaded!")
+    """Replace all data with GOLD: staging schema load, swapped in atomically (needs SUPABASE_DB_URL)"""
+    logger.warning("Reloading all data from GOLD through a staging schema...")
+    c.run(f"python {Path('SCRIPTS/ETL') / '_06_csv_to_db.py'} --swap")
+    logger.success("Data reloaded and swapped in!")
 
 @task
 def ingest_data(c):
-    """Load/update data from GOLD (upsert - no deletion)"""
+    """Load/update data from GOLD into the SQL Server database (fast_executemany + MERGE, upsert - no deletion)"""
     logger.info("Ingesting data from GOLD layer...")
-    c.run(f"python {Path('SCRIPTS/ETL') / '_04_gold_to_db.py'}")
+    c.run(f"python {Path('SCRIPTS/ETL') / '_06_csv_to_db.py'} --sqlserver")
     logger.success("Data ingested from GOLD!")
 
 #################
@@ -120,7 +136,7 @@ def etl_ingest(c):
 
 @task(etl_pipeline, wipe_and_reload)
 def etl_wipe(c):
-    """Run ETL pipeline + wipe and reload all data (dev only)"""
+    """Run ETL pipeline + replace all data (staging load, atomic swap)"""
     logger.warning("[OK] ETL pipeline + data wipe complete!")
 
 @task(reset_db, etl_pipeline, ingest_data)
@@ -342,10 +358,15 @@ def gh_deploy(c, force=False):
 ###########################
 
 @task
-def wipe_database(c):
-    """ETL Step 5: Wipe all data from Supabase database (OPTIONAL)"""
+def wipe_database(c, per_table=False):
+    """ETL Step 5: Wipe all data from Supabase database (OPTIONAL)
+
+    Args:
+        per_table: If True, delete table by table through the REST API
+                   instead of the server-side wipe_managed_tables() function
+    """
     logger.warning("Wiping all Supabase data...")
-    c.run(f"python {Path('SCRIPTS/ETL') / '_05_wipe_database.py'}")
+    c.run(f"python {Path('SCRIPTS/ETL') / '_05_wipe_database.py'}{' --per-table' if per_table else ''}")
     logger.success("Supabase data wiped!")
 
 # Alias for backwards compatibility
@@ -356,18 +377,27 @@ def supabase_wipe(c):
     wipe_database(c)
 
 @task
-def sql_to_db(c):
-    """ETL Step 4: SQL to DB (Trigger GitHub Actions to setup database structure)"""
+def sql_to_db(c, workflow=False):
+    """ETL Step 4: SQL to DB (apply TABLES/*.sql directly over SUPABASE_DB_URL, one transaction)
+
+    Args:
+        workflow: If True, trigger the setup-database.yml GitHub Actions workflow instead
+    """
     logger.info("ETL STEP 4: SQL to DB (Setup database structure)")
-    c.run(f"python {Path('SCRIPTS/ETL') / '_04_sql_to_db.py'}")
+    c.run(f"python {Path('SCRIPTS/ETL') / '_04_sql_to_db.py'}{' --workflow' if workflow else ''}")
 
 @task
-def csv_to_db(c, truncate=False):
+def csv_to_db(c, truncate=False, full=False, resume=False, strict=False, reconcile=False, compact=False):
     """ETL Step 6: CSV to DB (Load GOLD data to Supabase)
 
     Args:
         truncate: If True, wipe all data first (Step 5) then load (Step 6)
                   If False, just load with upsert (safe mode)
+        full: If True, resend every row instead of only rows changed since the last load
+        resume: If True, skip what an interrupted previous run already loaded
+        strict: If True, load nothing when a GOLD row violates the DDL constraints
+        reconcile: If True, delete the remote rows absent from GOLD (e.g. farms dropped from the source)
+        compact: If True, load the compact schema variant (see compact-db) instead of public
     """
     if truncate:
         logger.warning("Truncate mode: Wiping database first...")
@@ -375,7 +405,14 @@ def csv_to_db(c, truncate=False):
         logger.info("")
 
     logger.info("ETL STEP 6: CSV to DB (Load data)")
-    c.run(f"python {Path('SCRIPTS/ETL') / '_06_csv_to_db.py'}")
+    flags = (' --full' if full else '') + (' --resume' if resume else '') + (' --strict' if strict else '')
+    flags += (' --reconcile' if reconcile else '') + (' --compact' if compact else '')
+    c.run(f"python {Path('SCRIPTS/ETL') / '_06_csv_to_db.py'}{flags}")
+
+@task
+def sqlite_rollback(c):
+    """Restore the WNDMNGR.APP SQLite database of the previous csv-to-db load"""
+    c.run(f"python {Path('SCRIPTS/ETL') / '_06_csv_to_db.py'} --rollback-sqlite")
 
 @task(raw_to_bronze, bronze_to_silver, silver_to_gold)
 def etl_to_gold(c):
@@ -388,7 +425,7 @@ def supabase_setup(c):
 
     Workflow:
     1. ETL: Excel to BRONZE to SILVER to GOLD (local)
-    2. GitHub Actions: Upload SQL + Execute (create tables)
+    2. SQL to DB: Apply new or changed TABLES/*.sql (direct connection)
     """
     logger.info("=" * 80)
     logger.success("ETL + Database structure setup complete!")
@@ -401,7 +438,7 @@ def supabase_full(c):
 
     Full workflow:
     1. ETL: Excel to BRONZE to SILVER to GOLD (local)
-    2. SQL to DB: Setup structure (GitHub Actions)
+    2. SQL to DB: Setup structure (direct connection)
     3. CSV to DB: Load data (Supabase API)
     """
     logger.info("=" * 80)